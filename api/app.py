@@ -1,14 +1,18 @@
-from fastapi import FastAPI, HTTPException, UploadFile, File, Depends
+from fastapi import FastAPI, HTTPException, UploadFile, File, Depends, Header, Response
 from fastapi.middleware.cors import CORSMiddleware
-from typing import Dict, Any
+from contextlib import asynccontextmanager
+from typing import Dict, Any, Optional
 import uvicorn
 import os
 import sys
+import secrets
 
 # Add root to path to import orchestrator
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from orchestrator.agent import AssistantAgent
+from orchestrator.index_reloader import IndexReloader
+from config.embedding_settings import RAG_ADMIN_TOKEN
 from api.schemas import (
     SessionCreateRequest, SessionCreateResponse,
     MessageRequest, MessageResponse,
@@ -20,7 +24,17 @@ from api.session_store import SessionStore, InMemorySessionStore
 from adapters.stt_adapter import STTAdapter
 from adapters.tts_adapter import TTSAdapter
 
-app = FastAPI(title="OneCard Assistant API", version="1.0.0")
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Poll the index manifest and hot-swap rebuilt indexes (RAG_RELOAD_INTERVAL_SECONDS > 0)
+    index_reloader.start()
+    yield
+    index_reloader.stop()
+    # Keep LLM router classifications for the next start (ROUTER_CACHE_WARM_PATH)
+    if assistant.router.use_real_llm:
+        assistant.router.save_warm_cache()
+
+app = FastAPI(title="OneCard Assistant API", version="1.0.0", lifespan=lifespan)
 
 # CORS
 app.add_middleware(
@@ -34,6 +48,7 @@ app.add_middleware(
 # Dependencies
 session_store = InMemorySessionStore()
 assistant = AssistantAgent()
+index_reloader = IndexReloader(assistant)
 stt_adapter = STTAdapter()
 tts_adapter = TTSAdapter()
 
@@ -44,6 +59,34 @@ def get_session_store():
 def health_check():
     return {"status": "ok"}
 
+@app.get("/v1/metrics/rag")
+def rag_metrics():
+    return {
+        **assistant.rag.cache_stats(),
+        "answer_cache": assistant.answer_cache.stats(),
+        "reloader": index_reloader.stats(),
+        "router": assistant.router.stats()
+    }
+
+@app.post("/v1/admin/rag/reload", status_code=202)
+def reload_rag_index(response: Response, rebuild: bool = False, wait: bool = False,
+                     x_admin_token: Optional[str] = Header(default=None)):
+    """
+    Loads the index from disk (rebuilding it from the KB first with rebuild=true)
+    in the background and swaps it in without dropping requests (202).
+    wait=true blocks until the swap is done and returns its outcome (200).
+    Disabled (404) unless RAG_ADMIN_TOKEN is set; requests must send it as X-Admin-Token.
+    """
+    if not RAG_ADMIN_TOKEN:
+        raise HTTPException(status_code=404, detail="Not Found")
+    if not secrets.compare_digest(x_admin_token or "", RAG_ADMIN_TOKEN):
+        raise HTTPException(status_code=403, detail="Invalid admin token")
+    if wait:
+        response.status_code = 200
+        return index_reloader.reload(force=True, rebuild=rebuild)
+    started = index_reloader.reload_in_background(force=True, rebuild=rebuild)
+    return {"started": started, "index_id": assistant.rag.index_id}
+
 @app.post("/v1/sessions", response_model=SessionCreateResponse)
 def create_session(request: SessionCreateRequest, store: SessionStore = Depends(get_session_store)):
     session_id = store.create_session(request.user_id, request.client_type, request.metadata)
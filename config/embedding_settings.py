@@ -15,14 +15,87 @@ RUN_REAL_EMBEDDINGS = os.getenv("RUN_REAL_EMBEDDINGS", "false").lower() == "true
 # Embedding Model Name (provider specific)
 EMBEDDING_MODEL = os.getenv("EMBEDDING_MODEL", "all-MiniLM-L6-v2")
 
+# Local sentence-transformers provider: texts per encode batch, torch CPU threads
+# (0 keeps the torch default) and weight quantization ('none' or 'int8')
+LOCAL_EMBEDDING_BATCH_SIZE = int(os.getenv("LOCAL_EMBEDDING_BATCH_SIZE", "64"))
+LOCAL_EMBEDDING_THREADS = int(os.getenv("LOCAL_EMBEDDING_THREADS", "0"))
+LOCAL_EMBEDDING_QUANTIZE = os.getenv("LOCAL_EMBEDDING_QUANTIZE", "none").lower()
+
+# On-disk embedding cache (SQLite, keyed by model and text hash) shared by index
+# builds and queries; empty disables it. Mock embeddings are never cached.
+EMBEDDING_CACHE_PATH = os.getenv("EMBEDDING_CACHE_PATH", os.path.join("data", "embedding_cache.sqlite3"))
+
+# Knowledge base: a single file or a directory of .txt/.md/.json documents (one shard per document)
+RAG_KB_PATH = os.getenv("RAG_KB_PATH", os.path.join("data", "knowledge_base.txt"))
+
+# Worker processes used to build shards in parallel (1 builds in-process)
+RAG_BUILD_WORKERS = int(os.getenv("RAG_BUILD_WORKERS", "4"))
+
 # RAG Index Directory
 RAG_INDEX_DIR = os.getenv("RAG_INDEX_DIR", os.path.join("data", "rag_index"))
 
+# Seconds between checks of the index manifest for a rebuilt index to hot-swap in (0 disables the watcher)
+RAG_RELOAD_INTERVAL_SECONDS = float(os.getenv("RAG_RELOAD_INTERVAL_SECONDS", "0"))
+
+# Token required by the admin reload endpoint (X-Admin-Token header); empty disables the endpoint
+RAG_ADMIN_TOKEN = os.getenv("RAG_ADMIN_TOKEN", "")
+
 # Minimum Similarity Score Threshold
 RAG_MIN_SCORE = float(os.getenv("RAG_MIN_SCORE", "0.25"))
 
+# Chunking: token budget per chunk, overlap between chunks, and tokenizer
+# ('approx' = ~4 chars/token, otherwise a Hugging Face tokenizers model name)
+RAG_CHUNK_TOKENS = int(os.getenv("RAG_CHUNK_TOKENS", "300"))
+RAG_CHUNK_OVERLAP_TOKENS = int(os.getenv("RAG_CHUNK_OVERLAP_TOKENS", "50"))
+RAG_CHUNK_TOKENIZER = os.getenv("RAG_CHUNK_TOKENIZER", "approx")
+
+# Approximate nearest-neighbour backend: 'exact', 'ivf' (pure NumPy) or 'hnsw' (hnswlib)
+RAG_ANN_BACKEND = os.getenv("RAG_ANN_BACKEND", "exact").lower()
+
+# Indexes smaller than this are always searched exactly
+RAG_ANN_MIN_PASSAGES = int(os.getenv("RAG_ANN_MIN_PASSAGES", "1000"))
+
+# IVF parameters (nlist=0 picks ~4*sqrt(passages) lists)
+RAG_IVF_NLIST = int(os.getenv("RAG_IVF_NLIST", "0"))
+RAG_IVF_NPROBE = int(os.getenv("RAG_IVF_NPROBE", "8"))
+
+# HNSW parameters
+RAG_HNSW_M = int(os.getenv("RAG_HNSW_M", "16"))
+RAG_HNSW_EF_CONSTRUCTION = int(os.getenv("RAG_HNSW_EF_CONSTRUCTION", "200"))
+RAG_HNSW_EF_SEARCH = int(os.getenv("RAG_HNSW_EF_SEARCH", "64"))
+
+# Retrieval mode: 'dense' (lexical only as a fallback) or 'hybrid' (dense + BM25 fused)
+RAG_RETRIEVAL_MODE = os.getenv("RAG_RETRIEVAL_MODE", "dense").lower()
+
+# Hybrid fusion: 'rrf' (reciprocal-rank fusion) or 'weighted' (normalized score blend)
+RAG_HYBRID_FUSION = os.getenv("RAG_HYBRID_FUSION", "rrf").lower()
+RAG_HYBRID_DENSE_WEIGHT = float(os.getenv("RAG_HYBRID_DENSE_WEIGHT", "1.0"))
+RAG_HYBRID_LEXICAL_WEIGHT = float(os.getenv("RAG_HYBRID_LEXICAL_WEIGHT", "1.0"))
+RAG_RRF_K = int(os.getenv("RAG_RRF_K", "60"))
+
+# Candidates taken from each retriever before fusion
+RAG_HYBRID_CANDIDATES = int(os.getenv("RAG_HYBRID_CANDIDATES", "20"))
+
+# Query embedding cache (LRU entries and time-to-live in seconds; size 0 disables)
+QUERY_CACHE_SIZE = int(os.getenv("QUERY_CACHE_SIZE", "1024"))
+QUERY_CACHE_TTL_SECONDS = float(os.getenv("QUERY_CACHE_TTL_SECONDS", "3600"))
+
 # Reranker Enabled?
 RERANKER_ENABLED = os.getenv("RUN_RERANKER", "false").lower() == "true"
 
+# Reranker: 'lexical' (query term overlap) or 'cross-encoder' (sentence-transformers model)
+RERANKER_BACKEND = os.getenv("RERANKER_BACKEND", "lexical").lower()
+RERANKER_MODEL = os.getenv("RERANKER_MODEL", "cross-encoder/ms-marco-MiniLM-L-6-v2")
+
+# First-stage candidates rescored per query, pairs per inference batch, and the
+# per-query time budget after which the first-stage order is kept
+RERANKER_CANDIDATES = int(os.getenv("RERANKER_CANDIDATES", "20"))
+RERANKER_BATCH_SIZE = int(os.getenv("RERANKER_BATCH_SIZE", "16"))
+RERANKER_BUDGET_MS = float(os.getenv("RERANKER_BUDGET_MS", "150"))
+
 # Index Version
 INDEX_VERSION = "v1"
+
+# Binary embeddings file written next to each shard's index.bin (bump the format on layout changes)
+EMBEDDINGS_FILE = "embeddings.npy"
+EMBEDDINGS_FORMAT_VERSION = 1
@@ -14,3 +14,37 @@ GOOGLE_API_KEY = os.getenv("GOOGLE_API_KEY") or os.getenv("GEMINI_API_KEY")
 
 # Model Name
 GEMINI_MODEL_NAME = os.getenv("GEMINI_MODEL_NAME", "gemini-2.5-flash")
+
+# Batch embedding: texts per embed_documents call, concurrent batches, retries
+EMBED_BATCH_SIZE = int(os.getenv("EMBED_BATCH_SIZE", "100"))
+EMBED_MAX_CONCURRENCY = int(os.getenv("EMBED_MAX_CONCURRENCY", "4"))
+EMBED_MAX_RETRIES = int(os.getenv("EMBED_MAX_RETRIES", "3"))
+EMBED_RETRY_BASE_DELAY = float(os.getenv("EMBED_RETRY_BASE_DELAY", "0.5"))
+
+# Semantic answer cache for RAG responses (size 0 disables; similarity is cosine of query embeddings)
+ANSWER_CACHE_SIZE = int(os.getenv("ANSWER_CACHE_SIZE", "512"))
+ANSWER_CACHE_TTL_SECONDS = float(os.getenv("ANSWER_CACHE_TTL_SECONDS", "3600"))
+ANSWER_CACHE_MIN_SIMILARITY = float(os.getenv("ANSWER_CACHE_MIN_SIMILARITY", "0.95"))
+
+# Mock-mode router rules (YAML) and the compiled artifact built by scripts/compile_router_rules.py
+ROUTER_RULES_PATH = os.getenv("ROUTER_RULES_PATH", os.path.join("data", "router_rules.yaml"))
+ROUTER_RULES_COMPILED_PATH = os.getenv("ROUTER_RULES_COMPILED_PATH", os.path.join("data", "router_rules.compiled.json"))
+
+# LLM router classification cache: LRU entries and TTL (size 0 disables), and an
+# optional JSON file of classifications loaded at startup and saved on shutdown
+ROUTER_CACHE_SIZE = int(os.getenv("ROUTER_CACHE_SIZE", "2048"))
+ROUTER_CACHE_TTL_SECONDS = float(os.getenv("ROUTER_CACHE_TTL_SECONDS", "86400"))
+ROUTER_CACHE_WARM_PATH = os.getenv("ROUTER_CACHE_WARM_PATH", "")
+
+# Tiered router (USE_REAL_LLM_ROUTER=tiered): heuristic classifications below this
+# confidence, or "ambiguous" ones, are escalated to the LLM
+ROUTER_ESCALATION_THRESHOLD = float(os.getenv("ROUTER_ESCALATION_THRESHOLD", "0.8"))
+
+# Local intent classifier, the tiered router's middle tier: artifact built by
+# scripts/train_intent_classifier.py (empty disables) and the labeled utterances it
+# is trained on besides the prompt's few-shot examples (read by the script only).
+# Answers below the threshold calibrated at training time escalate to the LLM;
+# INTENT_CLASSIFIER_THRESHOLD overrides it
+INTENT_CLASSIFIER_PATH = os.getenv("INTENT_CLASSIFIER_PATH", os.path.join("data", "intent_classifier.npz"))
+INTENT_CLASSIFIER_EXAMPLES_PATH = os.getenv("INTENT_CLASSIFIER_EXAMPLES_PATH", os.path.join("tests", "data", "router_utterances.jsonl"))
+INTENT_CLASSIFIER_THRESHOLD = float(os.getenv("INTENT_CLASSIFIER_THRESHOLD")) if os.getenv("INTENT_CLASSIFIER_THRESHOLD") else None
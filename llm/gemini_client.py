@@ -3,7 +3,18 @@ Gemini LLM Client module.
 Wraps LangChain's ChatGoogleGenerativeAI for real mode, and provides a mock fallback.
 """
 import os
-from config.llm_settings import USE_REAL_LLM, GOOGLE_API_KEY, GEMINI_MODEL_NAME
+import random
+import time
+from concurrent.futures import ThreadPoolExecutor
+from config.llm_settings import (
+    USE_REAL_LLM,
+    GOOGLE_API_KEY,
+    GEMINI_MODEL_NAME,
+    EMBED_BATCH_SIZE,
+    EMBED_MAX_CONCURRENCY,
+    EMBED_MAX_RETRIES,
+    EMBED_RETRY_BASE_DELAY
+)
 
 try:
     from langchain_google_genai import ChatGoogleGenerativeAI, GoogleGenerativeAIEmbeddings
@@ -18,6 +29,9 @@ class GeminiLLMClient:
     
     def __init__(self):
         self.real_mode = USE_REAL_LLM
+        # Stats of the last embed_many call: chunks, seconds, chunks_per_sec
+        self.last_embed_stats = {}
+        self._sleep = time.sleep
         
         if self.real_mode:
             if not GOOGLE_API_KEY:
@@ -78,3 +92,48 @@ class GeminiLLMClient:
         except Exception as e:
             print(f"Error generating embedding: {e}")
             return [0.0] * 768
+
+    def embed_many(self, texts: list[str], batch_size: int = EMBED_BATCH_SIZE,
+                   max_concurrency: int = EMBED_MAX_CONCURRENCY,
+                   max_retries: int = EMBED_MAX_RETRIES) -> list[list[float]]:
+        """
+        Generates document embeddings for many texts using batched requests.
+        Batches run concurrently (at most `max_concurrency` in flight) and each
+        batch is retried with exponential backoff. A batch that keeps failing
+        yields zero vectors, matching embed().
+        
+        Returns:
+            One embedding per input text, in input order.
+        """
+        start = time.perf_counter()
+        
+        if not self.real_mode:
+            vectors = [[0.0] * 768 for _ in texts]
+        else:
+            batches = [texts[i:i + batch_size] for i in range(0, len(texts), batch_size)]
+            workers = max(1, min(max_concurrency, len(batches)))
+            with ThreadPoolExecutor(max_workers=workers) as executor:
+                results = executor.map(lambda batch: self._embed_batch(batch, max_retries), batches)
+                vectors = [vector for batch_vectors in results for vector in batch_vectors]
+        
+        elapsed = time.perf_counter() - start
+        self.last_embed_stats = {
+            "chunks": len(texts),
+            "seconds": elapsed,
+            "chunks_per_sec": len(texts) / elapsed if elapsed > 0 else float("inf")
+        }
+        if self.real_mode:
+            print(f"Embedded {len(texts)} chunks in {elapsed:.2f}s ({self.last_embed_stats['chunks_per_sec']:.1f} chunks/s)")
+        return vectors
+
+    def _embed_batch(self, batch: list[str], max_retries: int) -> list[list[float]]:
+        """Embeds one batch via embed_documents, retrying with jittered exponential backoff."""
+        for attempt in range(max_retries + 1):
+            try:
+                return self.embeddings.embed_documents(batch)
+            except Exception as e:
+                if attempt == max_retries:
+                    print(f"Error generating batch embeddings after {attempt + 1} attempts: {e}")
+                    return [[0.0] * 768 for _ in batch]
+                delay = EMBED_RETRY_BASE_DELAY * (2 ** attempt)
+                self._sleep(delay + random.uniform(0, delay))
@@ -9,6 +9,7 @@ from typing import Dict, Any, Optional
 
 from orchestrator.llm_router import LLMRouter as Router
 from orchestrator.embedding_rag import EmbeddingRAG
+from orchestrator.semantic_cache import SemanticAnswerCache
 from orchestrator.prompts import (
     SYSTEM_PROMPT,
     ROUTER_PROMPT,
@@ -17,6 +18,7 @@ from orchestrator.prompts import (
 )
 from tools import mock_tools
 from llm.gemini_client import GeminiLLMClient
+from config.llm_settings import ANSWER_CACHE_SIZE, ANSWER_CACHE_TTL_SECONDS, ANSWER_CACHE_MIN_SIMILARITY
 
 from orchestrator.function_schema import TOOL_REGISTRY, TOOL_DESCRIPTIONS
 from tools.mock_tools import execute_tool
@@ -30,6 +32,12 @@ class AssistantAgent:
         self.router = Router()
         self.rag = EmbeddingRAG() # Use new RAG engine
         self.llm = GeminiLLMClient()
+        # Final RAG answers, reused for near-identical questions over the same chunks
+        self.answer_cache = SemanticAnswerCache(
+            maxsize=ANSWER_CACHE_SIZE,
+            ttl_seconds=ANSWER_CACHE_TTL_SECONDS,
+            min_similarity=ANSWER_CACHE_MIN_SIMILARITY
+        )
         self.allow_local_audit = os.environ.get("ALLOW_LOCAL_AUDIT", "false").lower() == "true"
         self.audit_log_path = os.path.join(
             os.path.dirname(os.path.abspath(__file__)), "audit_log.jsonl"
@@ -57,7 +65,7 @@ class AssistantAgent:
             return self._handle_confirmation(user_id, user_message, session_state, debug_info)
 
         # 2. Router Classification (Only if no pending action)
-        classification = self.router.classify(user_message)
+        classification = self.router.classify(user_message, debug_info)
         debug_info["classification"] = classification
         
         intent = classification["intent"]
@@ -298,11 +306,24 @@ class AssistantAgent:
                 "debug_info": debug_info
             }
         else:
-            # RAG Search
-            results = self.rag.search(user_message)
-            debug_info["rag_results"] = results
+            # RAG Search (one index instance for the whole turn, even if a reload swaps it meanwhile)
+            rag = self.rag
+            results = rag.search(user_message)
+            debug_info["rag_results"] = [r.to_dict() for r in results]
             
             if self.llm.real_mode:
+                # Same chunks + near-identical question: reuse the previous answer
+                query_embedding = rag.embed_query(user_message)
+                chunk_ids = [(r["source"], r["chunk_id"]) for r in results]
+                response_text = self.answer_cache.get(rag.index_id, query_embedding, chunk_ids)
+                debug_info["answer_cache_hit"] = response_text is not None
+                if response_text is not None:
+                    return {
+                        "response_text": response_text,
+                        "tool_output": None,
+                        "debug_info": debug_info
+                    }
+                
                 # RAG Prompt
                 # Format context with metadata
                 context_chunks = []
@@ -315,6 +336,8 @@ class AssistantAgent:
                 prompt = RAG_PROMPT.replace("{context_chunks}", context_str).replace("{user_query}", user_message)
                 response_text = self.llm.generate(SYSTEM_PROMPT, prompt) # Passing SYSTEM_PROMPT as system, and RAG prompt as user message
                 self._update_debug_llm(debug_info, prompt, response_text)
+                if results and not response_text.startswith("Error calling Gemini"):
+                    self.answer_cache.put(rag.index_id, query_embedding, chunk_ids, response_text)
             else:
                 # Mock Template
                 if not results:
@@ -0,0 +1,264 @@
+"""
+Approximate nearest-neighbour (ANN) backends for RAG retrieval.
+All backends index the normalized passage embedding matrix and score by inner
+product (equal to cosine similarity for unit vectors).
+
+Backends:
+- 'exact': brute-force matrix-vector product (handled by EmbeddingRAG itself).
+- 'ivf':   inverted file index with spherical k-means, pure NumPy.
+- 'hnsw':  hierarchical navigable small world graph via hnswlib.
+"""
+import os
+import math
+from typing import Dict, Any, Optional, Tuple
+
+import numpy as np
+
+from config.embedding_settings import (
+    RAG_ANN_BACKEND,
+    RAG_ANN_MIN_PASSAGES,
+    RAG_IVF_NLIST,
+    RAG_IVF_NPROBE,
+    RAG_HNSW_M,
+    RAG_HNSW_EF_CONSTRUCTION,
+    RAG_HNSW_EF_SEARCH
+)
+
+try:
+    import hnswlib
+    HNSWLIB_AVAILABLE = True
+except ImportError:
+    HNSWLIB_AVAILABLE = False
+
+SUPPORTED_BACKENDS = ("exact", "ivf", "hnsw")
+
+
+def top_k_indices(scores: np.ndarray, top_k: int) -> np.ndarray:
+    """Returns the indices of the top_k highest scores, best first."""
+    if top_k <= 0 or scores.shape[0] == 0:
+        return np.zeros(0, dtype=np.int64)
+    if top_k < scores.shape[0]:
+        candidates = np.argpartition(-scores, top_k - 1)[:top_k]
+    else:
+        candidates = np.arange(scores.shape[0])
+    return candidates[np.argsort(-scores[candidates], kind="stable")]
+
+
+class VectorIndex:
+    """
+    Interface for ANN backends. Subclasses keep a reference to the embedding
+    matrix (which may be a read-only memory map) rather than copying it.
+    """
+    backend = "base"
+
+    def build(self, matrix: np.ndarray):
+        raise NotImplementedError
+
+    def search(self, query: np.ndarray, top_k: int) -> Tuple[np.ndarray, np.ndarray]:
+        """Returns (row ids, scores) of the approximate top_k rows, best first."""
+        raise NotImplementedError
+
+    def save(self, index_dir: str) -> Dict[str, Any]:
+        """Persists the index and returns the metadata entry describing it."""
+        raise NotImplementedError
+
+    def load(self, index_dir: str, matrix: np.ndarray, info: Dict[str, Any]) -> bool:
+        """Loads a persisted index for the given matrix. Returns False if incompatible."""
+        raise NotImplementedError
+
+    @staticmethod
+    def matches(matrix: np.ndarray, info: Dict[str, Any]) -> bool:
+        """Whether a saved index entry was built over a matrix of this shape."""
+        return info.get("count") == matrix.shape[0] and info.get("dim") == matrix.shape[1]
+
+
+def cluster_sums(matrix: np.ndarray, assignments: np.ndarray, nlist: int) -> np.ndarray:
+    """
+    Per-cluster sums of the rows assigned to each cluster (zero for empty
+    clusters). One weighted bincount per dimension, so the matrix is never
+    copied or reordered.
+    """
+    sums = np.empty((nlist, matrix.shape[1]), dtype=np.float64)
+    for dim in range(matrix.shape[1]):
+        sums[:, dim] = np.bincount(assignments, weights=matrix[:, dim], minlength=nlist)
+    return sums
+
+
+class IVFIndex(VectorIndex):
+    """
+    Inverted file index. Passages are clustered with spherical k-means and a
+    query only scores the passages in its `nprobe` closest clusters.
+    """
+    backend = "ivf"
+    file_name = "ann_ivf.npz"
+
+    def __init__(self, nlist: int = RAG_IVF_NLIST, nprobe: int = RAG_IVF_NPROBE,
+                 iterations: int = 10, seed: int = 0):
+        self.nlist = nlist
+        self.nprobe = nprobe
+        self.iterations = iterations
+        self.seed = seed
+        self.matrix = None
+        self.centroids = None
+        self.list_offsets = None
+        self.list_ids = None
+
+    def build(self, matrix: np.ndarray):
+        self.matrix = matrix
+        n = matrix.shape[0]
+        # Rule of thumb: about 4 * sqrt(n) lists keeps both probing and scanning cheap
+        nlist = self.nlist or max(1, int(4 * math.sqrt(n)))
+        nlist = max(1, min(nlist, n))
+
+        rng = np.random.default_rng(self.seed)
+        centroids = np.array(matrix[rng.choice(n, size=nlist, replace=False)], dtype=np.float32)
+
+        assignments = self._assign(matrix, centroids)
+        for _ in range(self.iterations):
+            sums = cluster_sums(matrix, assignments, nlist)
+
+            # Re-seed empty clusters with random passages
+            empty = np.flatnonzero(np.bincount(assignments, minlength=nlist) == 0)
+            if empty.size:
+                sums[empty] = matrix[rng.choice(n, size=empty.size, replace=False)]
+
+            norms = np.linalg.norm(sums, axis=1, keepdims=True)
+            norms[norms == 0] = 1.0
+            centroids = sums / norms
+
+            new_assignments = self._assign(matrix, centroids)
+            if np.array_equal(new_assignments, assignments):
+                break
+            assignments = new_assignments
+
+        self.centroids = np.ascontiguousarray(centroids, dtype=np.float32)
+        self.list_ids = np.argsort(assignments, kind="stable").astype(np.int64)
+        self.list_offsets = np.searchsorted(
+            assignments[self.list_ids], np.arange(nlist + 1)
+        ).astype(np.int64)
+
+    def _assign(self, matrix: np.ndarray, centroids: np.ndarray, block: int = 16384) -> np.ndarray:
+        """Assigns each row to its most similar centroid, in blocks to bound memory."""
+        assignments = np.empty(matrix.shape[0], dtype=np.int64)
+        for start in range(0, matrix.shape[0], block):
+            assignments[start:start + block] = np.argmax(matrix[start:start + block] @ centroids.T, axis=1)
+        return assignments
+
+    def search(self, query: np.ndarray, top_k: int) -> Tuple[np.ndarray, np.ndarray]:
+        nprobe = min(self.nprobe, self.centroids.shape[0])
+        probes = top_k_indices(self.centroids @ query, nprobe)
+        candidates = np.concatenate([
+            self.list_ids[self.list_offsets[c]:self.list_offsets[c + 1]] for c in probes
+        ])
+        scores = self.matrix[candidates] @ query
+        best = top_k_indices(scores, top_k)
+        return candidates[best], scores[best]
+
+    def save(self, index_dir: str) -> Dict[str, Any]:
+        path = os.path.join(index_dir, self.file_name)
+        tmp_path = f"{path}.tmp.{os.getpid()}"
+        with open(tmp_path, "wb") as f:
+            np.savez(f, centroids=self.centroids, list_offsets=self.list_offsets, list_ids=self.list_ids)
+        os.replace(tmp_path, path)
+        return {
+            "backend": self.backend,
+            "file": self.file_name,
+            "count": int(self.matrix.shape[0]),
+            "dim": int(self.centroids.shape[1]),
+            "nlist": int(self.centroids.shape[0])
+        }
+
+    def load(self, index_dir: str, matrix: np.ndarray, info: Dict[str, Any]) -> bool:
+        path = os.path.join(index_dir, info.get("file", self.file_name))
+        if not self.matches(matrix, info) or not os.path.exists(path):
+            return False
+        with np.load(path) as data:
+            self.centroids = data["centroids"]
+            self.list_offsets = data["list_offsets"]
+            self.list_ids = data["list_ids"]
+        self.matrix = matrix
+        return True
+
+
+class HNSWIndex(VectorIndex):
+    """
+    HNSW graph index backed by hnswlib (inner-product space).
+    """
+    backend = "hnsw"
+    file_name = "ann_hnsw.bin"
+
+    def __init__(self, m: int = RAG_HNSW_M, ef_construction: int = RAG_HNSW_EF_CONSTRUCTION,
+                 ef_search: int = RAG_HNSW_EF_SEARCH, seed: int = 0):
+        self.m = m
+        self.ef_construction = ef_construction
+        self.ef_search = ef_search
+        self.seed = seed
+        self.index = None
+        self.count = 0
+
+    def build(self, matrix: np.ndarray):
+        self.count = matrix.shape[0]
+        self.index = hnswlib.Index(space="ip", dim=matrix.shape[1])
+        self.index.init_index(
+            max_elements=max(1, self.count), ef_construction=self.ef_construction,
+            M=self.m, random_seed=self.seed
+        )
+        self.index.add_items(np.asarray(matrix, dtype=np.float32), np.arange(self.count))
+        self.index.set_ef(self.ef_search)
+
+    def search(self, query: np.ndarray, top_k: int) -> Tuple[np.ndarray, np.ndarray]:
+        k = min(top_k, self.count)
+        if k <= 0:
+            return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.float32)
+        # knn_query requires ef >= k
+        self.index.set_ef(max(self.ef_search, k))
+        labels, distances = self.index.knn_query(query.reshape(1, -1), k=k)
+        # hnswlib 'ip' distance is 1 - inner product
+        return labels[0].astype(np.int64), (1.0 - distances[0]).astype(np.float32)
+
+    def save(self, index_dir: str) -> Dict[str, Any]:
+        path = os.path.join(index_dir, self.file_name)
+        tmp_path = f"{path}.tmp.{os.getpid()}"
+        self.index.save_index(tmp_path)
+        os.replace(tmp_path, path)
+        return {
+            "backend": self.backend,
+            "file": self.file_name,
+            "count": int(self.count),
+            "dim": int(self.index.dim),
+            "m": self.m,
+            "ef_construction": self.ef_construction
+        }
+
+    def load(self, index_dir: str, matrix: np.ndarray, info: Dict[str, Any]) -> bool:
+        path = os.path.join(index_dir, info.get("file", self.file_name))
+        if not self.matches(matrix, info) or not os.path.exists(path):
+            return False
+        self.count = matrix.shape[0]
+        self.index = hnswlib.Index(space="ip", dim=matrix.shape[1])
+        self.index.load_index(path, max_elements=max(1, self.count))
+        self.index.set_ef(self.ef_search)
+        return True
+
+
+def create_vector_index(backend: str = RAG_ANN_BACKEND, num_passages: Optional[int] = None,
+                        min_passages: int = RAG_ANN_MIN_PASSAGES) -> Optional[VectorIndex]:
+    """
+    Instantiates the configured ANN backend.
+    Returns None when exact search should be used: backend 'exact', an index
+    too small to benefit, or an unavailable backend.
+    """
+    backend = (backend or "exact").lower()
+    if backend not in SUPPORTED_BACKENDS:
+        print(f"Warning: Unknown RAG_ANN_BACKEND '{backend}'. Falling back to exact search.")
+        return None
+    if backend == "exact":
+        return None
+    if num_passages is not None and num_passages < min_passages:
+        return None
+    if backend == "hnsw":
+        if not HNSWLIB_AVAILABLE:
+            print("Warning: RAG_ANN_BACKEND is 'hnsw' but hnswlib is not installed. Falling back to exact search.")
+            return None
+        return HNSWIndex()
+    return IVFIndex()
@@ -0,0 +1,129 @@
+"""
+BM25 lexical index for RAG passages.
+An inverted index stored as CSR arrays: for each vocabulary term, a slice of
+passage ids and precomputed BM25 term weights. A query only touches the
+postings of its own terms.
+"""
+import re
+from typing import Dict, Any, List, Optional, Tuple
+
+import numpy as np
+
+from orchestrator.ann_index import top_k_indices
+
+TOKEN_PATTERN = re.compile(r"\w+")
+
+
+def tokenize(text: str) -> List[str]:
+    """Lowercased word tokens (whole words only, so 'due' does not match 'overdue')."""
+    return TOKEN_PATTERN.findall(text.lower())
+
+
+class BM25Index:
+    """
+    Okapi BM25 over a fixed set of passages. Per-posting weights
+    idf * tf * (k1 + 1) / (tf + k1 * (1 - b + b * dl / avgdl)) are computed at
+    build time, so scoring a query is a sum of array slices.
+    """
+
+    def __init__(self, k1: float = 1.5, b: float = 0.75):
+        self.k1 = k1
+        self.b = b
+        self.doc_count = 0
+        self.vocab: Dict[str, int] = {}
+        self.term_offsets = np.zeros(1, dtype=np.int64)
+        self.doc_ids = np.zeros(0, dtype=np.int32)
+        self.weights = np.zeros(0, dtype=np.float32)
+
+    def build(self, texts: List[str]):
+        """Indexes the texts; passage ids are their positions in `texts`."""
+        postings: Dict[str, Dict[int, int]] = {}
+        doc_lengths = np.zeros(len(texts), dtype=np.float32)
+        for doc_id, text in enumerate(texts):
+            tokens = tokenize(text)
+            doc_lengths[doc_id] = len(tokens)
+            for token in tokens:
+                term_postings = postings.setdefault(token, {})
+                term_postings[doc_id] = term_postings.get(doc_id, 0) + 1
+
+        self.doc_count = len(texts)
+        avgdl = float(doc_lengths.mean()) if len(texts) and doc_lengths.sum() else 1.0
+        terms = sorted(postings)
+        self.vocab = {term: i for i, term in enumerate(terms)}
+
+        offsets = [0]
+        doc_ids: List[int] = []
+        weights: List[float] = []
+        for term in terms:
+            term_postings = postings[term]
+            df = len(term_postings)
+            idf = np.log(1.0 + (self.doc_count - df + 0.5) / (df + 0.5))
+            for doc_id in sorted(term_postings):
+                tf = term_postings[doc_id]
+                norm = self.k1 * (1.0 - self.b + self.b * doc_lengths[doc_id] / avgdl)
+                doc_ids.append(doc_id)
+                weights.append(idf * tf * (self.k1 + 1.0) / (tf + norm))
+            offsets.append(len(doc_ids))
+
+        self.term_offsets = np.array(offsets, dtype=np.int64)
+        self.doc_ids = np.array(doc_ids, dtype=np.int32)
+        self.weights = np.array(weights, dtype=np.float32)
+
+    def search(self, query: str, top_k: int, rows: Optional[np.ndarray] = None) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Returns (passage ids, BM25 scores) of the best matching passages, best
+        first. `rows` restricts the ranking to those passage ids.
+        """
+        scores = np.zeros(self.doc_count, dtype=np.float32)
+        matched = False
+        for token in set(tokenize(query)):
+            term_id = self.vocab.get(token)
+            if term_id is None:
+                continue
+            start, end = self.term_offsets[term_id], self.term_offsets[term_id + 1]
+            # Each passage appears at most once per term, so fancy-index += is safe
+            scores[self.doc_ids[start:end]] += self.weights[start:end]
+            matched = True
+
+        if not matched:
+            return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.float32)
+        if rows is not None:
+            ids = rows[top_k_indices(scores[rows], top_k)].astype(np.int64)
+        else:
+            ids = top_k_indices(scores, top_k)
+        ids = ids[scores[ids] > 0]
+        return ids, scores[ids]
+
+    def to_arrays(self) -> Tuple[Dict[str, Any], Dict[str, np.ndarray]]:
+        """(meta, arrays) form for the binary index format; tokens never contain newlines."""
+        vocab = "\n".join(sorted(self.vocab, key=self.vocab.get)).encode("utf-8")
+        meta = {"k1": self.k1, "b": self.b, "doc_count": self.doc_count, "vocab_size": len(self.vocab)}
+        arrays = {
+            "vocab": np.frombuffer(vocab, dtype=np.uint8),
+            "term_offsets": self.term_offsets,
+            "doc_ids": self.doc_ids,
+            "weights": self.weights
+        }
+        return meta, arrays
+
+    @classmethod
+    def from_arrays(cls, meta: Dict[str, Any], arrays: Dict[str, np.ndarray]) -> "BM25Index":
+        index = cls(k1=meta["k1"], b=meta["b"])
+        index.doc_count = meta["doc_count"]
+        terms = arrays["vocab"].tobytes().decode("utf-8").split("\n") if meta["vocab_size"] else []
+        index.vocab = {term: i for i, term in enumerate(terms)}
+        index.term_offsets = arrays["term_offsets"]
+        index.doc_ids = arrays["doc_ids"]
+        index.weights = arrays["weights"]
+        return index
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "BM25Index":
+        """Reads the JSON form stored in a legacy metadata.json."""
+        index = cls(k1=data["k1"], b=data["b"])
+        index.doc_count = data["doc_count"]
+        index.vocab = {term: i for i, term in enumerate(data["vocab"])}
+        index.term_offsets = np.array(data["term_offsets"], dtype=np.int64)
+        index.doc_ids = np.array(data["doc_ids"], dtype=np.int32)
+        index.weights = np.array(data["weights"], dtype=np.float32)
+        return index
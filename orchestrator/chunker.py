@@ -0,0 +1,136 @@
+"""
+Streaming, token-aware chunker for knowledge base files.
+Lines are consumed one at a time from a generator, so memory stays bounded by
+the chunk window regardless of file size. Chunk budgets and overlap are
+measured in tokens, and every chunk records its exact first and last line.
+"""
+from collections import deque
+from typing import Callable, Deque, Dict, Iterable, Iterator, List, Tuple
+
+from config.embedding_settings import (
+    RAG_CHUNK_TOKENS,
+    RAG_CHUNK_OVERLAP_TOKENS,
+    RAG_CHUNK_TOKENIZER
+)
+
+TokenCounter = Callable[[str], int]
+
+
+def iter_lines(path: str) -> Iterator[Tuple[int, str]]:
+    """Yields (1-based line number, line without newline) lazily from a file."""
+    with open(path, "r", encoding="utf-8") as f:
+        for line_no, line in enumerate(f, start=1):
+            yield line_no, line.rstrip("\r\n")
+
+
+def approx_token_count(text: str) -> int:
+    """Rough token estimate (about 4 characters per token)."""
+    return len(text) // 4
+
+
+def load_token_counter(tokenizer_name: str = RAG_CHUNK_TOKENIZER) -> TokenCounter:
+    """
+    Returns a token counting function. 'approx' uses the character heuristic;
+    any other value is loaded as a Hugging Face `tokenizers` model name,
+    falling back to the heuristic if it cannot be loaded.
+    """
+    if not tokenizer_name or tokenizer_name == "approx":
+        return approx_token_count
+    try:
+        from tokenizers import Tokenizer
+        tokenizer = Tokenizer.from_pretrained(tokenizer_name)
+    except Exception as e:
+        print(f"Warning: Could not load tokenizer '{tokenizer_name}' ({e}). Falling back to approximate token counts.")
+        return approx_token_count
+    return lambda text: len(tokenizer.encode(text, add_special_tokens=False).ids)
+
+
+class StreamingChunker:
+    """
+    Packs consecutive non-empty lines into chunks of at most `chunk_tokens`
+    tokens. Each new chunk starts with the trailing lines of the previous one
+    that fit within `overlap_tokens`. A single line longer than the budget is
+    first split into overlapping word windows (character windows for a single
+    huge word), each of which packs like a line of its own.
+    """
+
+    def __init__(self, chunk_tokens: int = RAG_CHUNK_TOKENS, overlap_tokens: int = RAG_CHUNK_OVERLAP_TOKENS,
+                 token_counter: TokenCounter = approx_token_count):
+        self.chunk_tokens = chunk_tokens
+        self.overlap_tokens = overlap_tokens
+        self.token_counter = token_counter
+
+    def chunks(self, lines: Iterable[Tuple[int, str]]) -> Iterator[Dict]:
+        """
+        Yields {"text", "line_start", "line_end", "tokens"} dicts from
+        (line number, text) pairs as soon as each chunk is complete.
+        """
+        window: Deque[Tuple[int, str, int]] = deque()
+        window_tokens = 0
+
+        for line_no, line in lines:
+            line = line.strip()
+            if not line:
+                continue
+            tokens = self.token_counter(line)
+            pieces = [(line, tokens)] if tokens <= self.chunk_tokens else self._split_line(line, tokens)
+
+            for piece, tokens in pieces:
+                if window and window_tokens + tokens > self.chunk_tokens:
+                    yield self._emit(window, window_tokens)
+                    window_tokens = self._keep_overlap(window, window_tokens, tokens)
+
+                window.append((line_no, piece, tokens))
+                window_tokens += tokens
+
+        # The window always ends with a line not yet emitted
+        if window:
+            yield self._emit(window, window_tokens)
+
+    def _split_line(self, line: str, tokens: int) -> List[Tuple[str, int]]:
+        """
+        Splits an oversized line into windows of at most `chunk_tokens` tokens
+        that overlap by about `overlap_tokens`. Window sizes are estimated from
+        the line's tokens per word and shrunk until the counter agrees, so the
+        counter runs a few times per window rather than once per word.
+        """
+        parts, joiner = line.split(), " "
+        if len(parts) == 1:
+            parts, joiner = list(line), ""
+        size = max(1, len(parts) * self.chunk_tokens // tokens)
+        overlap = min(size - 1, len(parts) * self.overlap_tokens // tokens)
+
+        pieces = []
+        start = 0
+        while True:
+            end = min(len(parts), start + size)
+            piece = joiner.join(parts[start:end])
+            piece_tokens = self.token_counter(piece)
+            while piece_tokens > self.chunk_tokens and end - start > 1:
+                end = start + min(end - start - 1, max(1, (end - start) * self.chunk_tokens // piece_tokens))
+                piece = joiner.join(parts[start:end])
+                piece_tokens = self.token_counter(piece)
+            pieces.append((piece, piece_tokens))
+            if end >= len(parts):
+                return pieces
+            start = max(start + 1, end - overlap)
+
+    def _keep_overlap(self, window: Deque[Tuple[int, str, int]], window_tokens: int, incoming_tokens: int) -> int:
+        """
+        Drops lines from the front until the remainder fits the overlap budget
+        and leaves room for the incoming line within the chunk budget.
+        """
+        # Always drop at least one line so consecutive chunks differ
+        window_tokens -= window.popleft()[2]
+        while window and (window_tokens > self.overlap_tokens
+                          or window_tokens + incoming_tokens > self.chunk_tokens):
+            window_tokens -= window.popleft()[2]
+        return window_tokens
+
+    def _emit(self, window: Deque[Tuple[int, str, int]], window_tokens: int) -> Dict:
+        return {
+            "text": "\n".join(line for _, line, _ in window),
+            "line_start": window[0][0],
+            "line_end": window[-1][0],
+            "tokens": window_tokens
+        }
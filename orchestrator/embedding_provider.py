@@ -0,0 +1,211 @@
+"""
+Embedding providers and the on-disk embedding cache.
+EmbeddingProvider is the single entry point for query and document
+embeddings (mock, Gemini or a local sentence-transformers model).
+CachedEmbeddingProvider puts a content-addressed SQLite cache keyed by
+(model, text hash) in front of a provider, so index builds, queries and
+restarts never embed the same string twice.
+"""
+import hashlib
+import os
+import sqlite3
+import threading
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+from config.embedding_settings import (
+    EMBEDDING_PROVIDER,
+    RUN_REAL_EMBEDDINGS,
+    EMBEDDING_CACHE_PATH
+)
+from llm.gemini_client import GeminiLLMClient
+from orchestrator import mock_embedder
+from orchestrator.local_embedder import load_local_embedder
+
+# Keys per SQLite lookup (below the default bound-parameter limit)
+CACHE_LOOKUP_CHUNK = 500
+
+
+class EmbeddingProvider:
+    """Interface: returns float32 vectors; `signature` identifies the model."""
+    signature = "base"
+
+    def embed_query(self, text: str) -> np.ndarray:
+        raise NotImplementedError
+
+    def embed_documents(self, texts: List[str]) -> np.ndarray:
+        raise NotImplementedError
+
+    def stats(self) -> Dict[str, Any]:
+        return {"signature": self.signature, "cache": None}
+
+
+class MockEmbeddingProvider(EmbeddingProvider):
+    """Deterministic 'mock semantic' vectors (see orchestrator.mock_embedder)."""
+    signature = "mock:v3"
+
+    def embed_query(self, text: str) -> np.ndarray:
+        return mock_embedder.embed_text(text)
+
+    def embed_documents(self, texts: List[str]) -> np.ndarray:
+        return mock_embedder.embed_texts(texts)
+
+
+class GeminiEmbeddingProvider(EmbeddingProvider):
+    """Gemini text-embedding-004: query embeddings per call, documents via batched embed_many."""
+    signature = "gemini:text-embedding-004"
+
+    def __init__(self, client: GeminiLLMClient):
+        self.client = client
+
+    def embed_query(self, text: str) -> np.ndarray:
+        return np.asarray(self.client.embed(text), dtype=np.float32)
+
+    def embed_documents(self, texts: List[str]) -> np.ndarray:
+        # Batched document embedding instead of one round trip per passage
+        return np.asarray(self.client.embed_many(texts), dtype=np.float32)
+
+
+class LocalEmbeddingProvider(EmbeddingProvider):
+    """Process-wide sentence-transformers model (see orchestrator.local_embedder)."""
+
+    def __init__(self, embedder):
+        self.embedder = embedder
+        self.signature = embedder.signature
+
+    def embed_query(self, text: str) -> np.ndarray:
+        return self.embedder.embed_text(text)
+
+    def embed_documents(self, texts: List[str]) -> np.ndarray:
+        return self.embedder.embed_texts(texts)
+
+
+class EmbeddingCache:
+    """
+    SQLite store of float32 vectors keyed by (model, SHA-256 of the text).
+    WAL mode lets several processes (API workers, index builders) share one file.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._conn = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        self._lock = threading.Lock()
+        with self._lock, self._conn:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS embeddings ("
+                "model TEXT NOT NULL, text_hash BLOB NOT NULL, vector BLOB NOT NULL, "
+                "PRIMARY KEY (model, text_hash)) WITHOUT ROWID"
+            )
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def text_hash(text: str) -> bytes:
+        return hashlib.sha256(text.encode("utf-8")).digest()
+
+    def get_many(self, model: str, hashes: List[bytes]) -> Dict[bytes, np.ndarray]:
+        """Returns the cached vectors among `hashes` (missing ones are absent)."""
+        found: Dict[bytes, np.ndarray] = {}
+        with self._lock:
+            for start in range(0, len(hashes), CACHE_LOOKUP_CHUNK):
+                chunk = hashes[start:start + CACHE_LOOKUP_CHUNK]
+                rows = self._conn.execute(
+                    f"SELECT text_hash, vector FROM embeddings WHERE model = ? AND text_hash IN ({','.join('?' * len(chunk))})",
+                    [model, *chunk]
+                ).fetchall()
+                for text_hash, vector in rows:
+                    found[bytes(text_hash)] = np.frombuffer(vector, dtype=np.float32)
+            self.hits += len(found)
+            self.misses += len(hashes) - len(found)
+        return found
+
+    def put_many(self, model: str, items: Dict[bytes, np.ndarray]):
+        with self._lock, self._conn:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO embeddings (model, text_hash, vector) VALUES (?, ?, ?)",
+                [(model, text_hash, np.asarray(vector, dtype=np.float32).tobytes()) for text_hash, vector in items.items()]
+            )
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM embeddings").fetchone()[0]
+
+    def stats(self) -> Dict[str, Any]:
+        """Entry count, file size and hit/miss counters, suitable for metrics endpoints."""
+        lookups = self.hits + self.misses
+        return {
+            "path": self.path,
+            "entries": len(self),
+            "bytes": os.path.getsize(self.path) if os.path.exists(self.path) else 0,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0
+        }
+
+
+class CachedEmbeddingProvider(EmbeddingProvider):
+    """
+    Serves embeddings from an EmbeddingCache and embeds only unseen texts,
+    in one batch. Query and document vectors are cached separately since some
+    models embed them differently. All-zero vectors (failed calls) are not cached.
+    """
+
+    def __init__(self, provider: EmbeddingProvider, cache: EmbeddingCache):
+        self.provider = provider
+        self.cache = cache
+        self.signature = provider.signature
+
+    def embed_query(self, text: str) -> np.ndarray:
+        return self._embed(f"{self.signature}#query", [text], lambda texts: [self.provider.embed_query(texts[0])])[0]
+
+    def embed_documents(self, texts: List[str]) -> np.ndarray:
+        if not texts:
+            return np.zeros((0, 0), dtype=np.float32)
+        return self._embed(f"{self.signature}#document", texts, self.provider.embed_documents)
+
+    def _embed(self, model: str, texts: List[str], embed_fn) -> np.ndarray:
+        hashes = [self.cache.text_hash(text) for text in texts]
+        cached = self.cache.get_many(model, list(dict.fromkeys(hashes)))
+
+        missing: Dict[bytes, str] = {}
+        for text_hash, text in zip(hashes, texts):
+            if text_hash not in cached:
+                missing.setdefault(text_hash, text)
+        if missing:
+            fresh = np.asarray(embed_fn(list(missing.values())), dtype=np.float32)
+            computed = dict(zip(missing, fresh))
+            self.cache.put_many(model, {h: v for h, v in computed.items() if np.any(v)})
+            cached.update(computed)
+
+        return np.vstack([cached[text_hash] for text_hash in hashes])
+
+    def stats(self) -> Dict[str, Any]:
+        return {"signature": self.signature, "cache": self.cache.stats()}
+
+
+def create_embedding_provider(cache_path: Optional[str] = None) -> EmbeddingProvider:
+    """
+    Builds the configured provider: local sentence-transformers when
+    EMBEDDING_PROVIDER=sentence-transformers, Gemini when RUN_REAL_EMBEDDINGS,
+    otherwise mock. Real providers are wrapped in the on-disk cache at
+    EMBEDDING_CACHE_PATH (empty disables it); mock vectors are cheaper to
+    recompute than to look up.
+    """
+    provider: EmbeddingProvider = MockEmbeddingProvider()
+    if EMBEDDING_PROVIDER == "sentence-transformers":
+        embedder = load_local_embedder()
+        if embedder is not None:
+            provider = LocalEmbeddingProvider(embedder)
+    elif RUN_REAL_EMBEDDINGS:
+        provider = GeminiEmbeddingProvider(GeminiLLMClient())
+
+    if cache_path is None:
+        cache_path = EMBEDDING_CACHE_PATH
+    if isinstance(provider, MockEmbeddingProvider) or not cache_path:
+        return provider
+    return CachedEmbeddingProvider(provider, EmbeddingCache(cache_path))
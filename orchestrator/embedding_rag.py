@@ -1,262 +1,546 @@
 """
 Enhanced Embedding-based RAG Engine.
 Supports chunking, persistence, mock/real embeddings, and hybrid fallback.
+Each knowledge base document is indexed as its own shard; queries fan out
+across shards and the per-shard hits are merged with a top-k heap.
 """
 import os
 import json
+import heapq
 import hashlib
-import random
-import math
-from typing import List, Dict, Optional, Any
+import shutil
+from concurrent.futures import ProcessPoolExecutor
+from typing import List, Dict, Optional, Any, Iterable, Sequence, Tuple
+
+import numpy as np
+
 from config.embedding_settings import (
-    EMBEDDING_PROVIDER,
-    RUN_REAL_EMBEDDINGS,
+    RAG_KB_PATH,
+    RAG_BUILD_WORKERS,
     RAG_INDEX_DIR,
     RAG_MIN_SCORE,
+    RAG_ANN_BACKEND,
+    RAG_RETRIEVAL_MODE,
+    RAG_HYBRID_FUSION,
+    RAG_HYBRID_DENSE_WEIGHT,
+    RAG_HYBRID_LEXICAL_WEIGHT,
+    RAG_RRF_K,
+    RAG_HYBRID_CANDIDATES,
+    QUERY_CACHE_SIZE,
+    QUERY_CACHE_TTL_SECONDS,
+    RERANKER_ENABLED,
+    RERANKER_CANDIDATES,
+    RERANKER_BUDGET_MS,
     INDEX_VERSION
 )
-from llm.gemini_client import GeminiLLMClient
+from orchestrator.lru_cache import TTLLRUCache
+from orchestrator.embedding_provider import EmbeddingProvider, create_embedding_provider
+from orchestrator.chunker import StreamingChunker, load_token_counter
+from orchestrator.index_shard import IndexShard, INDEX_FILE, LEGACY_METADATA_FILE
+from orchestrator.index_format import atomic_write
+from orchestrator.kb_sources import discover_sources, iter_source_sections, shard_name
+from orchestrator.filter_index import Filters
+from orchestrator.passage_store import Passage, PassageStore, content_hash
+from orchestrator.search_result import SearchResult
+from orchestrator.reranker import Reranker, create_reranker
+
+MANIFEST_FILE = "manifest.json"
+SHARDS_DIR = "shards"
+
+# (shard position, row within the shard)
+PassageKey = Tuple[int, int]
+
+# (shard position, rows matching the filters or None for the whole shard)
+ShardCandidates = List[Tuple[int, Optional[np.ndarray]]]
+
+
+def _build_shard_worker(kb_path: str, index_dir: str, ann_backend: str, source: str, path: str) -> Dict[str, int]:
+    """Process-pool entry point: builds and persists one shard, returning its stats."""
+    rag = EmbeddingRAG(kb_path=kb_path, index_dir=index_dir, ann_backend=ann_backend, load=False)
+    _, stats = rag._build_shard(source, path)
+    return stats
+
+
+def read_manifest(index_dir: str) -> Optional[Dict[str, Any]]:
+    """Returns the parsed manifest.json of an index directory, or None if absent or unreadable."""
+    manifest_path = os.path.join(index_dir, MANIFEST_FILE)
+    if not os.path.exists(manifest_path):
+        return None
+    try:
+        with open(manifest_path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError) as e:
+        print(f"Warning: Could not read {manifest_path} ({e}).")
+        return None
+
 
 class EmbeddingRAG:
     """
     RAG engine using embeddings for semantic retrieval.
     """
     
-    def __init__(self, kb_path: str = os.path.join("data", "knowledge_base.txt"), index_dir: str = RAG_INDEX_DIR):
+    def __init__(self, kb_path: str = RAG_KB_PATH, index_dir: str = RAG_INDEX_DIR,
+                 ann_backend: str = RAG_ANN_BACKEND, load: bool = True,
+                 reranker: Optional[Reranker] = None,
+                 embedding_provider: Optional[EmbeddingProvider] = None):
         self.kb_path = kb_path
         self.index_dir = index_dir
-        self.passages = []
-        self.embeddings = [] # In-memory storage for mock/simple index
+        self.ann_backend = ann_backend
+        # One shard per knowledge base source, in discovery order
+        self.shards: List[IndexShard] = []
+        self.num_passages = 0
+        # Identifies the loaded index contents + embedding model (changes on rebuild)
+        self.index_id = ""
+        # Normalized query text -> query vector
+        self.query_cache = TTLLRUCache(maxsize=QUERY_CACHE_SIZE, ttl_seconds=QUERY_CACHE_TTL_SECONDS)
+        # Optional second stage over the top RERANKER_CANDIDATES results
+        # (build-only instances created with load=False never rerank)
+        self.reranker = reranker if reranker is not None else (create_reranker() if RERANKER_ENABLED and load else None)
+        self.rerank_stats = {"reranked": 0, "over_budget": 0}
         
-        self.llm_client = None
-        if RUN_REAL_EMBEDDINGS:
-            self.llm_client = GeminiLLMClient()
+        # Mock, Gemini or local model, behind the on-disk embedding cache for real models
+        self.embedding_provider = embedding_provider or create_embedding_provider()
         
         # Ensure index dir exists
         os.makedirs(self.index_dir, exist_ok=True)
         
         # Load index if exists, otherwise load KB (lazy load or explicit build required)
-        self._load_index()
+        if load:
+            self._load_index()
+
+    @property
+    def passages(self) -> List[Passage]:
+        """All passages across shards (convenience view; search does not use it)."""
+        return [p for shard in self.shards for p in shard.passages]
+
+    @property
+    def embeddings(self) -> np.ndarray:
+        """Embedding matrix of a single-shard index, or all shards stacked."""
+        if len(self.shards) == 1:
+            return self.shards[0].embeddings
+        matrices = [shard.embeddings for shard in self.shards if len(shard.passages)]
+        return np.vstack(matrices) if matrices else np.zeros((0, 0), dtype=np.float32)
 
     def _load_index(self):
-        """Loads metadata and embeddings from disk."""
-        metadata_path = os.path.join(self.index_dir, "metadata.json")
-        
-        if os.path.exists(metadata_path):
-            try:
-                with open(metadata_path, "r", encoding="utf-8") as f:
-                    data = json.load(f)
-                    if data.get("version") == INDEX_VERSION:
-                        self.passages = data.get("passages", [])
-                        # In a real scenario with Chroma/Faiss, we'd load the vector store here.
-                        # For now, we'll re-compute mock embeddings on the fly or load them if we persisted them.
-                        # To keep it simple for the prototype, we'll just rely on the passages metadata
-                        # and re-compute mock embeddings in memory for search if needed, 
-                        # or assume they are fast enough to generate.
-                        pass
-            except Exception as e:
-                print(f"Failed to load RAG index: {e}")
+        """Loads the shard manifest and every shard from disk."""
+        try:
+            manifest = read_manifest(self.index_dir)
+            if manifest is not None:
+                if manifest.get("version") != INDEX_VERSION:
+                    return
+                entries = manifest.get("shards", [])
+            elif any(os.path.exists(os.path.join(self.index_dir, name)) for name in (INDEX_FILE, LEGACY_METADATA_FILE)):
+                # Single-file index written before sharding
+                entries = [{"name": "", "source": os.path.basename(self.kb_path), "dir": ""}]
+            else:
+                entries = []
+            
+            shards = []
+            for entry in entries:
+                shard = IndexShard(entry["name"], entry["source"],
+                                   os.path.join(self.index_dir, entry["dir"]), self.ann_backend)
+                if shard.load(self._build_embedding_matrix, self._embedding_signature()):
+                    shards.append(shard)
+            self._set_shards(shards)
+        except Exception as e:
+            print(f"Failed to load RAG index: {e}")
         
         # If no index loaded, we might need to build it. 
         # But we won't auto-build on init to avoid startup delays.
         # The agent should handle empty index gracefully or we run the build script.
 
-    def build_index(self, rebuild: bool = False):
+    def build_index(self, rebuild: bool = False, sources: Optional[Iterable[str]] = None,
+                    workers: int = RAG_BUILD_WORKERS) -> Optional[Dict[str, int]]:
         """
-        Builds the index from the knowledge base.
+        Builds the index from the knowledge base (a file or a directory of documents).
+        Each source is chunked, embedded and persisted as its own shard; with
+        `sources` only those shards are rebuilt and the others are kept as is.
+        Shards are built in `workers` processes when more than one needs building.
+        Chunks whose content hash already exists in a shard reuse the stored
+        vector; only new or changed chunks are embedded.
+        Returns counts of reused, added and dropped chunks.
         """
-        if not rebuild and self.passages:
-            return
+        if not rebuild and self.shards:
+            return None
 
         print(f"Building RAG index from {self.kb_path}...")
         
-        # 1. Read KB
-        if not os.path.exists(self.kb_path):
+        # 1. Discover KB sources
+        discovered = discover_sources(self.kb_path)
+        if not discovered:
             print(f"KB file not found: {self.kb_path}")
-            return
-            
-        with open(self.kb_path, "r", encoding="utf-8") as f:
-            text = f.read()
+            return None
+        
+        names = {}
+        for source, _ in discovered:
+            name = shard_name(source)
+            if name in names:
+                raise ValueError(f"KB sources {names[name]} and {source} map to the same shard {name}")
+            names[name] = source
+        
+        selected = set(sources) if sources is not None else None
+        targets = [(source, path) for source, path in discovered if selected is None or source in selected]
+        if selected is not None and len(targets) < len(selected):
+            known = {source for source, _ in discovered}
+            print(f"Unknown KB sources skipped: {', '.join(sorted(selected - known))}")
+        
+        # 2. Build the target shards (in parallel processes when there are several)
+        stats = {"reused": 0, "added": 0, "dropped": 0}
+        previous_dirs = {shard.directory for shard in self.shards if shard.name}
+        built: Dict[str, IndexShard] = {}
+        if workers > 1 and len(targets) > 1:
+            with ProcessPoolExecutor(max_workers=min(workers, len(targets))) as pool:
+                futures = {
+                    source: pool.submit(_build_shard_worker, self.kb_path, self.index_dir, self.ann_backend, source, path)
+                    for source, path in targets
+                }
+                for source, future in futures.items():
+                    shard_stats = future.result()
+                    for key in stats:
+                        stats[key] += shard_stats[key]
+                    shard = self._new_shard(source)
+                    shard.load(self._build_embedding_matrix, self._embedding_signature())
+                    built[source] = shard
+        else:
+            for source, path in targets:
+                shard, shard_stats = self._build_shard(source, path)
+                for key in stats:
+                    stats[key] += shard_stats[key]
+                built[source] = shard
+        
+        # 3. Keep untouched shards, drop shards whose source disappeared
+        existing = {shard.source: shard for shard in self.shards}
+        shards = []
+        for source, _ in discovered:
+            shard = built.get(source) or existing.get(source)
+            if shard is not None:
+                shards.append(shard)
+        live = {shard.source for shard in shards}
+        for shard in self.shards:
+            if shard.source not in live:
+                stats["dropped"] += len(shard.passages)
+        
+        # Shard directories no longer referenced (dropped sources, renamed shards)
+        live_dirs = {shard.directory for shard in shards}
+        for directory in previous_dirs - live_dirs:
+            if os.path.isdir(directory):
+                shutil.rmtree(directory)
+        
+        # 4. Persist the manifest that lists the shards
+        self._set_shards(shards)
+        self._write_manifest()
             
-        # 2. Chunk Text
-        chunks = self._chunk_text(text)
+        print(
+            f"Index built with {self.num_passages} passages in {len(self.shards)} shard(s) "
+            f"(reused {stats['reused']}, added {stats['added']}, dropped {stats['dropped']})."
+        )
+        return stats
+
+    def _new_shard(self, source: str) -> IndexShard:
+        name = shard_name(source)
+        return IndexShard(name, source, os.path.join(self.index_dir, SHARDS_DIR, name), self.ann_backend)
+
+    def _build_shard(self, source: str, path: str) -> Tuple[IndexShard, Dict[str, int]]:
+        """Chunks one source, embeds new chunks and persists the shard."""
+        # Start from the shard currently on disk so unchanged chunks keep their vectors
+        shard = self._new_shard(source)
+        for loaded in self.shards:
+            if loaded.source == source:
+                # Also moves a shard from the pre-sharding layout into shards/
+                loaded.name, loaded.directory = shard.name, shard.directory
+                shard = loaded
+                break
+        else:
+            shard.load(self._build_embedding_matrix, self._embedding_signature())
         
-        # 3. Create Passages
-        self.passages = []
-        for i, chunk in enumerate(chunks):
-            passage = {
-                "chunk_id": i,
+        # Stream and chunk the document (it is never held in memory as a whole);
+        # runs with different metadata are chunked separately so filters stay exact
+        chunker = StreamingChunker(token_counter=load_token_counter())
+        passages = PassageStore.from_records(
+            {
                 "text": chunk["text"],
-                "source": "knowledge_base.txt",
-                "line_no": chunk["line_start"], # Approximate
-                "preview": chunk["text"][:120]
+                "source": source,
+                "line_no": chunk["line_start"],
+                "line_end": chunk["line_end"],
+                "content_hash": content_hash(chunk["text"]),
+                "metadata": metadata
             }
-            self.passages.append(passage)
-            
-            # In real mode, we would compute and persist embeddings here.
-            
-        # 4. Persist Metadata
-        metadata = {
+            for metadata, lines in iter_source_sections(path)
+            for chunk in chunker.chunks(lines)
+        )
+        
+        signature = self._embedding_signature()
+        stats = shard.rebuild(passages, self._build_embedding_matrix, signature)
+        # Embeddings and ANN structure are written before the index file that references them
+        shard.save(signature)
+        return shard, stats
+
+    def _set_shards(self, shards: List[IndexShard]):
+        """
+        Installs the shard list, derives the index identity from the shard ids and
+        embedding model, and drops cached query vectors that belong to a previous
+        index or model.
+        """
+        self.shards = shards
+        self.num_passages = sum(len(shard.passages) for shard in shards)
+        digest = hashlib.sha256(f"{INDEX_VERSION}|{self._embedding_signature()}".encode("utf-8"))
+        for shard in shards:
+            digest.update(shard.index_id.encode("ascii"))
+        index_id = digest.hexdigest()[:16] if shards else ""
+        if index_id != self.index_id:
+            self.query_cache.clear()
+        self.index_id = index_id
+
+    def _write_manifest(self):
+        """Persists manifest.json listing the shards and where they live."""
+        manifest = {
             "version": INDEX_VERSION,
-            "passages": self.passages
+            "index_id": self.index_id,
+            "shards": [
+                {
+                    "name": shard.name,
+                    "source": shard.source,
+                    "dir": os.path.relpath(shard.directory, self.index_dir).replace(os.sep, "/"),
+                    "index_id": shard.index_id,
+                    "passages": len(shard.passages)
+                }
+                for shard in self.shards
+            ]
         }
-        with open(os.path.join(self.index_dir, "metadata.json"), "w", encoding="utf-8") as f:
-            json.dump(metadata, f, indent=2)
-            
-        print(f"Index built with {len(self.passages)} passages.")
+        atomic_write(
+            os.path.join(self.index_dir, MANIFEST_FILE),
+            lambda f: f.write(json.dumps(manifest, indent=2).encode("utf-8"))
+        )
+
+    def cache_stats(self) -> Dict[str, Any]:
+        """Cache counters for metrics."""
+        return {
+            "index_id": self.index_id,
+            "shards": len(self.shards),
+            "query_embeddings": self.query_cache.stats(),
+            "embedding_cache": self.embedding_provider.stats()["cache"],
+            "reranker": {
+                "backend": self.reranker.backend if self.reranker is not None else None,
+                **self.rerank_stats
+            }
+        }
+
+    def build_ann_index(self):
+        """
+        Rebuilds only the ANN structures from the stored embeddings and persists them.
+        Useful after changing RAG_ANN_BACKEND or its parameters without re-embedding.
+        """
+        if not self.num_passages:
+            print("No passages loaded; build the index first.")
+            return
+        for shard in self.shards:
+            shard.ann_backend = self.ann_backend
+            shard.build_ann_index()
+            shard.write_index_file()
 
-    def search(self, query: str, top_k: int = 3) -> List[Dict]:
+    def search(self, query: str, top_k: int = 3, mode: Optional[str] = None,
+               filters: Optional[Filters] = None) -> List[SearchResult]:
         """
-        Searches the index for relevant passages.
+        Searches the index for relevant passages, best first.
+        mode: 'dense' or 'hybrid' (defaults to RAG_RETRIEVAL_MODE).
+        filters: {field: value or list of values} over 'source' and passage
+        metadata; only matching passages (looked up in each shard's filter
+        index) are scored.
+        Results are read-only views over the stored passages; only the top_k
+        winners are materialized. With a reranker, the first stage retrieves
+        RERANKER_CANDIDATES results and the reranker picks the top_k.
         """
-        if not self.passages:
-            # Try to build on the fly if empty (fallback)
-            self.build_index()
-            if not self.passages:
+        if not self.num_passages:
+            # Try to build on the fly if empty (fallback); this runs on the request
+            # path, so build in-process rather than forking a worker pool
+            self.build_index(workers=1)
+            if not self.num_passages:
                 return []
 
-        query_embedding = self._get_embedding(query)
-        
-        scored_results = []
+        candidates = self._filter_candidates(filters)
+        if not candidates:
+            return []
+
+        query_embedding = self.embed_query(query)
+        first_stage_k = max(top_k, RERANKER_CANDIDATES) if self.reranker is not None else top_k
         
-        for passage in self.passages:
-            # Compute score
-            doc_embedding = self._get_embedding(passage["text"])
-            score = self._cosine_similarity(query_embedding, doc_embedding)
+        if (mode or RAG_RETRIEVAL_MODE) == "hybrid":
+            return self._rerank(query, self._hybrid_search(query, query_embedding, first_stage_k, candidates), top_k)
             
-            if score >= RAG_MIN_SCORE:
-                result = passage.copy()
-                result["score"] = score
-                scored_results.append(result)
-        
-        # Sort by score desc
-        scored_results.sort(key=lambda x: x["score"], reverse=True)
+        scored_results = [
+            SearchResult(self.shards[shard_pos].passages[row], score=score)
+            for score, (shard_pos, row) in self._dense_search(query_embedding, first_stage_k, RAG_MIN_SCORE, candidates)
+        ]
         
         # Hybrid Fallback Check
         # If no results found or top score is low, try lexical fallback
         if not scored_results:
-            return self._lexical_fallback(query, top_k)
+            scored_results = self._lexical_fallback(query, first_stage_k, candidates)
             
-        return scored_results[:top_k]
+        return self._rerank(query, scored_results, top_k)
 
-    def _chunk_text(self, text: str, chunk_size: int = 300, overlap: int = 50) -> List[Dict]:
+    def _rerank(self, query: str, candidates: List[SearchResult], top_k: int) -> List[SearchResult]:
+        """Applies the reranker within RERANKER_BUDGET_MS, keeping the first-stage order on timeout."""
+        if self.reranker is None or len(candidates) <= 1:
+            return candidates[:top_k]
+        reranked = self.reranker.rerank(query, candidates, top_k, RERANKER_BUDGET_MS / 1000.0)
+        if reranked is None:
+            self.rerank_stats["over_budget"] += 1
+            return candidates[:top_k]
+        self.rerank_stats["reranked"] += 1
+        return reranked
+
+    def _filter_candidates(self, filters: Optional[Filters]) -> ShardCandidates:
         """
-        Splits text into chunks. 
-        Simple line-based chunking for now, can be upgraded to token-based.
+        (shard position, matching rows) for every shard with a passage matching
+        `filters`; rows is None when the whole shard qualifies.
         """
-        lines = text.split('\n')
-        chunks = []
-        current_chunk = []
-        current_length = 0
-        chunk_start_line = 1
-        current_line_idx = 0
-        
-        for i, line in enumerate(lines):
-            line = line.strip()
-            if not line:
-                continue
-                
-            # Estimate tokens (approx 4 chars per token)
-            line_len = len(line) // 4
-            
-            if current_length + line_len > chunk_size and current_chunk:
-                # Emit chunk
-                chunks.append({
-                    "text": "\n".join(current_chunk),
-                    "line_start": chunk_start_line
-                })
-                
-                # Handle overlap (keep last few lines)
-                # Simple overlap: keep last line
-                overlap_chunk = [current_chunk[-1]] if current_chunk else []
-                current_chunk = overlap_chunk
-                current_length = len(overlap_chunk[0]) // 4 if overlap_chunk else 0
-                chunk_start_line = i + 1 # Approximate
-            
-            current_chunk.append(line)
-            current_length += line_len
-            
-        if current_chunk:
-            chunks.append({
-                "text": "\n".join(current_chunk),
-                "line_start": chunk_start_line
-            })
-            
-        return chunks
+        candidates = []
+        for shard_pos, shard in enumerate(self.shards):
+            rows = shard.filter_index.match(filters)
+            if rows is None or len(rows):
+                candidates.append((shard_pos, rows))
+        return candidates
+
+    def _all_candidates(self) -> ShardCandidates:
+        return [(shard_pos, None) for shard_pos in range(len(self.shards))]
+
+    def _merge_top_k(self, hits: Iterable[Tuple[float, PassageKey]], top_k: int) -> List[Tuple[float, PassageKey]]:
+        """Best `top_k` (score, key) pairs across shards, highest score first."""
+        return heapq.nlargest(top_k, hits, key=lambda hit: hit[0])
+
+    def _dense_search(self, query_embedding: np.ndarray, top_k: int, min_score: Optional[float] = None,
+                      candidates: Optional[ShardCandidates] = None) -> List[Tuple[float, PassageKey]]:
+        """Fans the query out to the candidate shards (default all) and merges the per-shard top_k."""
+        def hits():
+            for shard_pos, rows in candidates if candidates is not None else self._all_candidates():
+                ids, scores = self.shards[shard_pos].dense_search(query_embedding, top_k, min_score, rows)
+                for row, score in zip(ids.tolist(), scores.tolist()):
+                    yield score, (shard_pos, row)
+        return self._merge_top_k(hits(), top_k)
 
-    def _get_embedding(self, text: str) -> List[float]:
+    def _lexical_search(self, query: str, top_k: int,
+                        candidates: Optional[ShardCandidates] = None) -> List[Tuple[float, PassageKey]]:
+        """BM25 top_k across the candidate shards (each shard scores with its own statistics)."""
+        def hits():
+            for shard_pos, rows in candidates if candidates is not None else self._all_candidates():
+                ids, scores = self.shards[shard_pos].lexical_search(query, top_k, rows)
+                for row, score in zip(ids.tolist(), scores.tolist()):
+                    yield score, (shard_pos, row)
+        return self._merge_top_k(hits(), top_k)
+
+    def _hybrid_search(self, query: str, query_embedding: np.ndarray, top_k: int,
+                       candidates: Optional[ShardCandidates] = None) -> List[SearchResult]:
         """
-        Generates an embedding for the text.
-        Supports 'Mock Semantic' mode by mapping keywords to specific dimensions.
+        Runs dense and BM25 retrieval over the precomputed structures and fuses
+        both rankings. A passage qualifies if its dense score clears RAG_MIN_SCORE
+        or it matches the query lexically.
         """
-        if RUN_REAL_EMBEDDINGS and self.llm_client:
-            return self.llm_client.embed(text)
-            
-        # Mock Semantic Embedding
-        # We use a 64-dim vector. We reserve the first few dims for specific concepts.
-        # This allows "international" to match "forex" if they share a concept dim.
-        
-        vector = [0.0] * 64
-        text_lower = text.lower()
+        depth = max(top_k, RAG_HYBRID_CANDIDATES)
+        dense = self._dense_search(query_embedding, depth, RAG_MIN_SCORE, candidates)
+        lexical = self._lexical_search(query, depth, candidates)
         
-        # Concept 0: Forex / International
-        if any(w in text_lower for w in ["forex", "markup", "international", "abroad", "foreign"]):
-            vector[0] = 1.0
-            
-        # Concept 1: Rewards / Points
-        if any(w in text_lower for w in ["reward", "points", "cashback", "earn", "category", "categories"]):
-            vector[1] = 1.0
-            
-        # Concept 2: Interest / Period
-        if any(w in text_lower for w in ["interest", "period", "days", "billing", "due"]):
-            vector[2] = 1.0
-            
-        # Concept 3: Block / Lost
-        if any(w in text_lower for w in ["block", "lost", "stolen", "freeze"]):
-            vector[3] = 1.0
-            
-        # Fill the rest with deterministic random noise to distinguish non-matching texts
-        # Seed with hash of text
-        seed = int(hashlib.sha256(text.encode('utf-8')).hexdigest(), 16) % (10**8)
-        random.seed(seed)
+        fused = self._fuse_rankings(dense, lexical)
+        dense_by_key = {key: score for score, key in dense}
+        lexical_by_key = {key: score for score, key in lexical}
         
-        for i in range(4, 64):
-            vector[i] = random.uniform(-0.1, 0.1) # Low noise
-            
-        # Normalize
-        norm = math.sqrt(sum(x*x for x in vector))
-        if norm > 0:
-            vector = [x/norm for x in vector]
-            
+        results = []
+        for score, key in self._merge_top_k(((score, key) for key, score in fused.items()), top_k):
+            shard_pos, row = key
+            results.append(SearchResult(
+                self.shards[shard_pos].passages[row],
+                score=score,
+                dense_score=dense_by_key.get(key),
+                bm25_score=lexical_by_key.get(key),
+                retrieval="hybrid"
+            ))
+        return results
+
+    def _fuse_rankings(self, dense: List[Tuple[float, PassageKey]],
+                       lexical: List[Tuple[float, PassageKey]]) -> Dict[PassageKey, float]:
+        """
+        Combines two best-first rankings into passage key -> fused score.
+        'rrf' sums weight / (RAG_RRF_K + rank); 'weighted' blends scores
+        normalized by each retriever's best score.
+        """
+        fused: Dict[PassageKey, float] = {}
+        rankings = (
+            (dense, RAG_HYBRID_DENSE_WEIGHT),
+            (lexical, RAG_HYBRID_LEXICAL_WEIGHT)
+        )
+        for ranking, weight in rankings:
+            if not ranking:
+                continue
+            top = float(ranking[0][0]) or 1.0
+            for rank, (score, key) in enumerate(ranking, start=1):
+                if RAG_HYBRID_FUSION == "weighted":
+                    contribution = weight * max(score, 0.0) / top
+                else:
+                    contribution = weight / (RAG_RRF_K + rank)
+                fused[key] = fused.get(key, 0.0) + contribution
+        return fused
+
+    def embed_query(self, query: str) -> np.ndarray:
+        """
+        Returns the normalized embedding of a query, served from the LRU cache
+        when the same normalized text was embedded recently for this index/model.
+        """
+        normalized = " ".join(query.lower().split())
+        key = (self.index_id, self._embedding_signature(), normalized)
+        vector = self.query_cache.get(key)
+        if vector is None:
+            vector = self._normalize(np.asarray(self._get_embedding(normalized), dtype=np.float32))
+            vector.setflags(write=False)  # Shared between callers
+            self.query_cache.put(key, vector)
         return vector
 
-    def _cosine_similarity(self, v1: List[float], v2: List[float]) -> float:
-        """Computes cosine similarity between two vectors."""
-        dot_product = sum(a * b for a, b in zip(v1, v2))
-        norm_a = math.sqrt(sum(a * a for a in v1))
-        norm_b = math.sqrt(sum(b * b for b in v2))
-        
-        if norm_a == 0 or norm_b == 0:
-            return 0.0
+    def _get_embedding(self, text: str) -> np.ndarray:
+        """Generates a query embedding for the text via the embedding provider."""
+        return self.embedding_provider.embed_query(text)
+
+    def _get_embeddings(self, texts: List[str]) -> np.ndarray:
+        """Embeds a batch of passage texts into a float32 matrix (one row per text)."""
+        return self.embedding_provider.embed_documents(texts)
+
+    def _embedding_signature(self) -> str:
+        """Identifies the embedding model that produced a vector file."""
+        return self.embedding_provider.signature
+
+    def _build_embedding_matrix(self, passages: Sequence[Passage]) -> np.ndarray:
+        """
+        Embeds every passage into a contiguous float32 matrix of unit-length rows.
+        Rows line up with `passages`, so a dot product with a normalized
+        query vector yields cosine similarities for a whole shard at once.
+        """
+        if not len(passages):
+            return np.zeros((0, 0), dtype=np.float32)
             
-        return dot_product / (norm_a * norm_b)
+        matrix = self._get_embeddings([p["text"] for p in passages])
+        norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+        norms[norms == 0] = 1.0  # Leave all-zero rows (failed embeddings) as zeros
+        return np.ascontiguousarray(matrix / norms)
 
-    def _lexical_fallback(self, query: str, top_k: int) -> List[Dict]:
+    def _normalize(self, vector: np.ndarray) -> np.ndarray:
+        """Scales a vector to unit length (zero vectors are returned unchanged)."""
+        norm = np.linalg.norm(vector)
+        if norm == 0:
+            return vector
+        return vector / norm
+
+    def _lexical_fallback(self, query: str, top_k: int,
+                          candidates: Optional[ShardCandidates] = None) -> List[SearchResult]:
         """
-        Simple substring/keyword match fallback.
+        BM25 keyword match fallback over the per-shard inverted indexes.
         """
-        query_terms = query.lower().split()
         results = []
         
-        for passage in self.passages:
-            text_lower = passage["text"].lower()
-            score = sum(1 for term in query_terms if term in text_lower)
-            
-            if score > 0:
-                result = passage.copy()
-                result["score"] = 0.1 + (score * 0.05) # Lower score range for lexical
-                result["fallback"] = "lexical"
-                results.append(result)
+        for bm25_score, (shard_pos, row) in self._lexical_search(query, top_k, candidates):
+            results.append(SearchResult(
+                self.shards[shard_pos].passages[row],
+                # Squash BM25 into a lower score range than dense similarity
+                score=0.1 + 0.25 * bm25_score / (bm25_score + 1.0),
+                bm25_score=bm25_score,
+                fallback="lexical"
+            ))
                 
-        results.sort(key=lambda x: x["score"], reverse=True)
-        return results[:top_k]
+        return results
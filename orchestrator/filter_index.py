@@ -0,0 +1,112 @@
+"""
+Metadata filter index for RAG passages.
+Posting lists of row ids per (field, value), stored as CSR arrays and built
+at index time, so a filtered query resolves its candidate rows by merging a
+few sorted lists instead of scanning every passage.
+"""
+from typing import Any, Dict, Iterable, List, Mapping, Optional, Tuple, Union
+
+import numpy as np
+
+from orchestrator.kb_sources import metadata_value
+from orchestrator.passage_store import PassageStore
+
+# Field name matching a passage's source document
+SOURCE_FIELD = "source"
+
+# {field: value or list/tuple/set of accepted values}; scalars such as 2024
+# or True match the strings JSON metadata was stored as
+Filters = Mapping[str, Union[Any, Iterable[Any]]]
+
+
+class FilterIndex:
+    """
+    Inverted index from metadata values to sorted passage rows. Filters are
+    ANDed across fields and ORed across the values listed for one field.
+    """
+
+    def __init__(self):
+        self.doc_count = 0
+        # field -> {value -> posting list id}
+        self.postings: Dict[str, Dict[str, int]] = {}
+        self.offsets = np.zeros(1, dtype=np.int64)
+        self.rows = np.zeros(0, dtype=np.int32)
+
+    def build(self, passages: PassageStore):
+        """Indexes the source and every metadata field of the passages."""
+        columns = [(SOURCE_FIELD, passages.sources, np.asarray(passages.source_ids))]
+        # A metadata field named like the source field is shadowed by the document source
+        columns.extend(
+            (field, passages.metadata_values[column], np.asarray(passages.metadata_ids[:, column]))
+            for column, field in enumerate(passages.metadata_fields)
+            if field != SOURCE_FIELD
+        )
+
+        self.doc_count = len(passages)
+        self.postings = {}
+        offsets = [0]
+        rows: List[np.ndarray] = []
+        for field, values, ids in columns:
+            # A stable sort groups rows by value id and keeps each group in row order
+            order = np.argsort(ids, kind="stable")
+            counts = np.bincount(ids[ids >= 0], minlength=len(values))
+            start = int(np.count_nonzero(ids < 0))
+            field_postings = self.postings[field] = {}
+            for value, count in zip(values, counts.tolist()):
+                field_postings[value] = len(offsets) - 1
+                rows.append(order[start:start + count])
+                offsets.append(offsets[-1] + count)
+                start += count
+
+        self.offsets = np.array(offsets, dtype=np.int64)
+        self.rows = np.concatenate(rows).astype(np.int32) if rows else np.zeros(0, dtype=np.int32)
+
+    def posting(self, field: str, value: str) -> np.ndarray:
+        """Sorted rows whose `field` equals `value` (empty if none)."""
+        posting_id = self.postings.get(field, {}).get(metadata_value(value))
+        if posting_id is None:
+            return np.zeros(0, dtype=np.int32)
+        return self.rows[self.offsets[posting_id]:self.offsets[posting_id + 1]]
+
+    def match(self, filters: Optional[Filters]) -> Optional[np.ndarray]:
+        """
+        Returns the sorted rows matching every filter, or None when there are no
+        filters (all rows match).
+        """
+        if not filters:
+            return None
+        matched: Optional[np.ndarray] = None
+        for field, accepted in filters.items():
+            values = list(accepted) if isinstance(accepted, (list, tuple, set, frozenset)) else [accepted]
+            lists = [self.posting(field, value) for value in values]
+            if len(lists) == 1:
+                rows = lists[0]
+            else:
+                # A row has one value per field, so the lists are disjoint
+                rows = np.sort(np.concatenate(lists)) if lists else np.zeros(0, dtype=np.int32)
+            matched = rows if matched is None else np.intersect1d(matched, rows, assume_unique=True)
+            if not len(matched):
+                break
+        return np.asarray(matched, dtype=np.int32)
+
+    def to_arrays(self) -> Tuple[Dict[str, Any], Dict[str, np.ndarray]]:
+        """(meta, arrays) form for the binary index format."""
+        meta = {
+            "doc_count": self.doc_count,
+            "fields": {field: list(values) for field, values in self.postings.items()}
+        }
+        return meta, {"offsets": self.offsets, "rows": self.rows}
+
+    @classmethod
+    def from_arrays(cls, meta: Dict[str, Any], arrays: Dict[str, np.ndarray]) -> "FilterIndex":
+        index = cls()
+        index.doc_count = meta["doc_count"]
+        posting_id = 0
+        for field, values in meta["fields"].items():
+            index.postings[field] = {}
+            for value in values:
+                index.postings[field][value] = posting_id
+                posting_id += 1
+        index.offsets = arrays["offsets"]
+        index.rows = arrays["rows"]
+        return index
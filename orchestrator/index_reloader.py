@@ -0,0 +1,152 @@
+"""
+Hot reloading of the RAG index.
+A new EmbeddingRAG is loaded (or rebuilt from the knowledge base) off the
+request path and swapped into the owning agent with a single reference
+assignment; searches already running keep using the instance they started
+with. The index directory's manifest.json is written last by every build, so
+it serves as the change signal for the optional polling watcher.
+"""
+import os
+import threading
+import time
+import traceback
+from typing import Any, Dict, Optional, Tuple
+
+from config.embedding_settings import RAG_RELOAD_INTERVAL_SECONDS
+from orchestrator.embedding_rag import EmbeddingRAG, MANIFEST_FILE, read_manifest
+
+
+class IndexReloader:
+    """
+    Replaces `owner.rag` with a freshly loaded index. One reload runs at a
+    time; the watcher thread polls the manifest every `interval_seconds`.
+    """
+
+    def __init__(self, owner: Any, interval_seconds: float = RAG_RELOAD_INTERVAL_SECONDS):
+        self.owner = owner
+        self.interval_seconds = interval_seconds
+        self._reload_lock = threading.Lock()
+        self._worker: Optional[threading.Thread] = None
+        self._watcher: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+        self._manifest_stamp = self._stat_manifest()
+        # Manifest index id the current instance was loaded from
+        self._loaded_manifest_id = self._read_manifest_id()
+        self.stats_counters = {"reloads": 0, "skipped": 0, "failures": 0}
+        self.last_reload_at: Optional[float] = None
+        self.last_error: Optional[str] = None
+
+    @property
+    def manifest_path(self) -> str:
+        return os.path.join(self.owner.rag.index_dir, MANIFEST_FILE)
+
+    def _stat_manifest(self) -> Optional[Tuple[int, int]]:
+        try:
+            stat = os.stat(self.manifest_path)
+        except OSError:
+            return None
+        return stat.st_mtime_ns, stat.st_size
+
+    def _read_manifest_id(self) -> Optional[str]:
+        manifest = read_manifest(self.owner.rag.index_dir)
+        return manifest.get("index_id") if manifest else None
+
+    def reload(self, force: bool = False, rebuild: bool = False) -> Dict[str, Any]:
+        """
+        Loads the index from disk (after rebuilding it from the knowledge base
+        when `rebuild`) and swaps it in. Without `force`/`rebuild`, nothing is
+        loaded unless the manifest changed since the last load.
+        """
+        with self._reload_lock:
+            current: EmbeddingRAG = self.owner.rag
+            manifest_id = self._read_manifest_id()
+            if not (force or rebuild) and manifest_id == self._loaded_manifest_id:
+                self.stats_counters["skipped"] += 1
+                return {"reloaded": False, "index_id": current.index_id}
+
+            try:
+                fresh = EmbeddingRAG(
+                    kb_path=current.kb_path,
+                    index_dir=current.index_dir,
+                    ann_backend=current.ann_backend,
+                    reranker=current.reranker,
+                    embedding_provider=current.embedding_provider
+                )
+                if rebuild:
+                    # Inside a server worker: build in-process rather than forking a pool
+                    fresh.build_index(rebuild=True, workers=1)
+                    manifest_id = self._read_manifest_id()
+            except Exception as e:
+                self.stats_counters["failures"] += 1
+                self.last_error = str(e)
+                print(f"Warning: Index reload failed ({e}). Falling back to the current index.")
+                traceback.print_exc()
+                return {"reloaded": False, "index_id": current.index_id, "error": str(e)}
+
+            if current.num_passages and not fresh.num_passages:
+                self.stats_counters["failures"] += 1
+                self.last_error = "new index is empty"
+                print("Warning: Reloaded index has no passages. Falling back to the current index.")
+                return {"reloaded": False, "index_id": current.index_id, "error": self.last_error}
+
+            # Atomic reference swap: new requests see the new index, in-flight ones finish on the old
+            self.owner.rag = fresh
+            self._loaded_manifest_id = manifest_id
+            self._manifest_stamp = self._stat_manifest()
+            self.stats_counters["reloads"] += 1
+            self.last_reload_at = time.time()
+            self.last_error = None
+            print(f"Reloaded RAG index {current.index_id or '-'} -> {fresh.index_id} ({fresh.num_passages} passages).")
+            return {"reloaded": True, "index_id": fresh.index_id, "previous_index_id": current.index_id}
+
+    def reload_in_background(self, force: bool = False, rebuild: bool = False) -> bool:
+        """Starts reload() on a worker thread. Returns False if one is already running."""
+        if self._worker is not None and self._worker.is_alive():
+            return False
+        self._worker = threading.Thread(
+            target=self.reload, kwargs={"force": force, "rebuild": rebuild},
+            name="rag-index-reload", daemon=True
+        )
+        self._worker.start()
+        return True
+
+    # ------------------------------------------------------------------
+    # Watcher
+    # ------------------------------------------------------------------
+
+    def start(self) -> bool:
+        """Starts polling the manifest (no-op when the interval is 0 or already running)."""
+        if self.interval_seconds <= 0 or (self._watcher is not None and self._watcher.is_alive()):
+            return False
+        self._stop.clear()
+        self._watcher = threading.Thread(target=self._watch, name="rag-index-watcher", daemon=True)
+        self._watcher.start()
+        return True
+
+    def stop(self):
+        self._stop.set()
+        if self._watcher is not None:
+            self._watcher.join(timeout=self.interval_seconds + 1.0)
+            self._watcher = None
+
+    def _watch(self):
+        while not self._stop.wait(self.interval_seconds):
+            self.check()
+
+    def check(self) -> bool:
+        """Reloads if the manifest file changed since the last look. Returns True on a swap."""
+        stamp = self._stat_manifest()
+        if stamp is None or stamp == self._manifest_stamp:
+            return False
+        self._manifest_stamp = stamp
+        return self.reload()["reloaded"]
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            **self.stats_counters,
+            "watching": self._watcher is not None and self._watcher.is_alive(),
+            "interval_seconds": self.interval_seconds,
+            "reloading": self._worker is not None and self._worker.is_alive(),
+            "last_reload_at": self.last_reload_at,
+            "last_error": self.last_error
+        }
@@ -0,0 +1,344 @@
+"""
+A single RAG index shard: the passages of one knowledge base source together
+with their embedding matrix, optional ANN structure, BM25 index and metadata
+filter index.
+Shards are built, persisted and searched independently; EmbeddingRAG fans
+queries out across them.
+"""
+import hashlib
+import json
+import os
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from config.embedding_settings import (
+    INDEX_VERSION,
+    EMBEDDINGS_FILE,
+    EMBEDDINGS_FORMAT_VERSION
+)
+from orchestrator.ann_index import VectorIndex, create_vector_index, top_k_indices
+from orchestrator.bm25 import BM25Index
+from orchestrator.filter_index import FilterIndex
+from orchestrator.passage_store import Passage, PassageStore
+from orchestrator.index_format import IndexFormatError, atomic_write, read_index, write_index
+
+INDEX_FILE = "index.bin"
+# JSON layout written before the binary format (still readable)
+LEGACY_METADATA_FILE = "metadata.json"
+
+# Embeds a sequence of passages into a matrix of unit-length rows
+EmbedFn = Callable[[List[Passage]], np.ndarray]
+
+
+class IndexShard:
+    """
+    Retrieval structures for one KB source, persisted under `directory`.
+    """
+
+    def __init__(self, name: str, source: str, directory: str, ann_backend: str):
+        self.name = name
+        self.source = source
+        self.directory = directory
+        self.ann_backend = ann_backend
+        self.passages = PassageStore()
+        # Normalized passage vectors, one row per passage (float32, C-contiguous)
+        self.embeddings = np.zeros((0, 0), dtype=np.float32)
+        self.embeddings_info: Dict[str, Any] = {}
+        # Optional ANN structure over self.embeddings (None means exact search)
+        self.ann_index: Optional[VectorIndex] = None
+        self.ann_info: Dict[str, Any] = {}
+        # Inverted index for lexical (BM25) retrieval
+        self.lexical_index = BM25Index()
+        # Posting lists of rows per source/metadata value
+        self.filter_index = FilterIndex()
+        self.index_id = ""
+
+    # ------------------------------------------------------------------
+    # Loading
+    # ------------------------------------------------------------------
+
+    def load(self, embed_fn: EmbedFn, signature: str) -> bool:
+        """Loads the shard from disk. Returns False if there is no compatible index."""
+        loaded = self._read_index_file()
+        if loaded is None:
+            return False
+        meta, passages, lexical_index, filter_index = loaded
+        if meta.get("version") != INDEX_VERSION:
+            return False
+
+        self.passages = passages
+        self.source = meta.get("source", self.source)
+        self.embeddings_info = meta.get("embeddings") or {}
+        self.embeddings, reembedded = self._load_embeddings(self.embeddings_info, embed_fn, signature)
+        self._load_ann_index(meta.get("ann") or {}, signature, reembedded)
+        self._load_lexical_index(lexical_index)
+        self._load_filter_index(filter_index)
+        self.index_id = self.compute_index_id(signature)
+        return True
+
+    def _read_index_file(self) -> Optional[Tuple[Dict[str, Any], PassageStore, Optional[BM25Index], Optional[FilterIndex]]]:
+        """Reads index.bin (or a legacy metadata.json) into (meta, passages, BM25 index, filter index)."""
+        index_path = os.path.join(self.directory, INDEX_FILE)
+        if os.path.exists(index_path):
+            try:
+                meta, arrays = read_index(index_path)
+            except IndexFormatError as e:
+                print(f"Warning: {e}. Skipping shard {self.source}; rebuild the index.")
+                return None
+            passages = PassageStore.from_arrays(meta["passages"], _sections(arrays, "passages"))
+            lexical_index = BM25Index.from_arrays(meta["bm25"], _sections(arrays, "bm25")) if meta.get("bm25") else None
+            filter_index = FilterIndex.from_arrays(meta["filters"], _sections(arrays, "filters")) if meta.get("filters") else None
+            return meta, passages, lexical_index, filter_index
+
+        legacy_path = os.path.join(self.directory, LEGACY_METADATA_FILE)
+        if os.path.exists(legacy_path):
+            with open(legacy_path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            lexical_index = BM25Index.from_dict(data["bm25"]) if data.get("bm25") else None
+            return data, PassageStore.from_dict(data.get("passages", [])), lexical_index, None
+        return None
+
+    def _load_embeddings(self, info: Dict[str, Any], embed_fn: EmbedFn, signature: str) -> Tuple[np.ndarray, bool]:
+        """
+        Memory-maps the persisted embedding matrix if it matches the current passages
+        and embedding model; otherwise re-embeds the passages in memory.
+        Read-only mappings let several workers share the same page cache.
+        Returns (matrix, whether the passages were re-embedded).
+        """
+        path = os.path.join(self.directory, info.get("file", EMBEDDINGS_FILE))
+        expected = (len(self.passages), info.get("dim"))
+
+        if (
+            info.get("format") == EMBEDDINGS_FORMAT_VERSION
+            and info.get("signature") == signature
+            and os.path.exists(path)
+        ):
+            matrix = np.load(path, mmap_mode="r")
+            if matrix.dtype == np.float32 and matrix.shape == expected:
+                return matrix, False
+            print(f"Embeddings file {path} does not match the index metadata, re-embedding passages.")
+        elif len(self.passages):
+            print(f"No compatible embeddings file for {self.source}, re-embedding passages. "
+                  "Run scripts/build_rag_index.py --rebuild to persist them.")
+
+        return embed_fn(self.passages), True
+
+    def _load_ann_index(self, info: Dict[str, Any], signature: str, reembedded: bool):
+        """
+        Loads the persisted ANN structure, building it in memory if missing or
+        stale: another backend, shape or embedding model, or vectors that were
+        just re-embedded rather than the ones it was built over.
+        """
+        self.ann_index = create_vector_index(self.ann_backend, num_passages=len(self.passages))
+        self.ann_info = {}
+        if self.ann_index is None:
+            return
+        if (
+            not reembedded
+            and info.get("backend") == self.ann_index.backend
+            and info.get("signature") == signature
+            and self.ann_index.load(self.directory, self.embeddings, info)
+        ):
+            self.ann_info = info
+            return
+        print(f"No compatible {self.ann_index.backend} ANN index on disk for {self.source}, building it in memory.")
+        self.ann_index.build(self.embeddings)
+
+    def _load_lexical_index(self, lexical_index: Optional[BM25Index]):
+        """Uses the persisted BM25 index, rebuilding it from the passages if absent or stale."""
+        if lexical_index is not None and lexical_index.doc_count == len(self.passages):
+            self.lexical_index = lexical_index
+        else:
+            self.lexical_index = BM25Index()
+            self.lexical_index.build(list(self.passages.texts()))
+
+    def _load_filter_index(self, filter_index: Optional[FilterIndex]):
+        """Uses the persisted filter index, rebuilding it from the passage metadata if absent or stale."""
+        if filter_index is not None and filter_index.doc_count == len(self.passages):
+            self.filter_index = filter_index
+        else:
+            self.filter_index = FilterIndex()
+            self.filter_index.build(self.passages)
+
+    # ------------------------------------------------------------------
+    # Building
+    # ------------------------------------------------------------------
+
+    def rebuild(self, passages: PassageStore, embed_fn: EmbedFn, signature: str) -> Dict[str, int]:
+        """
+        Replaces the shard contents with `passages`. Chunks whose content hash is
+        already in the shard reuse the stored vector; only new or changed chunks
+        are embedded. Returns counts of reused, added and dropped chunks.
+        """
+        embeddings, stats = self._embed_incrementally(passages, embed_fn)
+        self.passages = passages
+        self.embeddings = embeddings
+        self.lexical_index = BM25Index()
+        self.lexical_index.build(list(self.passages.texts()))
+        self.filter_index = FilterIndex()
+        self.filter_index.build(self.passages)
+        self.index_id = self.compute_index_id(signature)
+        return stats
+
+    def _embed_incrementally(self, passages: PassageStore, embed_fn: EmbedFn):
+        """
+        Builds the embedding matrix for `passages`, copying rows from the current
+        shard for unchanged chunks and embedding the rest.
+        Returns (matrix, {"reused", "added", "dropped"}).
+        """
+        previous = {}
+        if len(self.passages) and self.embeddings.shape[0] == len(self.passages):
+            for row, old_hash in enumerate(self.passages.content_hashes()):
+                previous.setdefault(old_hash, row)
+
+        hashes = passages.content_hashes()
+        new_hashes = set(hashes)
+        missing = [passages[row] for row, h in enumerate(hashes) if h not in previous]
+        stats = {
+            "reused": len(passages) - len(missing),
+            "added": len(missing),
+            "dropped": sum(1 for h in previous if h not in new_hashes)
+        }
+        fresh = embed_fn(missing)
+
+        if not len(passages):
+            return np.zeros((0, 0), dtype=np.float32), stats
+
+        dim = fresh.shape[1] if missing else self.embeddings.shape[1]
+        matrix = np.empty((len(passages), dim), dtype=np.float32)
+        fresh_row = 0
+        for row, passage_hash in enumerate(hashes):
+            old_row = previous.get(passage_hash)
+            if old_row is not None:
+                matrix[row] = self.embeddings[old_row]
+            else:
+                matrix[row] = fresh[fresh_row]
+                fresh_row += 1
+        return matrix, stats
+
+    def compute_index_id(self, signature: str) -> str:
+        """Identity of the shard contents, metadata and embedding model."""
+        digest = hashlib.sha256(f"{INDEX_VERSION}|{signature}|{self.source}".encode("utf-8"))
+        digest.update("".join(self.passages.content_hashes()).encode("ascii"))
+        if self.passages.metadata_fields:
+            digest.update(json.dumps([self.passages.metadata_fields, self.passages.metadata_values]).encode("utf-8"))
+            digest.update(np.ascontiguousarray(self.passages.metadata_ids).tobytes())
+        return digest.hexdigest()[:16]
+
+    def build_ann_index(self):
+        """Builds and saves the configured ANN backend (no-op for exact search)."""
+        self.ann_index = create_vector_index(self.ann_backend, num_passages=len(self.passages))
+        self.ann_info = {}
+        if self.ann_index is None:
+            return
+        self.ann_index.build(self.embeddings)
+        self.ann_info = self.ann_index.save(self.directory)
+        self.ann_info["signature"] = self.embeddings_info.get("signature")
+        print(f"Built {self.ann_index.backend} ANN index over {len(self.passages)} passages of {self.source}.")
+
+    # ------------------------------------------------------------------
+    # Persistence
+    # ------------------------------------------------------------------
+
+    def save(self, signature: str):
+        """Persists embeddings and the ANN structure, then the index file that references them."""
+        os.makedirs(self.directory, exist_ok=True)
+        self.embeddings_info = self._save_embeddings(signature)
+        self.build_ann_index()
+        self.write_index_file()
+
+    def _save_embeddings(self, signature: str) -> Dict[str, Any]:
+        """Writes the embedding matrix as a .npy file and returns its metadata entry."""
+        matrix = self.embeddings
+        atomic_write(
+            os.path.join(self.directory, EMBEDDINGS_FILE),
+            lambda f: np.save(f, np.ascontiguousarray(matrix, dtype=np.float32))
+        )
+        return {
+            "file": EMBEDDINGS_FILE,
+            "format": EMBEDDINGS_FORMAT_VERSION,
+            "signature": signature,
+            "count": int(matrix.shape[0]),
+            "dim": int(matrix.shape[1]) if matrix.ndim == 2 else 0
+        }
+
+    def write_index_file(self):
+        """
+        Persists index.bin: metadata plus the passage columns, BM25 and filter
+        index arrays as raw binary sections (see orchestrator.index_format).
+        """
+        passages_meta, passage_arrays = self.passages.to_arrays()
+        bm25_meta, bm25_arrays = self.lexical_index.to_arrays()
+        filters_meta, filter_arrays = self.filter_index.to_arrays()
+        meta = {
+            "version": INDEX_VERSION,
+            "source": self.source,
+            "index_id": self.index_id,
+            "embeddings": self.embeddings_info,
+            "ann": self.ann_info,
+            "bm25": bm25_meta,
+            "filters": filters_meta,
+            "passages": passages_meta
+        }
+        arrays = {f"passages.{name}": array for name, array in passage_arrays.items()}
+        arrays.update({f"bm25.{name}": array for name, array in bm25_arrays.items()})
+        arrays.update({f"filters.{name}": array for name, array in filter_arrays.items()})
+        write_index(os.path.join(self.directory, INDEX_FILE), meta, arrays)
+
+        legacy_path = os.path.join(self.directory, LEGACY_METADATA_FILE)
+        if os.path.exists(legacy_path):
+            os.remove(legacy_path)
+
+    # ------------------------------------------------------------------
+    # Search
+    # ------------------------------------------------------------------
+
+    def dense_search(self, query_embedding: np.ndarray, top_k: int, min_score: Optional[float] = None,
+                     rows: Optional[np.ndarray] = None) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Returns (row ids, scores) of the top_k passages via the ANN index or exact
+        scoring, best first. Passages below `min_score` are discarded before the
+        top-k selection, so permissive queries never rank the whole shard.
+        With `rows` (from the filter index) only those passages are scored, exactly.
+        """
+        empty = np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.float32)
+        if not len(self.passages) or (rows is not None and not len(rows)):
+            return empty
+        if self.embeddings.shape[1] != query_embedding.shape[0]:
+            print(f"Embedding dimension mismatch in shard {self.source}; rebuild the index.")
+            return empty
+        if rows is not None:
+            scores = self.embeddings[rows] @ query_embedding
+            if min_score is not None:
+                keep = np.flatnonzero(scores >= min_score)
+                rows, scores = rows[keep], scores[keep]
+            ids = top_k_indices(scores, top_k)
+            return rows[ids].astype(np.int64), scores[ids]
+        if self.ann_index is not None:
+            ids, scores = self.ann_index.search(query_embedding, top_k)
+            if min_score is not None:
+                keep = scores >= min_score
+                ids, scores = ids[keep], scores[keep]
+            return ids, scores
+        # Cosine similarity against every passage as a single matrix-vector product
+        scores = self.embeddings @ query_embedding
+        if min_score is None:
+            ids = top_k_indices(scores, top_k)
+            return ids, scores[ids]
+        candidates = np.flatnonzero(scores >= min_score)
+        ids = candidates[top_k_indices(scores[candidates], top_k)]
+        return ids, scores[ids]
+
+    def lexical_search(self, query: str, top_k: int,
+                       rows: Optional[np.ndarray] = None) -> Tuple[np.ndarray, np.ndarray]:
+        """Returns (row ids, BM25 scores) of the best lexical matches, optionally among `rows` only."""
+        if rows is not None and not len(rows):
+            return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.float32)
+        return self.lexical_index.search(query, top_k, rows)
+
+
+def _sections(arrays: Dict[str, np.ndarray], prefix: str) -> Dict[str, np.ndarray]:
+    """The arrays stored under `prefix.` with the prefix stripped."""
+    prefix += "."
+    return {name[len(prefix):]: array for name, array in arrays.items() if name.startswith(prefix)}
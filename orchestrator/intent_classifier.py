@@ -0,0 +1,253 @@
+"""
+Local intent classifier for the tiered router.
+A TF-IDF logistic regression over word, word-bigram and character n-gram
+features, trained with scikit-learn from the few-shot examples in the router
+prompt plus a labeled utterance file. Training exports the vocabulary, idf and
+weights into plain arrays, so prediction needs only numpy and a handful of
+dict lookups (about 0.1 ms per utterance), and calibrates on held-out folds
+the confidence above which the classifier's answers are trusted.
+scripts/train_intent_classifier.py writes the arrays to an .npz artifact that
+the router loads at startup without scikit-learn or pickle.
+"""
+import hashlib
+import json
+import math
+import re
+from collections import Counter
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from config.llm_settings import INTENT_CLASSIFIER_PATH, INTENT_CLASSIFIER_EXAMPLES_PATH
+from orchestrator.index_format import atomic_write
+from orchestrator.keyword_matcher import normalize_words
+
+# Bump when the artifact layout or feature extraction changes
+CLASSIFIER_FORMAT_VERSION = 2
+
+# Calibration: the lowest threshold whose held-out answers reach this precision
+TARGET_PRECISION = 0.9
+CALIBRATION_FOLDS = 5
+
+# Few-shot lines of the router prompt: - "utterance" -> {json}
+PROMPT_EXAMPLE = re.compile(r'^-\s*"(.+?)"\s*->\s*(\{.*\})\s*$', re.MULTILINE)
+
+# (text, intent, action_type)
+Example = Tuple[str, str, Optional[str]]
+
+
+def features(text: str) -> List[str]:
+    """Words, word bigrams and 3-4 character n-grams of each word (with boundary marks)."""
+    words = normalize_words(text)
+    found = [f"w:{word}" for word in words]
+    found.extend(f"b:{first} {second}" for first, second in zip(words, words[1:]))
+    for word in words:
+        padded = f" {word} "
+        for size in (3, 4):
+            found.extend(f"c:{padded[i:i + size]}" for i in range(len(padded) - size + 1))
+    return found
+
+
+class IntentClassifier:
+    """Linear model over sublinear TF-IDF features; predict() returns a router classification."""
+
+    def __init__(self, vocabulary: Dict[str, int], idf: List[float], weights: np.ndarray,
+                 intercept: np.ndarray, labels: List[Tuple[str, Optional[str]]], source_hash: str,
+                 threshold: float = 1.0):
+        self.vocabulary = vocabulary
+        self.idf = idf
+        # (features, classes), so a row per feature present in the utterance
+        self.weights = weights
+        self.intercept = intercept
+        # (intent, action_type) per class
+        self.labels = labels
+        # SHA-256 of the training examples, used to detect a stale artifact
+        self.source_hash = source_hash
+        # Calibrated minimum confidence for answering without the LLM
+        self.threshold = threshold
+
+    def predict(self, text: str) -> Dict[str, Any]:
+        rows, values = [], []
+        vocabulary, idf = self.vocabulary, self.idf
+        for feature, count in Counter(features(text)).items():
+            row = vocabulary.get(feature)
+            if row is not None:
+                rows.append(row)
+                values.append((1.0 + math.log(count)) * idf[row] if count > 1 else idf[row])
+
+        scores = self.intercept
+        if rows:
+            norm = math.sqrt(sum(value * value for value in values))
+            scores = scores + np.dot(values, self.weights[rows]) / norm
+        scores = np.exp(scores - scores.max())
+        best = int(scores.argmax())
+        intent, action_type = self.labels[best]
+        return {
+            "intent": intent,
+            "action_type": action_type,
+            "confidence": round(float(scores[best] / scores.sum()), 2)
+        }
+
+
+def prompt_examples(prompt: str) -> List[Example]:
+    """The few-shot examples embedded in a router prompt."""
+    examples = []
+    for text, result in PROMPT_EXAMPLE.findall(prompt):
+        result = json.loads(result)
+        examples.append((text, result["intent"], result.get("action_type")))
+    return examples
+
+
+def file_examples(path: str) -> List[Example]:
+    """Labeled utterances from a JSONL file of {"text", "intent", "action_type"} records."""
+    examples = []
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            if line.strip():
+                record = json.loads(line)
+                examples.append((record["text"], record["intent"], record.get("action_type")))
+    return examples
+
+
+def training_examples(prompt: str, examples_path: str = INTENT_CLASSIFIER_EXAMPLES_PATH) -> List[Example]:
+    examples = prompt_examples(prompt)
+    if examples_path:
+        examples.extend(file_examples(examples_path))
+    return examples
+
+
+def examples_hash(examples: List[Example]) -> str:
+    return hashlib.sha256(json.dumps(examples).encode("utf-8")).hexdigest()
+
+
+def _fit(examples: List[Example]) -> IntentClassifier:
+    # Imported here so routing processes that only load the artifact never import scikit-learn
+    from sklearn.feature_extraction.text import TfidfVectorizer
+    from sklearn.linear_model import LogisticRegression
+
+    labels = sorted({(intent, action_type) for _, intent, action_type in examples}, key=str)
+    if len(labels) < 3:
+        raise ValueError(f"Training needs examples of at least three labels, got {labels}")
+
+    vectorizer = TfidfVectorizer(analyzer=features, sublinear_tf=True)
+    matrix = vectorizer.fit_transform([text for text, _, _ in examples])
+    targets = [labels.index((intent, action_type)) for _, intent, action_type in examples]
+    model = LogisticRegression(C=10.0, max_iter=2000)
+    model.fit(matrix, targets)
+
+    return IntentClassifier(
+        vocabulary={feature: int(row) for feature, row in vectorizer.vocabulary_.items()},
+        idf=vectorizer.idf_.tolist(),
+        weights=np.ascontiguousarray(model.coef_.T, dtype=np.float64),
+        intercept=model.intercept_.astype(np.float64),
+        labels=[labels[i] for i in model.classes_],
+        source_hash=examples_hash(examples)
+    )
+
+
+def calibrate_threshold(examples: List[Example], target_precision: float = TARGET_PRECISION,
+                        folds: int = CALIBRATION_FOLDS) -> Dict[str, float]:
+    """
+    Predicts every example with a model trained on the other folds and returns
+    the lowest confidence threshold at which the answered (non-ambiguous)
+    held-out predictions reach `target_precision`, with that precision and
+    the share of examples answered. Answering an out-of-scope ("ambiguous")
+    example counts as a mistake. Without a qualifying threshold it is 1.0
+    (never answer).
+    """
+    from sklearn.model_selection import StratifiedKFold
+
+    truth = [f"{intent}|{action_type}" for _, intent, action_type in examples]
+    splitter = StratifiedKFold(n_splits=folds, shuffle=True, random_state=0)
+    held_out = []
+    for train_rows, test_rows in splitter.split(np.zeros(len(examples)), truth):
+        model = _fit([examples[row] for row in train_rows])
+        for row in test_rows:
+            text, intent, action_type = examples[row]
+            predicted = model.predict(text)
+            if predicted["intent"] != "ambiguous":
+                correct = (predicted["intent"], predicted["action_type"]) == (intent, action_type)
+                held_out.append((predicted["confidence"], correct))
+
+    held_out.sort(reverse=True)
+    best = {"threshold": 1.0, "precision": 1.0, "coverage": 0.0}
+    answered = correct_count = 0
+    for position, (confidence, correct) in enumerate(held_out):
+        answered += 1
+        correct_count += correct
+        # Thresholds fall between distinct confidences
+        if position + 1 < len(held_out) and held_out[position + 1][0] == confidence:
+            continue
+        if correct_count / answered >= target_precision:
+            best = {"threshold": confidence, "precision": correct_count / answered,
+                    "coverage": answered / len(examples)}
+    return best
+
+
+def train_intent_classifier(examples: List[Example], calibrate: bool = True) -> IntentClassifier:
+    """
+    Fits the model with scikit-learn, exports it and (with `calibrate`) sets
+    its threshold from held-out folds. Raises ValueError on unusable data.
+    """
+    try:
+        import sklearn  # noqa: F401
+    except ImportError:
+        raise ImportError("scikit-learn is required to train the intent classifier")
+    classifier = _fit(examples)
+    if calibrate:
+        classifier.threshold = calibrate_threshold(examples)["threshold"]
+    return classifier
+
+
+def save_intent_classifier(classifier: IntentClassifier, path: str = INTENT_CLASSIFIER_PATH):
+    """Writes the classifier as plain arrays plus a JSON header (.npz, no pickled objects)."""
+    features_by_row = sorted(classifier.vocabulary, key=classifier.vocabulary.get)
+    header = {
+        "format_version": CLASSIFIER_FORMAT_VERSION,
+        "source_hash": classifier.source_hash,
+        "threshold": classifier.threshold,
+        "labels": classifier.labels
+    }
+    atomic_write(path, lambda f: np.savez(
+        f,
+        header=np.array(json.dumps(header)),
+        features=np.array(features_by_row, dtype=str),
+        idf=np.asarray(classifier.idf, dtype=np.float64),
+        weights=classifier.weights,
+        intercept=classifier.intercept
+    ))
+
+
+def read_intent_classifier(path: str = INTENT_CLASSIFIER_PATH) -> IntentClassifier:
+    """Reads an artifact written by save_intent_classifier. Raises ValueError on another format."""
+    with np.load(path, allow_pickle=False) as data:
+        header = json.loads(str(data["header"]))
+        if header.get("format_version") != CLASSIFIER_FORMAT_VERSION:
+            raise ValueError(f"format {header.get('format_version')}, expected {CLASSIFIER_FORMAT_VERSION}")
+        return IntentClassifier(
+            vocabulary={feature: row for row, feature in enumerate(data["features"].tolist())},
+            idf=data["idf"].tolist(),
+            weights=np.ascontiguousarray(data["weights"]),
+            intercept=np.array(data["intercept"]),
+            labels=[tuple(label) for label in header["labels"]],
+            source_hash=header["source_hash"],
+            threshold=header["threshold"]
+        )
+
+
+def load_intent_classifier(path: str = INTENT_CLASSIFIER_PATH) -> Optional[IntentClassifier]:
+    """
+    Loads the trained artifact for the router, or returns None (routing
+    continues without the classifier) if it is missing or unreadable. Nothing
+    is trained here; staleness against the training examples is checked by
+    `scripts/train_intent_classifier.py --check` and the test suite.
+    """
+    try:
+        return read_intent_classifier(path)
+    except FileNotFoundError:
+        problem = f"{path} not found"
+    except Exception as e:
+        problem = f"Could not load {path} ({e})"
+    print(f"Warning: {problem}. Falling back to routing without the local classifier "
+          "(run scripts/train_intent_classifier.py).")
+    return None
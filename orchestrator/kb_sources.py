@@ -0,0 +1,164 @@
+"""
+Knowledge base source discovery and readers.
+A KB path may be a single file or a directory of documents; each supported
+document becomes one index shard. Readers yield (line number, text) pairs so
+the streaming chunker can consume any format the same way, grouped into runs
+of lines that share the same filterable metadata.
+"""
+import hashlib
+import json
+import os
+import re
+from itertools import groupby
+from typing import Any, Dict, Iterator, List, Tuple
+
+from orchestrator.chunker import iter_lines
+
+TEXT_EXTENSIONS = (".txt", ".md", ".markdown")
+JSON_EXTENSIONS = (".json",)
+SUPPORTED_EXTENSIONS = TEXT_EXTENSIONS + JSON_EXTENSIONS
+
+# Fields holding the policy text in JSON exports, in order of preference
+JSON_TEXT_FIELDS = ("text", "content", "body", "answer", "description")
+
+# Delimits the optional `key: value` metadata block at the top of text documents
+FRONT_MATTER_DELIMITER = "---"
+
+Metadata = Dict[str, str]
+
+
+def discover_sources(kb_path: str) -> List[Tuple[str, str]]:
+    """
+    Returns (source name, file path) pairs. Source names are paths relative to
+    the KB directory (or the file name for a single-file KB), with '/' separators.
+    """
+    if os.path.isfile(kb_path):
+        return [(os.path.basename(kb_path), kb_path)]
+    if not os.path.isdir(kb_path):
+        return []
+
+    sources = []
+    for root, _, files in os.walk(kb_path):
+        for file_name in files:
+            if file_name.startswith(".") or not file_name.lower().endswith(SUPPORTED_EXTENSIONS):
+                continue
+            path = os.path.join(root, file_name)
+            sources.append((os.path.relpath(path, kb_path).replace(os.sep, "/"), path))
+    return sorted(sources)
+
+
+def shard_name(source: str) -> str:
+    """
+    Filesystem-safe shard directory name for a source. A short hash of the raw
+    source path keeps sources that differ only in unsafe characters apart
+    (cards/fees.md and cards_fees.md).
+    """
+    digest = hashlib.sha256(source.encode("utf-8")).hexdigest()[:8]
+    return f"{re.sub(r'[^A-Za-z0-9_.-]', '_', source)}-{digest}"
+
+
+def iter_source_sections(path: str) -> Iterator[Tuple[Metadata, Iterator[Tuple[int, str]]]]:
+    """
+    Yields (metadata, lines) for consecutive runs of lines sharing the same
+    metadata, so chunks never mix passages with different metadata. Each
+    `lines` iterator must be consumed before advancing to the next run.
+    """
+    if path.lower().endswith(JSON_EXTENSIONS):
+        tagged = _iter_json_lines(path)
+    else:
+        tagged = _iter_text_lines(path)
+    for metadata, group in groupby(tagged, key=lambda item: item[0]):
+        yield metadata, ((line_no, line) for _, line_no, line in group)
+
+
+def _iter_text_lines(path: str) -> Iterator[Tuple[Metadata, int, str]]:
+    """
+    Reads a text/markdown document. A leading block of `key: value` lines
+    between two '---' lines is document metadata and is not indexed as text.
+    """
+    lines = iter_lines(path)
+    metadata: Metadata = {}
+    first = next(lines, None)
+    if first is None:
+        return
+    if first[1].strip() != FRONT_MATTER_DELIMITER:
+        yield metadata, first[0], first[1]
+    else:
+        header = [first]
+        for line_no, line in lines:
+            header.append((line_no, line))
+            if line.strip() == FRONT_MATTER_DELIMITER:
+                metadata = _front_matter(line for _, line in header[1:-1])
+                break
+        else:
+            # No closing delimiter: the block was ordinary text
+            for line_no, line in header:
+                yield metadata, line_no, line
+            return
+    for line_no, line in lines:
+        yield metadata, line_no, line
+
+
+def _front_matter(lines: Iterator[str]) -> Metadata:
+    metadata: Metadata = {}
+    for line in lines:
+        key, sep, value = line.partition(":")
+        if sep and key.strip():
+            metadata[key.strip()] = value.strip().strip("'\"")
+    return metadata
+
+
+def _iter_json_lines(path: str) -> Iterator[Tuple[Metadata, int, str]]:
+    """
+    Reads a JSON policy export: a list of records (strings or objects with a
+    text field), optionally wrapped in an object under a list-valued key.
+    Every line of record i is reported with line number i + 1. Scalar fields
+    of a record (and of the wrapping object) are its metadata.
+    """
+    with open(path, "r", encoding="utf-8") as f:
+        data = json.load(f)
+
+    defaults, records = _json_records(data)
+    for record_no, record in enumerate(records, start=1):
+        text = _json_record_text(record)
+        metadata = {**defaults, **_json_metadata(record)}
+        for line in text.splitlines():
+            yield metadata, record_no, line
+
+
+def _json_records(data: Any) -> Tuple[Metadata, List[Any]]:
+    if isinstance(data, list):
+        return {}, data
+    if isinstance(data, dict):
+        for value in data.values():
+            if isinstance(value, list):
+                return _json_metadata(data), value
+        return {}, [data]
+    return {}, [data]
+
+
+def metadata_value(value: Any) -> str:
+    """How a scalar metadata value is stored and matched: booleans as true/false, the rest via str()."""
+    return str(value).lower() if isinstance(value, bool) else str(value)
+
+
+def _json_metadata(record: Any) -> Metadata:
+    """Scalar, non-text fields of a JSON object as strings."""
+    if not isinstance(record, dict):
+        return {}
+    metadata: Metadata = {}
+    for key, value in record.items():
+        if key in JSON_TEXT_FIELDS or value is None or isinstance(value, (dict, list)):
+            continue
+        metadata[key] = metadata_value(value)
+    return metadata
+
+
+def _json_record_text(record: Any) -> str:
+    if isinstance(record, str):
+        return record
+    if isinstance(record, dict):
+        for field in JSON_TEXT_FIELDS:
+            if isinstance(record.get(field), str):
+                return record[field]
+    return ""
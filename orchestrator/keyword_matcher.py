@@ -0,0 +1,64 @@
+"""
+Compiled keyword matcher for heuristic intent routing.
+Phrase tables are compiled once into a dict keyed by each phrase's first
+word; matching walks the utterance's words once with one lookup per word
+(plus a comparison of the rest of a phrase on a hit), so the cost depends on
+the utterance length, not on how many phrases exist.
+"""
+import re
+from typing import Dict, FrozenSet, Iterable, List, Mapping, Tuple
+
+# Punctuation is dropped without splitting words ("card's" -> "cards")
+PUNCTUATION = re.compile(r"[^\w\s]")
+
+
+def normalize_words(text: str) -> List[str]:
+    """Lowercased words of an utterance with punctuation removed."""
+    return PUNCTUATION.sub("", text.lower()).split()
+
+
+class KeywordMatcher:
+    """
+    Maps words and multi-word phrases to concepts. A phrase only matches whole
+    words, and overlapping phrases resolve to the longest one.
+    """
+
+    def __init__(self, concepts: Mapping[str, Iterable[str]]):
+        self.phrases: Dict[Tuple[str, ...], str] = {}
+        for concept, phrases in concepts.items():
+            for phrase in phrases:
+                words = tuple(normalize_words(phrase))
+                if not words:
+                    continue
+                owner = self.phrases.setdefault(words, concept)
+                if owner != concept:
+                    raise ValueError(f"Phrase '{phrase}' is listed under both '{owner}' and '{concept}'")
+
+        # First word -> [(remaining words, concept)], longest phrase first, so
+        # words that start no phrase cost a single dict lookup
+        self._by_first: Dict[str, List[Tuple[Tuple[str, ...], str]]] = {}
+        for words, concept in sorted(self.phrases.items(), key=lambda item: -len(item[0])):
+            self._by_first.setdefault(words[0], []).append((words[1:], concept))
+
+    def match_words(self, words: List[str]) -> FrozenSet[str]:
+        """Concepts of every phrase found in the (normalized) words."""
+        found = set()
+        by_first = self._by_first
+        i, count = 0, len(words)
+        while i < count:
+            candidates = by_first.get(words[i])
+            i += 1
+            if candidates is None:
+                continue
+            for rest, concept in candidates:
+                if not rest:
+                    found.add(concept)
+                    break
+                if tuple(words[i:i + len(rest)]) == rest:
+                    found.add(concept)
+                    i += len(rest)
+                    break
+        return frozenset(found)
+
+    def match(self, text: str) -> FrozenSet[str]:
+        return self.match_words(normalize_words(text))
@@ -4,8 +4,23 @@ LLM-based Router for intent classification.
 import os
 import json
 import re
+import hashlib
 from typing import Dict, Any, Optional
 from llm.gemini_client import GeminiLLMClient
+from config.llm_settings import (
+    GEMINI_MODEL_NAME,
+    ROUTER_CACHE_SIZE,
+    ROUTER_CACHE_TTL_SECONDS,
+    ROUTER_CACHE_WARM_PATH,
+    ROUTER_ESCALATION_THRESHOLD,
+    INTENT_CLASSIFIER_PATH,
+    INTENT_CLASSIFIER_THRESHOLD
+)
+from orchestrator.index_format import atomic_write
+from orchestrator.intent_classifier import IntentClassifier, load_intent_classifier
+from orchestrator.keyword_matcher import normalize_words
+from orchestrator.lru_cache import TTLLRUCache
+from orchestrator.router_rules import CompiledRules, load_compiled_rules
 
 ROUTER_SYSTEM_PROMPT = """
 You are an intent classifier for a credit-card assistant. Given a single user utterance, return ONLY a JSON object with fields:
@@ -30,114 +45,126 @@ LLM call settings: temperature=0.0, max_tokens=200.
 
 """
 
+# Identifies the prompt/model that produced cached classifications
+ROUTER_CACHE_SIGNATURE = hashlib.sha256(f"{GEMINI_MODEL_NAME}|{ROUTER_SYSTEM_PROMPT}".encode("utf-8")).hexdigest()[:16]
+
 class LLMRouter:
     """
     Router that uses an LLM (or heuristics) to classify user intent.
     """
-    def __init__(self):
-        self.use_real_llm = os.environ.get("USE_REAL_LLM_ROUTER", "false").lower() == "true"
+    def __init__(self, rules: Optional[CompiledRules] = None, warm_cache_path: str = ROUTER_CACHE_WARM_PATH,
+                 escalation_threshold: float = ROUTER_ESCALATION_THRESHOLD,
+                 classifier_path: str = INTENT_CLASSIFIER_PATH,
+                 classifier_threshold: Optional[float] = INTENT_CLASSIFIER_THRESHOLD):
+        # "true": every utterance goes to the LLM; "tiered": heuristics answer
+        # first, then the local classifier, and only utterances neither is
+        # confident about escalate to the LLM
+        mode = os.environ.get("USE_REAL_LLM_ROUTER", "false").lower()
+        self.tiered = mode == "tiered"
+        self.use_real_llm = mode == "true" or self.tiered
+        self.escalation_threshold = escalation_threshold
+        self.requests = 0
+        self.classifier_answers = 0
+        self.escalations = 0
         self.llm = GeminiLLMClient() if self.use_real_llm else None
+        # Heuristic rules compiled from ROUTER_RULES_PATH (used in mock mode)
+        self.rules = rules or load_compiled_rules()
+        # Normalized utterance -> LLM classification
+        self.cache = TTLLRUCache(maxsize=ROUTER_CACHE_SIZE, ttl_seconds=ROUTER_CACHE_TTL_SECONDS)
+        self.warm_cache_path = warm_cache_path
+        if self.use_real_llm and warm_cache_path:
+            self.load_warm_cache(warm_cache_path)
+        # Middle tier of tiered mode, trained from the prompt's examples (see intent_classifier.py)
+        self.classifier: Optional[IntentClassifier] = None
+        if self.tiered and classifier_path:
+            self.classifier = load_intent_classifier(classifier_path)
+        # Minimum classifier confidence; defaults to the threshold calibrated at training time
+        self.classifier_threshold = classifier_threshold
+        if classifier_threshold is None and self.classifier is not None:
+            self.classifier_threshold = self.classifier.threshold
 
-    def classify(self, text: str) -> Dict[str, Any]:
+    def classify(self, text: str, debug_info: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
         """
-        Classifies the input text.
+        Classifies the input text. In LLM mode, utterances that normalize to a
+        cached one skip the LLM; `debug_info["router_cache_hit"]` records which.
+        In tiered mode `debug_info["router_tier"]` records which classifier answered.
         """
-        if self.use_real_llm:
-            return self._classify_with_llm(text)
-        else:
+        if not self.use_real_llm:
             return self._classify_with_heuristics(text)
+        if not self.tiered:
+            return self._classify_with_cached_llm(text, debug_info) or self._fallback_response()
+
+        self.requests += 1
+        heuristic = self._classify_with_heuristics(text)
+        if not self.should_escalate(heuristic):
+            if debug_info is not None:
+                debug_info["router_tier"] = "heuristic"
+            return heuristic
+
+        if self.classifier is not None:
+            predicted = self.classifier.predict(text)
+            if predicted["intent"] != "ambiguous" and predicted["confidence"] >= self.classifier_threshold:
+                self.classifier_answers += 1
+                if debug_info is not None:
+                    debug_info["router_tier"] = "classifier"
+                return predicted
+
+        self.escalations += 1
+        if debug_info is not None:
+            debug_info["router_tier"] = "llm"
+        # If the LLM fails, the heuristic answer is still better than a blind fallback
+        return self._classify_with_cached_llm(text, debug_info) or heuristic
+
+    def should_escalate(self, classification: Dict[str, Any]) -> bool:
+        """Whether a heuristic classification is too weak to act on without the LLM."""
+        return (
+            classification["intent"] == "ambiguous"
+            or classification["confidence"] < self.escalation_threshold
+        )
+
+    def stats(self) -> Dict[str, Any]:
+        """Routing mode, tiered escalation counters and cache stats, for the metrics endpoint."""
+        return {
+            "mode": "tiered" if self.tiered else ("llm" if self.use_real_llm else "heuristic"),
+            "escalation_threshold": self.escalation_threshold,
+            "classifier_threshold": self.classifier_threshold if self.classifier is not None else None,
+            "requests": self.requests,
+            "classifier_answers": self.classifier_answers,
+            "escalations": self.escalations,
+            "escalation_rate": self.escalations / self.requests if self.requests else 0.0,
+            "cache": self.cache.stats()
+        }
+
+    def _classify_with_cached_llm(self, text: str, debug_info: Optional[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+        key = self.cache_key(text)
+        cached = self.cache.get(key)
+        if debug_info is not None:
+            debug_info["router_cache_hit"] = cached is not None
+        if cached is not None:
+            return dict(cached)
+
+        result = self._classify_with_llm(text)
+        if result is not None:
+            self.cache.put(key, dict(result))
+        return result
+
+    @staticmethod
+    def cache_key(text: str) -> str:
+        """Lowercased utterance with punctuation dropped and whitespace folded."""
+        return " ".join(normalize_words(text))
 
     def _classify_with_heuristics(self, text: str) -> Dict[str, Any]:
         """
         Legacy heuristic-based classification (Mock Mode).
+        One pass of the compiled keyword matcher finds every concept in the
+        utterance; the highest-priority rule whose conditions hold decides
+        (see data/router_rules.yaml).
         """
-        # Normalize text: lowercase, replace smart quotes, remove punctuation
-        text_lower = text.lower().replace("’", "'").replace("“", '"').replace("”", '"')
-        text_lower = re.sub(r'[^\w\s]', '', text_lower)
-        
-        BLOCK_SYNONYMS = ["block", "freeze", "shut down", "shut", "lock", "disable", "kill", "freeze it", "shut it down"]
-        LOST_SYNONYMS = ["lost", "gone", "stolen", "misplaced", "missing"]
-        
-        # Action: Block Card
-        # Direct block synonyms
-        if any(keyword in text_lower for keyword in BLOCK_SYNONYMS) and "unblock" not in text_lower:
-            return {
-                "intent": "action",
-                "action_type": "block_card",
-                "confidence": 0.9
-            }
-            
-        # Lost/Stolen + implied block (if just "lost" might be ambiguous, but usually implies block in this context)
-        # But user asked: if any(lost) AND any(block) -> block. 
-        # Actually the user request said:
-        # if any(block in text for block in BLOCK_SYNONYMS): return ...
-        # if any(lost in text for lost in LOST_SYNONYMS) and any(block in text for block in BLOCK_SYNONYMS): return ...
-        # Wait, the second condition is redundant if the first one covers it. 
-        # Let's re-read: "Bro my card’s gone, shut it down" -> "gone" is in LOST, "shut it down" is in BLOCK.
-        # So checking BLOCK_SYNONYMS covers both cases if "shut it down" is present.
-        # However, if user says "I lost my card", "lost" is in LOST_SYNONYMS but not BLOCK_SYNONYMS.
-        # The user's heuristic pseudo-code was:
-        # if any(block...): return block
-        # if any(lost...) and any(block...): return block
-        # This implies "lost" alone might NOT be enough? 
-        # But "I lost my card" usually means "Block it".
-        # Existing code had: if any(keyword in text_lower for keyword in ["block", "lost", "stolen", "freeze"])
-        # So "lost" WAS enough.
-        # I will keep "lost" / "stolen" as triggers for block_card as well, to maintain existing behavior for "I lost my card".
-        
-        if any(keyword in text_lower for keyword in LOST_SYNONYMS):
-             return {
-                "intent": "action",
-                "action_type": "block_card",
-                "confidence": 0.9
-            }
-
-        # Action: Unblock Card
-        if any(keyword in text_lower for keyword in ["unblock", "unlock"]):
-            return {
-                "intent": "action",
-                "action_type": "unblock_card",
-                "confidence": 1.0
-            }
-            
-        # Action: Dispute Transaction
-        if any(keyword in text_lower for keyword in ["dispute", "wrong charge", "incorrect"]):
-            return {
-                "intent": "action",
-                "action_type": "dispute_transaction",
-                "confidence": 1.0
-            }
-            
-        # Info: Account Summary / Transactions / Rewards / Policy
-        if any(keyword in text_lower for keyword in ["balance", "bill", "due", "spend", "transactions", "fees", "charges", "rewards", "points", "forex", "markup", "interest", "period", "international"]):
-             
-             action_type = None
-             if "balance" in text_lower or "due" in text_lower or "bill" in text_lower:
-                 action_type = "get_account_summary"
-             elif "transactions" in text_lower or "spend" in text_lower:
-                 action_type = "get_recent_transactions"
-             elif ("rewards" in text_lower or "points" in text_lower):
-                 # Only map to tool if it looks like a personal query
-                 if "my" in text_lower or len(text.split()) <= 3:
-                     action_type = "get_rewards_summary"
-                 else:
-                     action_type = None # Fallback to RAG for general policy questions
-             
-             return {
-                "intent": "info",
-                "action_type": action_type,
-                "confidence": 0.9
-            }
-
-        return {
-            "intent": "ambiguous",
-            "action_type": None,
-            "confidence": 0.5
-        }
+        return self.rules.classify(text)
 
-    def _classify_with_llm(self, text: str) -> Dict[str, Any]:
+    def _classify_with_llm(self, text: str) -> Optional[Dict[str, Any]]:
         """
-        Classifies using the LLM.
+        Classifies using the LLM. Returns None if the call or parsing fails.
         """
         try:
             response_text = self.llm.generate(ROUTER_SYSTEM_PROMPT, text)
@@ -156,11 +183,45 @@ class LLMRouter:
             
             # If parsing fails or schema invalid
             print(f"LLM Router failed to parse response: {response_text}")
-            return self._fallback_response()
+            return None
             
         except Exception as e:
             print(f"LLM Router Error: {e}")
-            return self._fallback_response()
+            return None
+
+    def load_warm_cache(self, path: str) -> int:
+        """
+        Seeds the cache from a file written by save_warm_cache. Files from a
+        different router prompt or model are ignored. Returns entries loaded.
+        """
+        if not os.path.exists(path):
+            return 0
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError) as e:
+            print(f"Warning: Could not read router warm cache {path} ({e}). Falling back to an empty cache.")
+            return 0
+        if data.get("signature") != ROUTER_CACHE_SIGNATURE:
+            print(f"Warning: Router warm cache {path} was built with another prompt or model. Falling back to an empty cache.")
+            return 0
+        entries = data.get("entries", {})
+        for key, classification in entries.items():
+            self.cache.put(key, classification)
+        return len(entries)
+
+    def save_warm_cache(self, path: Optional[str] = None) -> int:
+        """Writes the live cache entries for the next startup. Returns entries saved."""
+        path = path or self.warm_cache_path
+        if not path:
+            return 0
+        entries = dict(self.cache.items())
+        data = {"signature": ROUTER_CACHE_SIGNATURE, "entries": entries}
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        atomic_write(path, lambda f: f.write(json.dumps(data, indent=2).encode("utf-8")))
+        return len(entries)
 
     def _fallback_response(self) -> Dict[str, Any]:
         """Returns a low-confidence ambiguous response."""
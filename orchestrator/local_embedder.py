@@ -0,0 +1,87 @@
+"""
+Local sentence-transformers embedding provider.
+The model is loaded once per process and shared by every EmbeddingRAG
+instance; texts are encoded in batches on CPU, with optional torch thread
+tuning and int8 dynamic quantization of the linear layers.
+"""
+import importlib.util
+import threading
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from config.embedding_settings import (
+    EMBEDDING_MODEL,
+    LOCAL_EMBEDDING_BATCH_SIZE,
+    LOCAL_EMBEDDING_THREADS,
+    LOCAL_EMBEDDING_QUANTIZE
+)
+
+# Only probed here: sentence-transformers (and torch) are imported when a model
+# is loaded, so processes using mock or Gemini embeddings never pay for them
+SENTENCE_TRANSFORMERS_AVAILABLE = importlib.util.find_spec("sentence_transformers") is not None
+
+# (model name, quantize) -> LocalEmbedder, one per process
+_EMBEDDERS: Dict[Tuple[str, str], "LocalEmbedder"] = {}
+_LOCK = threading.Lock()
+
+
+class LocalEmbedder:
+    """Batched CPU encoder around a SentenceTransformer model."""
+
+    def __init__(self, model_name: str = EMBEDDING_MODEL, batch_size: int = LOCAL_EMBEDDING_BATCH_SIZE,
+                 num_threads: int = LOCAL_EMBEDDING_THREADS, quantize: str = LOCAL_EMBEDDING_QUANTIZE):
+        self.model_name = model_name
+        self.batch_size = batch_size
+        self.quantize = quantize if quantize == "int8" else "none"
+
+        import torch
+        from sentence_transformers import SentenceTransformer
+        if num_threads > 0:
+            torch.set_num_threads(num_threads)
+        self.model = SentenceTransformer(model_name, device="cpu")
+        if self.quantize == "int8":
+            # Dynamic int8 weights for Linear layers; activations stay float
+            self.model = torch.quantization.quantize_dynamic(self.model, {torch.nn.Linear}, dtype=torch.qint8)
+
+    @property
+    def signature(self) -> str:
+        suffix = ":int8" if self.quantize == "int8" else ""
+        return f"sentence-transformers:{self.model_name}{suffix}"
+
+    def embed_texts(self, texts: List[str]) -> np.ndarray:
+        """Encodes texts into a (len(texts), dim) float32 matrix of unit-length rows."""
+        if not texts:
+            return np.zeros((0, 0), dtype=np.float32)
+        matrix = self.model.encode(
+            texts,
+            batch_size=self.batch_size,
+            convert_to_numpy=True,
+            normalize_embeddings=True,
+            show_progress_bar=False
+        )
+        return np.ascontiguousarray(matrix, dtype=np.float32)
+
+    def embed_text(self, text: str) -> np.ndarray:
+        return self.embed_texts([text])[0]
+
+
+def load_local_embedder(model_name: str = EMBEDDING_MODEL,
+                        quantize: str = LOCAL_EMBEDDING_QUANTIZE) -> Optional[LocalEmbedder]:
+    """
+    Returns the process-wide embedder for a model, loading it on first use.
+    Returns None (callers fall back to mock embeddings) if sentence-transformers
+    or the model cannot be loaded.
+    """
+    if not SENTENCE_TRANSFORMERS_AVAILABLE:
+        print("Warning: sentence-transformers is not installed. Falling back to mock embeddings.")
+        return None
+    key = (model_name, quantize)
+    with _LOCK:
+        if key not in _EMBEDDERS:
+            try:
+                _EMBEDDERS[key] = LocalEmbedder(model_name=model_name, quantize=quantize)
+            except Exception as e:
+                print(f"Warning: Could not load embedding model '{model_name}' ({e}). Falling back to mock embeddings.")
+                return None
+        return _EMBEDDERS[key]
@@ -0,0 +1,75 @@
+"""
+Bounded LRU cache with per-entry TTL and hit/miss counters.
+Shared by the RAG query-embedding cache and other hot-path lookups.
+"""
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, List, Optional, Tuple
+
+
+class TTLLRUCache:
+    """
+    Thread-safe least-recently-used cache whose entries also expire after
+    `ttl_seconds`. A `maxsize` of 0 disables caching entirely.
+    """
+
+    def __init__(self, maxsize: int = 1024, ttl_seconds: float = 3600.0,
+                 clock: Callable[[], float] = time.monotonic):
+        self.maxsize = maxsize
+        self.ttl_seconds = ttl_seconds
+        self._clock = clock
+        self._entries: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: Hashable, default: Optional[Any] = None) -> Any:
+        """Returns the cached value and marks it most recently used, or `default`."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                expires_at, value = entry
+                if expires_at > self._clock():
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return value
+                del self._entries[key]
+            self.misses += 1
+            return default
+
+    def put(self, key: Hashable, value: Any):
+        """Stores a value, evicting the least recently used entry when full."""
+        if self.maxsize <= 0:
+            return
+        with self._lock:
+            self._entries[key] = (self._clock() + self.ttl_seconds, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        """Drops all entries (counters are kept)."""
+        with self._lock:
+            self._entries.clear()
+
+    def items(self) -> List[Tuple[Hashable, Any]]:
+        """Unexpired (key, value) pairs, least recently used first."""
+        with self._lock:
+            now = self._clock()
+            return [(key, value) for key, (expires_at, value) in self._entries.items() if expires_at > now]
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def stats(self) -> Dict[str, Any]:
+        """Size and hit/miss counters, suitable for metrics endpoints."""
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._entries),
+            "maxsize": self.maxsize,
+            "ttl_seconds": self.ttl_seconds,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0
+        }
@@ -0,0 +1,90 @@
+"""
+Deterministic 'mock semantic' embedder used when real embeddings are disabled.
+The first dimensions flag a handful of policy concepts (so "international"
+lands near "forex"), the rest is low per-text noise so unrelated texts differ.
+Whole batches are embedded into one matrix: concept hits come from a single
+combined regex run once over the joined batch, and the noise is a splitmix64
+hash of (text digest, dimension) computed with numpy array arithmetic, so a
+text's vector never depends on its batch and the global `random` state is
+never touched.
+"""
+import hashlib
+import re
+from typing import List
+
+import numpy as np
+
+MOCK_EMBEDDING_DIM = 64
+NOISE_SCALE = 0.1
+
+# One keyword group per concept dimension
+CONCEPT_LEXICON = (
+    ("forex", "markup", "international", "abroad", "foreign"),               # 0: Forex / International
+    ("reward", "points", "cashback", "earn", "category", "categories"),      # 1: Rewards / Points
+    ("interest", "period", "days", "billing", "due"),                        # 2: Interest / Period
+    ("block", "lost", "stolen", "freeze"),                                   # 3: Block / Lost
+)
+_NUM_CONCEPTS = len(CONCEPT_LEXICON)
+
+# Substring semantics: one alternation over every keyword (longest first),
+# each match mapped back to its concept
+_WORD_CONCEPTS = {word: concept for concept, words in enumerate(CONCEPT_LEXICON) for word in words}
+_CONCEPT_PATTERN = re.compile("|".join(
+    re.escape(word) for word in sorted(_WORD_CONCEPTS, key=len, reverse=True)
+))
+
+# splitmix64 constants
+_GOLDEN = np.uint64(0x9E3779B97F4A7C15)
+_MIX1 = np.uint64(0xBF58476D1CE4E5B9)
+_MIX2 = np.uint64(0x94D049BB133111EB)
+
+
+def _concept_hits(texts: List[str]) -> np.ndarray:
+    """(len(texts), concepts) 0/1 matrix from one regex pass over the joined batch."""
+    hits = np.zeros((len(texts), _NUM_CONCEPTS), dtype=np.float32)
+    if not texts:
+        return hits
+    # Keywords never contain a newline, so matches can't span two texts
+    joined = "\n".join(texts).lower()
+    starts = np.cumsum([0] + [len(text) + 1 for text in texts[:-1]])
+    positions, concepts = [], []
+    for match in _CONCEPT_PATTERN.finditer(joined):
+        positions.append(match.start())
+        concepts.append(_WORD_CONCEPTS[match.group()])
+    if positions:
+        rows = np.searchsorted(starts, positions, side="right") - 1
+        hits[rows, concepts] = 1.0
+    return hits
+
+
+def _noise(texts: List[str], dims: int) -> np.ndarray:
+    """Uniform noise in [-NOISE_SCALE, NOISE_SCALE), seeded by each text's SHA-256 digest."""
+    seeds = np.array(
+        [int.from_bytes(hashlib.sha256(text.encode("utf-8")).digest()[:8], "little") for text in texts],
+        dtype=np.uint64
+    )
+    z = seeds[:, None] + np.arange(1, dims + 1, dtype=np.uint64) * _GOLDEN
+    z = (z ^ (z >> np.uint64(30))) * _MIX1
+    z = (z ^ (z >> np.uint64(27))) * _MIX2
+    z ^= z >> np.uint64(31)
+    unit = (z >> np.uint64(11)).astype(np.float64) * (1.0 / (1 << 53))
+    return ((2.0 * unit - 1.0) * NOISE_SCALE).astype(np.float32)
+
+
+def embed_texts(texts: List[str]) -> np.ndarray:
+    """
+    Embeds a batch of texts into a (len(texts), MOCK_EMBEDDING_DIM) float32
+    matrix of unit-length rows.
+    """
+    matrix = np.empty((len(texts), MOCK_EMBEDDING_DIM), dtype=np.float32)
+    matrix[:, :_NUM_CONCEPTS] = _concept_hits(texts)
+    matrix[:, _NUM_CONCEPTS:] = _noise(texts, MOCK_EMBEDDING_DIM - _NUM_CONCEPTS)
+
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return matrix / norms
+
+
+def embed_text(text: str) -> np.ndarray:
+    """Embeds a single text (same vector as its row in embed_texts)."""
+    return embed_texts([text])[0]
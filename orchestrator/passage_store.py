@@ -0,0 +1,246 @@
+"""
+Columnar passage storage for RAG shards.
+All chunk texts live in one UTF-8 buffer addressed by byte offsets; line
+numbers are int32 arrays, sources and metadata values id tables and content
+hashes raw 32-byte digests. Passages are exposed as small read-only views, and `preview` is
+derived from the text on access instead of being stored.
+"""
+import hashlib
+from collections.abc import Mapping
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+import numpy as np
+
+PREVIEW_CHARS = 120
+
+PASSAGE_FIELDS = ("chunk_id", "text", "source", "line_no", "line_end", "preview", "content_hash", "metadata")
+
+
+def content_hash(text: str) -> str:
+    """Stable identifier of a chunk's content, used to reuse vectors across rebuilds."""
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+class Passage(Mapping):
+    """Read-only view of one row of a PassageStore, keyed like the old passage dicts."""
+
+    __slots__ = ("store", "row")
+
+    def __init__(self, store: "PassageStore", row: int):
+        self.store = store
+        self.row = row
+
+    def __getitem__(self, key: str) -> Any:
+        store, row = self.store, self.row
+        if key == "text":
+            return store.text(row)
+        if key == "chunk_id":
+            return row
+        if key == "source":
+            return store.source(row)
+        if key == "line_no":
+            return int(store.line_no[row])
+        if key == "line_end":
+            return int(store.line_end[row])
+        if key == "preview":
+            return store.text(row)[:PREVIEW_CHARS]
+        if key == "content_hash":
+            return store.content_hash(row)
+        if key == "metadata":
+            return store.metadata(row)
+        raise KeyError(key)
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(PASSAGE_FIELDS)
+
+    def __len__(self) -> int:
+        return len(PASSAGE_FIELDS)
+
+    def __eq__(self, other: Any) -> bool:
+        if isinstance(other, Passage):
+            return self.store is other.store and self.row == other.row
+        return Mapping.__eq__(self, other)
+
+    __hash__ = None
+
+    def __repr__(self) -> str:
+        return f"Passage({dict(self)!r})"
+
+
+class PassageStore:
+    """
+    Parallel arrays describing the passages of a shard; row i is chunk i.
+    """
+
+    __slots__ = ("buffer", "offsets", "line_no", "line_end", "sources", "source_ids", "hashes",
+                 "metadata_fields", "metadata_values", "metadata_ids")
+
+    def __init__(self, buffer: bytes = b"", offsets: Optional[np.ndarray] = None,
+                 line_no: Optional[np.ndarray] = None, line_end: Optional[np.ndarray] = None,
+                 sources: Optional[List[str]] = None, source_ids: Optional[np.ndarray] = None,
+                 hashes: Optional[np.ndarray] = None, metadata_fields: Optional[List[str]] = None,
+                 metadata_values: Optional[List[List[str]]] = None, metadata_ids: Optional[np.ndarray] = None):
+        # UTF-8 text of all passages (bytes, or a memoryview over a loaded index file)
+        self.buffer = buffer
+        self.offsets = offsets if offsets is not None else np.zeros(1, dtype=np.int64)
+        self.line_no = line_no if line_no is not None else np.zeros(0, dtype=np.int32)
+        self.line_end = line_end if line_end is not None else np.zeros(0, dtype=np.int32)
+        self.sources = sources or []
+        self.source_ids = source_ids if source_ids is not None else np.zeros(0, dtype=np.int32)
+        # Raw SHA-256 digests, one 32-byte row per passage
+        self.hashes = hashes if hashes is not None else np.zeros((0, 32), dtype=np.uint8)
+        # Metadata: field names, per-field value tables and an (n, fields) int32
+        # matrix of value ids (-1 where a passage has no value for the field)
+        self.metadata_fields = metadata_fields or []
+        self.metadata_values = metadata_values or [[] for _ in self.metadata_fields]
+        self.metadata_ids = (
+            metadata_ids if metadata_ids is not None
+            else np.full((len(self.offsets) - 1, len(self.metadata_fields)), -1, dtype=np.int32)
+        )
+
+    @classmethod
+    def from_records(cls, records: Iterable[Dict[str, Any]]) -> "PassageStore":
+        """
+        Packs passage dicts (text, source, line_no, line_end, content_hash and
+        optional metadata) into columns. Records written before content hashes
+        existed get theirs computed from the text.
+        """
+        texts, line_no, line_end, source_ids, hashes = [], [], [], [], []
+        source_table: Dict[str, int] = {}
+        # field -> {value -> value id}
+        value_tables: Dict[str, Dict[str, int]] = {}
+        row_metadata: List[Dict[str, Any]] = []
+        for record in records:
+            texts.append(record["text"].encode("utf-8"))
+            line_no.append(record["line_no"])
+            line_end.append(record.get("line_end", record["line_no"]))
+            source_ids.append(source_table.setdefault(record["source"], len(source_table)))
+            hashes.append(record.get("content_hash") or content_hash(record["text"]))
+            metadata = record.get("metadata") or {}
+            for field, value in metadata.items():
+                values = value_tables.setdefault(field, {})
+                values.setdefault(str(value), len(values))
+            row_metadata.append(metadata)
+
+        metadata_fields = list(value_tables)
+        metadata_ids = np.full((len(texts), len(metadata_fields)), -1, dtype=np.int32)
+        for row, metadata in enumerate(row_metadata):
+            for column, field in enumerate(metadata_fields):
+                if field in metadata:
+                    metadata_ids[row, column] = value_tables[field][str(metadata[field])]
+
+        offsets = np.zeros(len(texts) + 1, dtype=np.int64)
+        np.cumsum([len(text) for text in texts], out=offsets[1:])
+        return cls(
+            buffer=b"".join(texts),
+            offsets=offsets,
+            line_no=np.asarray(line_no, dtype=np.int32),
+            line_end=np.asarray(line_end, dtype=np.int32),
+            sources=list(source_table),
+            source_ids=np.asarray(source_ids, dtype=np.int32),
+            hashes=_digests(hashes),
+            metadata_fields=metadata_fields,
+            metadata_values=[list(value_tables[field]) for field in metadata_fields],
+            metadata_ids=metadata_ids
+        )
+
+    @classmethod
+    def from_dict(cls, data: Any) -> "PassageStore":
+        """Restores the passages of a legacy metadata.json: columns or a list of passage dicts."""
+        if isinstance(data, list):
+            return cls.from_records(data)
+        return cls(
+            buffer=data["buffer"].encode("utf-8"),
+            offsets=np.asarray(data["offsets"], dtype=np.int64),
+            line_no=np.asarray(data["line_no"], dtype=np.int32),
+            line_end=np.asarray(data["line_end"], dtype=np.int32),
+            sources=list(data["sources"]),
+            source_ids=np.asarray(data["source_ids"], dtype=np.int32),
+            hashes=_digests(data["content_hashes"]),
+            metadata_fields=list(data.get("metadata_fields", [])),
+            metadata_values=[list(values) for values in data.get("metadata_values", [])],
+            metadata_ids=(
+                np.asarray(data["metadata_ids"], dtype=np.int32).reshape(len(data["offsets"]) - 1, -1)
+                if data.get("metadata_fields") else None
+            )
+        )
+
+    def to_arrays(self) -> Tuple[Dict[str, Any], Dict[str, np.ndarray]]:
+        """(meta, arrays) form for the binary index format."""
+        arrays = {
+            "buffer": np.frombuffer(self.buffer, dtype=np.uint8),
+            "offsets": self.offsets,
+            "line_no": self.line_no,
+            "line_end": self.line_end,
+            "source_ids": self.source_ids,
+            "hashes": self.hashes,
+            "metadata_ids": self.metadata_ids
+        }
+        meta = {
+            "sources": self.sources,
+            "metadata_fields": self.metadata_fields,
+            "metadata_values": self.metadata_values
+        }
+        return meta, arrays
+
+    @classmethod
+    def from_arrays(cls, meta: Dict[str, Any], arrays: Dict[str, np.ndarray]) -> "PassageStore":
+        return cls(
+            buffer=arrays["buffer"].data,
+            offsets=arrays["offsets"],
+            line_no=arrays["line_no"],
+            line_end=arrays["line_end"],
+            sources=list(meta["sources"]),
+            source_ids=arrays["source_ids"],
+            hashes=arrays["hashes"],
+            # Absent in index files written before metadata support
+            metadata_fields=list(meta.get("metadata_fields", [])),
+            metadata_values=[list(values) for values in meta.get("metadata_values", [])],
+            metadata_ids=arrays.get("metadata_ids")
+        )
+
+    def __len__(self) -> int:
+        return len(self.offsets) - 1
+
+    def __getitem__(self, row: int) -> Passage:
+        if row < 0:
+            row += len(self)
+        if not 0 <= row < len(self):
+            raise IndexError(row)
+        return Passage(self, row)
+
+    def __iter__(self) -> Iterator[Passage]:
+        for row in range(len(self)):
+            yield Passage(self, row)
+
+    def text(self, row: int) -> str:
+        # Decoded on access, so loading an index never decodes the whole corpus
+        return str(self.buffer[self.offsets[row]:self.offsets[row + 1]], "utf-8")
+
+    def texts(self) -> Iterator[str]:
+        buffer, offsets = self.buffer, self.offsets.tolist()
+        for row in range(len(self)):
+            yield str(buffer[offsets[row]:offsets[row + 1]], "utf-8")
+
+    def source(self, row: int) -> str:
+        return self.sources[self.source_ids[row]]
+
+    def metadata(self, row: int) -> Dict[str, str]:
+        ids = self.metadata_ids[row]
+        return {
+            field: self.metadata_values[column][ids[column]]
+            for column, field in enumerate(self.metadata_fields)
+            if ids[column] >= 0
+        }
+
+    def content_hash(self, row: int) -> str:
+        return self.hashes[row].tobytes().hex()
+
+    def content_hashes(self) -> List[str]:
+        packed = self.hashes.tobytes().hex()
+        return [packed[i:i + 64] for i in range(0, len(packed), 64)]
+
+
+def _digests(hex_hashes: List[str]) -> np.ndarray:
+    """Packs hex SHA-256 strings into an (n, 32) uint8 array."""
+    return np.frombuffer(bytes.fromhex("".join(hex_hashes)), dtype=np.uint8).reshape(len(hex_hashes), 32).copy()
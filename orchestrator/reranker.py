@@ -0,0 +1,110 @@
+"""
+Second-stage rerankers for RAG search results.
+A reranker rescores the first-stage candidates of a query within a per-query
+time budget; if the budget runs out before every candidate is scored, the
+caller keeps the first-stage order.
+"""
+import importlib.util
+import time
+from typing import List, Optional, Sequence
+
+from config.embedding_settings import (
+    RERANKER_BACKEND,
+    RERANKER_MODEL,
+    RERANKER_BATCH_SIZE
+)
+from orchestrator.bm25 import tokenize
+from orchestrator.search_result import SearchResult
+
+# Only probed here; CrossEncoder (and torch) is imported when the reranker is created
+CROSS_ENCODER_AVAILABLE = importlib.util.find_spec("sentence_transformers") is not None
+
+SUPPORTED_RERANKERS = ("lexical", "cross-encoder")
+
+# Words that carry no policy meaning in user questions
+STOPWORDS = frozenset((
+    "a", "an", "and", "are", "can", "do", "does", "for", "how", "i", "if", "in", "is", "it",
+    "my", "of", "on", "or", "the", "to", "what", "when", "which", "with", "you", "your"
+))
+
+
+class Reranker:
+    """Interface for rerankers: score (query, passage) pairs in batches."""
+    backend = "base"
+
+    def __init__(self, batch_size: int = RERANKER_BATCH_SIZE):
+        self.batch_size = max(1, batch_size)
+
+    def score_batch(self, query: str, texts: Sequence[str]) -> List[float]:
+        raise NotImplementedError
+
+    def rerank(self, query: str, candidates: List[SearchResult], top_k: int,
+               budget_seconds: float) -> Optional[List[SearchResult]]:
+        """
+        Returns the top_k candidates ordered by rerank score (each carrying a
+        `rerank_score`), or None if the budget was exceeded.
+        """
+        deadline = time.perf_counter() + budget_seconds
+        scores: List[float] = []
+        for start in range(0, len(candidates), self.batch_size):
+            if time.perf_counter() > deadline:
+                return None
+            batch = candidates[start:start + self.batch_size]
+            scores.extend(self.score_batch(query, [c["text"] for c in batch]))
+        if time.perf_counter() > deadline:
+            return None
+
+        # Stable sort keeps the first-stage order between equal rerank scores
+        order = sorted(range(len(candidates)), key=lambda i: scores[i], reverse=True)[:top_k]
+        return [
+            SearchResult(candidates[i].passage, **candidates[i].fields, rerank_score=float(scores[i]))
+            for i in order
+        ]
+
+
+class LexicalOverlapReranker(Reranker):
+    """
+    Fraction of the query's content words present in the passage. Cheap and
+    dependency-free; mainly corrects dense rankings that ignore exact terms.
+    """
+    backend = "lexical"
+
+    def score_batch(self, query: str, texts: Sequence[str]) -> List[float]:
+        query_terms = {t for t in tokenize(query) if t not in STOPWORDS} or set(tokenize(query))
+        if not query_terms:
+            return [0.0] * len(texts)
+        return [len(query_terms & set(tokenize(text))) / len(query_terms) for text in texts]
+
+
+class CrossEncoderReranker(Reranker):
+    """Local sentence-transformers cross-encoder, scoring each (query, passage) pair jointly."""
+    backend = "cross-encoder"
+
+    def __init__(self, model_name: str = RERANKER_MODEL, batch_size: int = RERANKER_BATCH_SIZE):
+        super().__init__(batch_size)
+        from sentence_transformers import CrossEncoder
+        self.model = CrossEncoder(model_name)
+
+    def score_batch(self, query: str, texts: Sequence[str]) -> List[float]:
+        scores = self.model.predict([(query, text) for text in texts], batch_size=self.batch_size)
+        return [float(s) for s in scores]
+
+
+def create_reranker(backend: str = RERANKER_BACKEND) -> Optional[Reranker]:
+    """
+    Returns the configured reranker. The cross-encoder falls back to the
+    lexical reranker if sentence-transformers or the model is unavailable.
+    """
+    if backend == "lexical":
+        return LexicalOverlapReranker()
+    if backend == "cross-encoder":
+        if not CROSS_ENCODER_AVAILABLE:
+            print("Warning: sentence-transformers is not installed. Falling back to the lexical reranker.")
+            return LexicalOverlapReranker()
+        try:
+            return CrossEncoderReranker()
+        except Exception as e:
+            print(f"Warning: Could not load cross-encoder '{RERANKER_MODEL}' ({e}). Falling back to the lexical reranker.")
+            return LexicalOverlapReranker()
+    print(f"Warning: Unknown reranker '{backend}'. Falling back to first-stage ranking.")
+    return None
@@ -0,0 +1,172 @@
+"""
+Declarative intent rules for the mock-mode router.
+Rules live in a YAML file (concepts with their synonyms, plus prioritized
+rules with negations) and are compiled into a CompiledRules object: a
+KeywordMatcher and a priority-ordered rule list. scripts/compile_router_rules.py
+writes the validated, priority-sorted rules as plain JSON, so startup skips
+YAML parsing and validation and never executes code from the data directory.
+"""
+import hashlib
+import json
+import os
+from typing import Any, Dict, FrozenSet, List, Optional, Tuple
+
+import yaml
+
+from config.llm_settings import ROUTER_RULES_PATH, ROUTER_RULES_COMPILED_PATH
+from orchestrator.index_format import atomic_write
+from orchestrator.keyword_matcher import KeywordMatcher, normalize_words
+
+# Bump when the CompiledRules layout changes
+COMPILED_FORMAT_VERSION = 1
+
+RESULT_FIELDS = ("intent", "action_type", "confidence")
+
+# (name, all, any, none, max_words, result)
+Rule = Tuple[str, FrozenSet[str], FrozenSet[str], FrozenSet[str], Optional[int], Dict[str, Any]]
+
+
+class CompiledRules:
+    """Keyword matcher plus rules in evaluation order; classify() is one pass over the words."""
+
+    def __init__(self, matcher: KeywordMatcher, rules: List[Rule], default: Dict[str, Any], source_hash: str):
+        self.format_version = COMPILED_FORMAT_VERSION
+        self.matcher = matcher
+        self.rules = rules
+        self.default = default
+        # SHA-256 of the YAML source, used to detect a stale artifact
+        self.source_hash = source_hash
+
+    def classify(self, text: str) -> Dict[str, Any]:
+        return dict(self._decide(text)[2])
+
+    def explain(self, text: str) -> Dict[str, Any]:
+        """Matched concepts and the deciding rule name (None for the default), for debugging rules."""
+        concepts, name, result = self._decide(text)
+        return {"concepts": sorted(concepts), "rule": name, "result": dict(result)}
+
+    def _decide(self, text: str) -> Tuple[FrozenSet[str], Optional[str], Dict[str, Any]]:
+        words = normalize_words(text)
+        concepts = self.matcher.match_words(words)
+        for name, required, any_of, excluded, max_words, result in self.rules:
+            if (
+                required <= concepts
+                and (not any_of or not any_of.isdisjoint(concepts))
+                and excluded.isdisjoint(concepts)
+                and (max_words is None or len(words) <= max_words)
+            ):
+                return concepts, name, result
+        return concepts, None, self.default
+
+
+    def to_dict(self) -> Dict[str, Any]:
+        """JSON form of the compiled rules (rules already in evaluation order)."""
+        concepts: Dict[str, List[str]] = {}
+        for words, concept in self.matcher.phrases.items():
+            concepts.setdefault(concept, []).append(" ".join(words))
+        return {
+            "format_version": self.format_version,
+            "source_hash": self.source_hash,
+            "concepts": concepts,
+            "rules": [
+                {"name": name, "all": sorted(required), "any": sorted(any_of), "none": sorted(excluded),
+                 "max_words": max_words, "result": result}
+                for name, required, any_of, excluded, max_words, result in self.rules
+            ],
+            "default": self.default
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "CompiledRules":
+        if data.get("format_version") != COMPILED_FORMAT_VERSION:
+            raise ValueError(f"compiled format {data.get('format_version')}, expected {COMPILED_FORMAT_VERSION}")
+        rules = [
+            (rule["name"], frozenset(rule["all"]), frozenset(rule["any"]), frozenset(rule["none"]),
+             rule["max_words"], rule["result"])
+            for rule in data["rules"]
+        ]
+        return cls(KeywordMatcher(data["concepts"]), rules, data["default"], data["source_hash"])
+
+
+def file_hash(path: str) -> str:
+    with open(path, "rb") as f:
+        return hashlib.sha256(f.read()).hexdigest()
+
+
+def compile_rules(source: Dict[str, Any], source_hash: str = "") -> CompiledRules:
+    """
+    Validates a parsed rules document and compiles it. Raises ValueError
+    naming the offending rule or concept.
+    """
+    concepts = source.get("concepts") or {}
+    for concept, phrases in concepts.items():
+        if not isinstance(phrases, list) or not all(isinstance(p, str) for p in phrases):
+            # YAML turns bare yes/no/on/off into booleans
+            raise ValueError(f"Concept '{concept}' must be a list of strings (quote words like 'no' or 'on')")
+    matcher = KeywordMatcher(concepts)
+
+    rules = []
+    for position, rule in enumerate(source.get("rules") or []):
+        name = rule.get("name", f"rule {position + 1}")
+        conditions = {}
+        for key in ("all", "any", "none"):
+            names = rule.get(key) or []
+            unknown = [concept for concept in names if concept not in concepts]
+            if unknown:
+                raise ValueError(f"Rule '{name}' refers to unknown concepts {unknown}")
+            conditions[key] = frozenset(names)
+        if not conditions["all"] and not conditions["any"]:
+            raise ValueError(f"Rule '{name}' needs an 'all' or 'any' condition")
+        rules.append((
+            -rule.get("priority", 0), position,
+            (name, conditions["all"], conditions["any"], conditions["none"], rule.get("max_words"),
+             _result(rule.get("result"), f"rule '{name}'"))
+        ))
+    # Highest priority first; equal priorities keep file order
+    rules.sort(key=lambda entry: entry[:2])
+
+    default = _result(source.get("default") or {"intent": "ambiguous", "action_type": None, "confidence": 0.5}, "default")
+    return CompiledRules(matcher, [entry[2] for entry in rules], default, source_hash)
+
+
+def _result(result: Any, where: str) -> Dict[str, Any]:
+    if not isinstance(result, dict) or any(field not in result for field in RESULT_FIELDS):
+        raise ValueError(f"The result of {where} needs the fields {list(RESULT_FIELDS)}")
+    return {field: result[field] for field in RESULT_FIELDS}
+
+
+def compile_rules_file(rules_path: str = ROUTER_RULES_PATH) -> CompiledRules:
+    with open(rules_path, "r", encoding="utf-8") as f:
+        source = yaml.safe_load(f) or {}
+    return compile_rules(source, file_hash(rules_path))
+
+
+def save_compiled_rules(compiled: CompiledRules, compiled_path: str = ROUTER_RULES_COMPILED_PATH):
+    data = json.dumps(compiled.to_dict(), indent=1, sort_keys=True)
+    atomic_write(compiled_path, lambda f: f.write(data.encode("utf-8")))
+
+
+def load_compiled_rules(rules_path: str = ROUTER_RULES_PATH,
+                        compiled_path: str = ROUTER_RULES_COMPILED_PATH) -> CompiledRules:
+    """
+    Loads the compiled artifact if it was built from the current rules file;
+    otherwise compiles the YAML in-process. Without the YAML file (e.g. a
+    slim deployment) the artifact is used as is.
+    """
+    if not os.path.exists(rules_path):
+        print(f"Warning: {rules_path} not found. Falling back to {compiled_path} without a staleness check.")
+        with open(compiled_path, "r", encoding="utf-8") as f:
+            return CompiledRules.from_dict(json.load(f))
+
+    try:
+        source_hash = file_hash(rules_path)
+        with open(compiled_path, "r", encoding="utf-8") as f:
+            compiled = CompiledRules.from_dict(json.load(f))
+        if compiled.source_hash == source_hash:
+            return compiled
+        print(f"Warning: {compiled_path} is stale. Falling back to compiling {rules_path} at startup.")
+    except FileNotFoundError:
+        print(f"Warning: {compiled_path} not found. Falling back to compiling {rules_path} at startup.")
+    except Exception as e:
+        print(f"Warning: Could not load {compiled_path} ({e}). Falling back to compiling {rules_path} at startup.")
+    return compile_rules_file(rules_path)
@@ -0,0 +1,40 @@
+"""
+Lightweight search hits.
+A SearchResult exposes the stored passage together with the retrieval fields
+of one hit (score, fallback, ...) without copying the passage dict.
+"""
+from collections.abc import Mapping
+from typing import Any, Dict, Iterator
+
+
+class SearchResult(Mapping):
+    """
+    Read-only mapping over a passage and per-hit fields; the hit fields take
+    precedence. Use to_dict() where a plain (e.g. JSON-serializable) dict is needed.
+    """
+
+    __slots__ = ("passage", "fields")
+
+    def __init__(self, passage: Dict[str, Any], **fields: Any):
+        self.passage = passage
+        self.fields = fields
+
+    def __getitem__(self, key: str) -> Any:
+        if key in self.fields:
+            return self.fields[key]
+        return self.passage[key]
+
+    def __iter__(self) -> Iterator[str]:
+        yield from self.passage
+        for key in self.fields:
+            if key not in self.passage:
+                yield key
+
+    def __len__(self) -> int:
+        return len(self.passage) + sum(1 for key in self.fields if key not in self.passage)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {**self.passage, **self.fields}
+
+    def __repr__(self) -> str:
+        return f"SearchResult({self.to_dict()!r})"
@@ -0,0 +1,92 @@
+"""
+Semantic answer cache for RAG responses.
+Answers are stored per (index id, retrieved chunk set) together with the
+query embedding that produced them; a later question that retrieves the same
+chunks and whose embedding is within a cosine threshold reuses the answer
+instead of calling the LLM again.
+"""
+import threading
+import time
+from typing import Any, Callable, Dict, FrozenSet, Hashable, Iterable, Optional
+
+import numpy as np
+
+from orchestrator.lru_cache import TTLLRUCache
+
+# Answers kept per retrieved chunk set (most recent first)
+MAX_ANSWERS_PER_CHUNK_SET = 8
+
+
+class SemanticAnswerCache:
+    """
+    LRU/TTL cache of final answers keyed on the retrieved chunk ids, matched by
+    cosine similarity of normalized query embeddings. Entries built against a
+    different index id are dropped when the index changes.
+    """
+
+    def __init__(self, maxsize: int = 512, ttl_seconds: float = 3600.0, min_similarity: float = 0.95,
+                 clock: Callable[[], float] = time.monotonic):
+        self.min_similarity = min_similarity
+        self._buckets = TTLLRUCache(maxsize=maxsize, ttl_seconds=ttl_seconds, clock=clock)
+        self._index_id = ""
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def chunk_key(chunk_ids: Iterable[Hashable]) -> FrozenSet[Hashable]:
+        return frozenset(chunk_ids)
+
+    def get(self, index_id: str, query_embedding: np.ndarray, chunk_ids: Iterable[Hashable]) -> Optional[str]:
+        """Returns the cached answer for a similar query over the same chunks, or None."""
+        self._check_index(index_id)
+        bucket = self._buckets.get((index_id, self.chunk_key(chunk_ids)))
+        answer = None
+        if bucket:
+            vectors, answers = bucket
+            similarities = vectors @ query_embedding
+            best = int(np.argmax(similarities))
+            if similarities[best] >= self.min_similarity:
+                answer = answers[best]
+        with self._lock:
+            if answer is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        return answer
+
+    def put(self, index_id: str, query_embedding: np.ndarray, chunk_ids: Iterable[Hashable], answer: str):
+        """Stores an answer for the query embedding and retrieved chunk set."""
+        self._check_index(index_id)
+        key = (index_id, self.chunk_key(chunk_ids))
+        vector = np.asarray(query_embedding, dtype=np.float32)[np.newaxis, :]
+        bucket = self._buckets.get(key)
+        if bucket and bucket[0].shape[1] == vector.shape[1]:
+            vectors = np.vstack([vector, bucket[0]])[:MAX_ANSWERS_PER_CHUNK_SET]
+            answers = ([answer] + bucket[1])[:MAX_ANSWERS_PER_CHUNK_SET]
+        else:
+            vectors, answers = vector, [answer]
+        self._buckets.put(key, (vectors, answers))
+
+    def _check_index(self, index_id: str):
+        """Invalidates every entry once the RAG index has been rebuilt or swapped."""
+        with self._lock:
+            if index_id != self._index_id:
+                self._buckets.clear()
+                self._index_id = index_id
+
+    def clear(self):
+        self._buckets.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        """Chunk-set occupancy and semantic hit/miss counters."""
+        lookups = self.hits + self.misses
+        return {
+            "chunk_sets": len(self._buckets),
+            "maxsize": self._buckets.maxsize,
+            "ttl_seconds": self._buckets.ttl_seconds,
+            "min_similarity": self.min_similarity,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0
+        }
@@ -0,0 +1,123 @@
+"""
+Benchmark ANN backends against exact search: recall@k versus per-query latency.
+Usage:
+    python scripts/benchmark_ann.py --passages 100000 --dim 768
+    python scripts/benchmark_ann.py --index-dir data/rag_index   # use a built index
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+# Add project root to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from orchestrator.ann_index import IVFIndex, HNSWIndex, HNSWLIB_AVAILABLE, top_k_indices
+from orchestrator.embedding_rag import read_manifest
+from orchestrator.index_format import read_index
+from orchestrator.index_shard import INDEX_FILE
+from config.embedding_settings import EMBEDDINGS_FILE
+
+
+def synthetic_corpus(n: int, dim: int, clusters: int, seed: int = 0) -> np.ndarray:
+    """Clustered unit vectors, a rough stand-in for topical policy passages."""
+    rng = np.random.default_rng(seed)
+    centers = rng.standard_normal((clusters, dim)).astype(np.float32)
+    matrix = centers[rng.integers(0, clusters, size=n)] + 0.6 * rng.standard_normal((n, dim)).astype(np.float32)
+    return np.ascontiguousarray(matrix / np.linalg.norm(matrix, axis=1, keepdims=True))
+
+
+def load_index_embeddings(index_dir: str) -> np.ndarray:
+    """Concatenates the embedding matrices of every shard listed in a built index's manifest."""
+    manifest = read_manifest(index_dir)
+    if manifest is None:
+        raise FileNotFoundError(f"No manifest.json in {index_dir}; build it with scripts/build_rag_index.py")
+    matrices = []
+    for entry in manifest.get("shards", []):
+        shard_dir = os.path.join(index_dir, entry["dir"])
+        meta, _ = read_index(os.path.join(shard_dir, INDEX_FILE))
+        info = meta.get("embeddings") or {}
+        path = os.path.join(shard_dir, info.get("file", EMBEDDINGS_FILE))
+        if not os.path.exists(path):
+            print(f"Skipping shard {entry['name']}: no persisted embeddings (rebuild with --rebuild).")
+            continue
+        matrices.append(np.load(path, mmap_mode="r"))
+    if not matrices:
+        raise FileNotFoundError(f"No shard embeddings found under {index_dir}")
+    return matrices[0] if len(matrices) == 1 else np.concatenate(matrices)
+
+
+def make_queries(matrix: np.ndarray, count: int, seed: int = 1) -> np.ndarray:
+    """Perturbed copies of random passages, so every query has true neighbours."""
+    rng = np.random.default_rng(seed)
+    queries = matrix[rng.integers(0, matrix.shape[0], size=count)]
+    queries = queries + 0.1 * rng.standard_normal(queries.shape).astype(np.float32)
+    return queries / np.linalg.norm(queries, axis=1, keepdims=True)
+
+
+def run(name: str, search_fn, queries: np.ndarray, truth, k: int):
+    latencies = []
+    hits = 0
+    for query, expected in zip(queries, truth):
+        start = time.perf_counter()
+        ids, _ = search_fn(query, k)
+        latencies.append((time.perf_counter() - start) * 1000)
+        hits += len(set(ids.tolist()) & expected)
+    latencies = np.array(latencies)
+    recall = hits / (len(truth) * k)
+    print(f"{name:<24} recall@{k}={recall:.3f}  p50={np.percentile(latencies, 50):.3f}ms  "
+          f"p95={np.percentile(latencies, 95):.3f}ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="ANN recall/latency benchmark")
+    parser.add_argument("--index-dir", help="Benchmark the embeddings of a built index instead of synthetic data")
+    parser.add_argument("--passages", type=int, default=100000)
+    parser.add_argument("--dim", type=int, default=768)
+    parser.add_argument("--clusters", type=int, default=200)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--k", type=int, default=10)
+    args = parser.parse_args()
+
+    if args.index_dir:
+        matrix = load_index_embeddings(args.index_dir)
+    else:
+        matrix = synthetic_corpus(args.passages, args.dim, args.clusters)
+    queries = make_queries(matrix, args.queries)
+    k = min(args.k, matrix.shape[0])
+    print(f"Corpus: {matrix.shape[0]} passages x {matrix.shape[1]} dims, {len(queries)} queries")
+
+    def exact(query, top_k):
+        scores = matrix @ query
+        ids = top_k_indices(scores, top_k)
+        return ids, scores[ids]
+
+    truth = [set(exact(q, k)[0].tolist()) for q in queries]
+    run("exact", exact, queries, truth, k)
+
+    start = time.perf_counter()
+    ivf = IVFIndex()
+    ivf.build(matrix)
+    print(f"IVF build: {time.perf_counter() - start:.1f}s ({ivf.centroids.shape[0]} lists)")
+    for nprobe in (1, 2, 4, 8, 16, 32, 64):
+        if nprobe > ivf.centroids.shape[0]:
+            break
+        ivf.nprobe = nprobe
+        run(f"ivf nprobe={nprobe}", ivf.search, queries, truth, k)
+
+    if HNSWLIB_AVAILABLE:
+        start = time.perf_counter()
+        hnsw = HNSWIndex()
+        hnsw.build(matrix)
+        print(f"HNSW build: {time.perf_counter() - start:.1f}s")
+        for ef in (16, 32, 64, 128, 256):
+            hnsw.ef_search = ef
+            run(f"hnsw ef={ef}", hnsw.search, queries, truth, k)
+    else:
+        print("hnswlib not installed, skipping HNSW.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+"""
+Benchmark the rerank stage: answer quality (hit@1, MRR) versus per-query latency.
+Usage:
+    python scripts/benchmark_reranker.py                          # built-in questions over data/knowledge_base.txt
+    python scripts/benchmark_reranker.py --backend cross-encoder
+    python scripts/benchmark_reranker.py --kb data/kb_docs --eval eval.jsonl   # {"query": ..., "expected": ...} per line
+"""
+import argparse
+import json
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+# Add project root to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from orchestrator.embedding_rag import EmbeddingRAG
+from orchestrator.reranker import SUPPORTED_RERANKERS, create_reranker
+from config.embedding_settings import RERANKER_BUDGET_MS
+
+# Questions over data/knowledge_base.txt and a substring of the passage that answers each
+DEFAULT_EVAL = [
+    ("Which card is made of metal?", "premium metal credit card"),
+    ("How many reward points do I get on my top categories?", "5x reward points"),
+    ("What is the markup on international transactions?", "Forex markup"),
+    ("My card was stolen, what should I do?", "block your card"),
+    ("How do I dispute a charge on a transaction?", "dispute a transaction"),
+    ("Is there an annual fee?", "no annual fees"),
+    ("What are the late payment charges?", "Late payment charges"),
+    ("Can I redeem my points for cash?", "redeem points"),
+    ("What is the support phone number?", "Contact support"),
+    ("How long is the interest-free period?", "interest-free period"),
+]
+
+
+def split_lines_kb(kb_path: str, out_dir: str):
+    """One document per KB line, so every fact is its own passage to rank."""
+    with open(kb_path, "r", encoding="utf-8") as f:
+        lines = [line.strip() for line in f if line.strip()]
+    for i, line in enumerate(lines):
+        with open(os.path.join(out_dir, f"line_{i:04d}.txt"), "w", encoding="utf-8") as f:
+            f.write(line + "\n")
+
+
+def load_eval(path: str):
+    with open(path, "r", encoding="utf-8") as f:
+        return [(row["query"], row["expected"]) for row in map(json.loads, f) if row]
+
+
+def evaluate(rag: EmbeddingRAG, eval_set, top_k: int, repeats: int):
+    hits, reciprocal_ranks, latencies = 0, [], []
+    for query, expected in eval_set:
+        for _ in range(repeats):
+            start = time.perf_counter()
+            results = rag.search(query, top_k=top_k)
+            latencies.append((time.perf_counter() - start) * 1000)
+        rank = next((i + 1 for i, r in enumerate(results) if expected.lower() in r["text"].lower()), None)
+        hits += rank == 1
+        reciprocal_ranks.append(1.0 / rank if rank else 0.0)
+    return hits / len(eval_set), float(np.mean(reciprocal_ranks)), np.array(latencies)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Reranker quality/latency benchmark")
+    parser.add_argument("--kb", default=os.path.join("data", "knowledge_base.txt"))
+    parser.add_argument("--eval", help="JSONL file of {\"query\", \"expected\"} rows (default: built-in set)")
+    parser.add_argument("--backend", default="lexical", choices=SUPPORTED_RERANKERS)
+    parser.add_argument("--top-k", type=int, default=3)
+    parser.add_argument("--repeats", type=int, default=20)
+    args = parser.parse_args()
+
+    eval_set = load_eval(args.eval) if args.eval else DEFAULT_EVAL
+    work_dir = tempfile.mkdtemp(prefix="rerank_bench_")
+    try:
+        kb_path = args.kb
+        if not args.eval and os.path.isfile(kb_path):
+            kb_path = os.path.join(work_dir, "kb")
+            os.makedirs(kb_path)
+            split_lines_kb(args.kb, kb_path)
+        index_dir = os.path.join(work_dir, "index")
+
+        baseline = EmbeddingRAG(kb_path=kb_path, index_dir=index_dir)
+        baseline.build_index(workers=1)
+        reranked = EmbeddingRAG(kb_path=kb_path, index_dir=index_dir, reranker=create_reranker(args.backend))
+
+        print(f"{len(eval_set)} queries, top_k={args.top_k}, budget={RERANKER_BUDGET_MS:.0f}ms")
+        for name, rag in (("first stage", baseline), (f"+ {args.backend} rerank", reranked)):
+            hit_at_1, mrr, latencies = evaluate(rag, eval_set, args.top_k, args.repeats)
+            print(f"{name:<24} hit@1={hit_at_1:.2f}  MRR@{args.top_k}={mrr:.3f}  "
+                  f"p50={np.percentile(latencies, 50):.3f}ms  p95={np.percentile(latencies, 95):.3f}ms")
+        print(f"Reranker: {reranked.cache_stats()['reranker']}")
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
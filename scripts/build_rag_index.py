@@ -1,6 +1,7 @@
 """
 Script to build the RAG index.
-Usage: python scripts/build_rag_index.py --kb data/knowledge_base.txt --out data/rag_index
+Usage: python scripts/build_rag_index.py --kb data/knowledge_base.txt --out data/rag_index [--ann-backend ivf]
+       python scripts/build_rag_index.py --kb data/kb_docs --rebuild --source cards/fees.md [--workers 8]
 """
 import argparse
 import os
@@ -10,19 +11,32 @@ import sys
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from orchestrator.embedding_rag import EmbeddingRAG
+from orchestrator.ann_index import SUPPORTED_BACKENDS
+from config.embedding_settings import RAG_ANN_BACKEND, RAG_BUILD_WORKERS, RAG_INDEX_DIR, RAG_KB_PATH
 
 def main():
     parser = argparse.ArgumentParser(description="Build RAG Index")
-    parser.add_argument("--kb", default="data/knowledge_base.txt", help="Path to knowledge base file")
-    parser.add_argument("--out", default="data/rag_index", help="Output directory for index")
+    parser.add_argument("--kb", default=RAG_KB_PATH, help="Knowledge base file or directory of .txt/.md/.json documents")
+    parser.add_argument("--out", default=RAG_INDEX_DIR, help="Output directory for index")
     parser.add_argument("--rebuild", action="store_true", help="Force rebuild")
+    parser.add_argument("--ann-backend", default=RAG_ANN_BACKEND, choices=SUPPORTED_BACKENDS,
+                        help="ANN backend to build alongside the embeddings")
+    parser.add_argument("--ann-only", action="store_true",
+                        help="Rebuild only the ANN structure from the stored embeddings")
+    parser.add_argument("--source", action="append", dest="sources",
+                        help="Rebuild only this KB source (path relative to --kb); repeatable")
+    parser.add_argument("--workers", type=int, default=RAG_BUILD_WORKERS,
+                        help="Worker processes for building shards in parallel")
     
     args = parser.parse_args()
     
     print(f"Initializing RAG with KB: {args.kb} and Index Dir: {args.out}")
     
-    rag = EmbeddingRAG(kb_path=args.kb, index_dir=args.out)
-    rag.build_index(rebuild=args.rebuild)
+    rag = EmbeddingRAG(kb_path=args.kb, index_dir=args.out, ann_backend=args.ann_backend)
+    if args.ann_only:
+        rag.build_ann_index()
+    else:
+        rag.build_index(rebuild=args.rebuild or bool(args.sources), sources=args.sources, workers=args.workers)
     
     print("Done.")
 
@@ -0,0 +1,38 @@
+"""
+Script to compile the mock-mode router rules.
+Usage: python scripts/compile_router_rules.py [--rules data/router_rules.yaml] [--out data/router_rules.compiled.json]
+       python scripts/compile_router_rules.py --explain "my card is gone, freeze it"
+"""
+import argparse
+import json
+import os
+import sys
+
+# Add project root to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from orchestrator.router_rules import compile_rules_file, save_compiled_rules
+from config.llm_settings import ROUTER_RULES_PATH, ROUTER_RULES_COMPILED_PATH
+
+def main():
+    parser = argparse.ArgumentParser(description="Compile Router Rules")
+    parser.add_argument("--rules", default=ROUTER_RULES_PATH, help="YAML rules file")
+    parser.add_argument("--out", default=ROUTER_RULES_COMPILED_PATH, help="Compiled artifact to write")
+    parser.add_argument("--explain", action="append", default=[],
+                        help="Show the concepts and deciding rule for an utterance; repeatable")
+    args = parser.parse_args()
+
+    try:
+        compiled = compile_rules_file(args.rules)
+    except ValueError as e:
+        print(f"Invalid rules in {args.rules}: {e}")
+        sys.exit(1)
+
+    for text in args.explain:
+        print(f"{text!r}: {json.dumps(compiled.explain(text))}")
+
+    save_compiled_rules(compiled, args.out)
+    print(f"Compiled {len(compiled.matcher.phrases)} phrases and {len(compiled.rules)} rules to {args.out}.")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+"""
+Script to train the local intent classifier used by the tiered router.
+Usage: python scripts/train_intent_classifier.py [--examples tests/data/router_utterances.jsonl] [--out data/intent_classifier.npz]
+       python scripts/train_intent_classifier.py --predict "my card is gone, freeze it"
+       python scripts/train_intent_classifier.py --check   # exit 1 if the artifact is stale (for CI)
+"""
+import argparse
+import json
+import os
+import sys
+
+# Add project root to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from orchestrator.intent_classifier import (
+    calibrate_threshold,
+    examples_hash,
+    read_intent_classifier,
+    save_intent_classifier,
+    train_intent_classifier,
+    training_examples
+)
+from orchestrator.llm_router import ROUTER_SYSTEM_PROMPT
+from config.llm_settings import INTENT_CLASSIFIER_PATH, INTENT_CLASSIFIER_EXAMPLES_PATH
+
+def main():
+    parser = argparse.ArgumentParser(description="Train Intent Classifier")
+    parser.add_argument("--examples", default=INTENT_CLASSIFIER_EXAMPLES_PATH,
+                        help="JSONL labeled utterances (the router prompt's few-shot examples are always included)")
+    parser.add_argument("--out", default=INTENT_CLASSIFIER_PATH, help="Classifier artifact to write")
+    parser.add_argument("--predict", action="append", default=[],
+                        help="Show the prediction for an utterance; repeatable")
+    parser.add_argument("--check", action="store_true",
+                        help="Only verify the artifact was trained on the current examples")
+    args = parser.parse_args()
+
+    examples = training_examples(ROUTER_SYSTEM_PROMPT, args.examples)
+
+    if args.check:
+        try:
+            current = read_intent_classifier(args.out).source_hash == examples_hash(examples)
+        except (OSError, ValueError) as e:
+            print(f"Could not read {args.out}: {e}")
+            sys.exit(1)
+        if not current:
+            print(f"{args.out} is stale; run scripts/train_intent_classifier.py.")
+            sys.exit(1)
+        print(f"{args.out} is up to date.")
+        return
+
+    try:
+        calibration = calibrate_threshold(examples)
+        classifier = train_intent_classifier(examples, calibrate=False)
+    except (ImportError, ValueError) as e:
+        print(f"Could not train the intent classifier: {e}")
+        sys.exit(1)
+    classifier.threshold = calibration["threshold"]
+
+    for text in args.predict:
+        print(f"{text!r}: {json.dumps(classifier.predict(text))}")
+
+    save_intent_classifier(classifier, args.out)
+    print(f"Trained on {len(examples)} examples ({len(classifier.labels)} labels, "
+          f"{len(classifier.vocabulary)} features) to {args.out}.")
+    print(f"Calibrated threshold {calibration['threshold']:.2f}: held-out precision "
+          f"{calibration['precision']:.2f}, answering {calibration['coverage']:.0%} of examples.")
+
+if __name__ == "__main__":
+    main()
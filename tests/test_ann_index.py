@@ -0,0 +1,172 @@
+"""
+Tests for the ANN backends used by EmbeddingRAG.
+"""
+import os
+import shutil
+import unittest
+import unittest.mock
+
+import numpy as np
+
+from orchestrator.ann_index import (
+    IVFIndex, HNSWIndex, HNSWLIB_AVAILABLE, cluster_sums, create_vector_index, top_k_indices
+)
+from orchestrator.embedding_provider import MockEmbeddingProvider
+from orchestrator.embedding_rag import EmbeddingRAG
+
+
+def random_unit_matrix(n, dim, seed=0):
+    rng = np.random.default_rng(seed)
+    matrix = rng.standard_normal((n, dim)).astype(np.float32)
+    return matrix / np.linalg.norm(matrix, axis=1, keepdims=True)
+
+
+class HalfDimensionProvider(MockEmbeddingProvider):
+    """A different embedding model: the mock vectors truncated to half their dimension."""
+    signature = "mock-half:v1"
+
+    def embed_query(self, text):
+        return self._truncate(super().embed_query(text)[None, :])[0]
+
+    def embed_documents(self, texts):
+        return self._truncate(super().embed_documents(texts))
+
+    @staticmethod
+    def _truncate(matrix):
+        half = matrix[:, :matrix.shape[1] // 2]
+        return (half / np.linalg.norm(half, axis=1, keepdims=True)).astype(np.float32)
+
+
+class TestANNIndex(unittest.TestCase):
+
+    def setUp(self):
+        self.test_dir = "tests/test_ann_index_dir"
+        os.makedirs(self.test_dir, exist_ok=True)
+        self.matrix = random_unit_matrix(500, 16)
+        self.query = self.matrix[42]
+
+    def tearDown(self):
+        if os.path.exists(self.test_dir):
+            shutil.rmtree(self.test_dir)
+
+    def test_top_k_indices_sorted(self):
+        scores = np.array([0.1, 0.9, 0.5, 0.7], dtype=np.float32)
+        self.assertEqual(top_k_indices(scores, 2).tolist(), [1, 3])
+        self.assertEqual(top_k_indices(scores, 10).tolist(), [1, 3, 2, 0])
+
+    def test_ivf_full_probe_matches_exact(self):
+        """Probing every list must reproduce the exact top-k."""
+        ivf = IVFIndex(nlist=10, nprobe=10)
+        ivf.build(self.matrix)
+        ids, scores = ivf.search(self.query, 5)
+        exact = top_k_indices(self.matrix @ self.query, 5)
+        self.assertEqual(ids.tolist(), exact.tolist())
+        self.assertEqual(ids[0], 42)
+        self.assertAlmostEqual(float(scores[0]), 1.0, places=5)
+
+    def test_cluster_sums_with_empty_clusters(self):
+        """Empty clusters (including a trailing one) sum to zero and don't steal rows."""
+        matrix = np.arange(12, dtype=np.float32).reshape(4, 3)
+        sums = cluster_sums(matrix, np.array([0, 0, 2, 2]), 4)
+        np.testing.assert_array_equal(sums[0], matrix[0] + matrix[1])
+        np.testing.assert_array_equal(sums[1], 0)
+        np.testing.assert_array_equal(sums[2], matrix[2] + matrix[3])
+        np.testing.assert_array_equal(sums[3], 0)
+
+    def test_ivf_duplicate_rows_force_empty_clusters(self):
+        """Identical passages leave clusters empty; every passage must stay searchable."""
+        matrix = np.repeat(random_unit_matrix(2, 16), [60, 1], axis=0)
+        ivf = IVFIndex(nlist=8, nprobe=8)
+        ivf.build(matrix)
+        self.assertTrue(np.isfinite(ivf.centroids).all())
+        self.assertEqual(sorted(ivf.list_ids.tolist()), list(range(61)))
+        ids, _ = ivf.search(matrix[60], 1)
+        self.assertEqual(ids.tolist(), [60])
+
+    def test_ivf_save_load_roundtrip(self):
+        ivf = IVFIndex(nlist=10, nprobe=3)
+        ivf.build(self.matrix)
+        info = ivf.save(self.test_dir)
+
+        loaded = IVFIndex(nprobe=3)
+        self.assertTrue(loaded.load(self.test_dir, self.matrix, info))
+        np.testing.assert_array_equal(loaded.search(self.query, 5)[0], ivf.search(self.query, 5)[0])
+
+        # Stale index (different passage count or dimension) is rejected
+        self.assertFalse(IVFIndex().load(self.test_dir, self.matrix[:10], info))
+        self.assertFalse(IVFIndex().load(self.test_dir, self.matrix[:, :8], info))
+
+    @unittest.skipUnless(HNSWLIB_AVAILABLE, "hnswlib not installed")
+    def test_hnsw_finds_exact_neighbour(self):
+        hnsw = HNSWIndex(m=8, ef_construction=100, ef_search=50)
+        hnsw.build(self.matrix)
+        info = hnsw.save(self.test_dir)
+
+        loaded = HNSWIndex(ef_search=50)
+        self.assertTrue(loaded.load(self.test_dir, self.matrix, info))
+        ids, scores = loaded.search(self.query, 3)
+        self.assertEqual(ids[0], 42)
+        self.assertAlmostEqual(float(scores[0]), 1.0, places=4)
+
+    def test_factory_falls_back_to_exact(self):
+        self.assertIsNone(create_vector_index("exact"))
+        self.assertIsNone(create_vector_index("unknown"))
+        self.assertIsNone(create_vector_index("ivf", num_passages=10, min_passages=1000))
+        self.assertIsInstance(create_vector_index("ivf", num_passages=10, min_passages=0), IVFIndex)
+
+    def test_rag_with_ivf_backend(self):
+        """EmbeddingRAG persists the IVF index and reloads it without rebuilding."""
+        kb_path = os.path.join(self.test_dir, "kb.txt")
+        with open(kb_path, "w", encoding="utf-8") as f:
+            for i in range(400):
+                f.write(f"Policy clause {i}: forex markup and reward points rules, section {i * 7}.\n")
+
+        # Allow ANN on a small corpus
+        with unittest.mock.patch("orchestrator.index_shard.create_vector_index",
+                                 lambda backend, num_passages: create_vector_index(backend, num_passages, min_passages=0)):
+            rag = EmbeddingRAG(kb_path=kb_path, index_dir=self.test_dir, ann_backend="ivf")
+            rag.build_index()
+            shard = rag.shards[0]
+            self.assertIsInstance(shard.ann_index, IVFIndex)
+            self.assertTrue(os.path.exists(os.path.join(shard.directory, IVFIndex.file_name)))
+
+            with unittest.mock.patch.object(IVFIndex, "build") as mock_build:
+                loaded = EmbeddingRAG(kb_path=kb_path, index_dir=self.test_dir, ann_backend="ivf")
+                mock_build.assert_not_called()
+            self.assertIsInstance(loaded.shards[0].ann_index, IVFIndex)
+
+
+    def test_rag_rebuilds_ivf_after_reembedding(self):
+        """A saved ANN index over other embeddings is rebuilt, not searched with mismatched vectors."""
+        kb_path = os.path.join(self.test_dir, "kb.txt")
+        with open(kb_path, "w", encoding="utf-8") as f:
+            for i in range(400):
+                f.write(f"Policy clause {i}: forex markup and reward points rules, section {i * 7}.\n")
+
+        with unittest.mock.patch("orchestrator.index_shard.create_vector_index",
+                                 lambda backend, num_passages: create_vector_index(backend, num_passages, min_passages=0)):
+            rag = EmbeddingRAG(kb_path=kb_path, index_dir=self.test_dir, ann_backend="ivf",
+                               embedding_provider=MockEmbeddingProvider())
+            rag.build_index()
+            built_dim = rag.shards[0].ann_info["dim"]
+
+            # Embedding model changed: the passages are re-embedded at half the dimension
+            with unittest.mock.patch.object(IVFIndex, "build", autospec=True, side_effect=IVFIndex.build) as mock_build:
+                loaded = EmbeddingRAG(kb_path=kb_path, index_dir=self.test_dir, ann_backend="ivf",
+                                      embedding_provider=HalfDimensionProvider())
+                mock_build.assert_called_once()
+            shard = loaded.shards[0]
+            self.assertEqual(shard.embeddings.shape[1], built_dim // 2)
+            self.assertEqual(shard.ann_index.centroids.shape[1], built_dim // 2)
+            self.assertTrue(loaded.search("forex markup"))
+
+            # Same model, but the embeddings file is gone: re-embedded vectors get a fresh index too
+            os.remove(os.path.join(rag.shards[0].directory, rag.shards[0].embeddings_info["file"]))
+            with unittest.mock.patch.object(IVFIndex, "build", autospec=True, side_effect=IVFIndex.build) as mock_build:
+                EmbeddingRAG(kb_path=kb_path, index_dir=self.test_dir, ann_backend="ivf",
+                             embedding_provider=MockEmbeddingProvider())
+                mock_build.assert_called_once()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -7,6 +7,7 @@ sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 from fastapi.testclient import TestClient
 from api.app import app
 import pytest
+from unittest.mock import patch
 
 client = TestClient(app)
 
@@ -15,6 +16,30 @@ def test_health_check():
     assert response.status_code == 200
     assert response.json() == {"status": "ok"}
 
+def test_rag_metrics():
+    response = client.get("/v1/metrics/rag")
+    assert response.status_code == 200
+    data = response.json()
+    assert "index_id" in data
+    assert {"hits", "misses", "size"} <= set(data["query_embeddings"])
+    assert {"hits", "misses", "chunk_sets"} <= set(data["answer_cache"])
+
+def test_admin_reload_swaps_index():
+    with patch("api.app.RAG_ADMIN_TOKEN", "secret"):
+        response = client.post("/v1/admin/rag/reload?wait=true", headers={"X-Admin-Token": "secret"})
+    assert response.status_code == 200
+    assert response.json()["reloaded"] is True
+    assert client.get("/v1/metrics/rag").json()["reloader"]["reloads"] >= 1
+
+def test_admin_reload_requires_token():
+    # Disabled unless a token is configured
+    with patch("api.app.RAG_ADMIN_TOKEN", ""):
+        assert client.post("/v1/admin/rag/reload").status_code == 404
+    with patch("api.app.RAG_ADMIN_TOKEN", "secret"):
+        assert client.post("/v1/admin/rag/reload").status_code == 403
+        response = client.post("/v1/admin/rag/reload", headers={"X-Admin-Token": "wrong"})
+        assert response.status_code == 403
+
 def test_create_session():
     response = client.post("/v1/sessions", json={
         "user_id": "test_user",
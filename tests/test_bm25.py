@@ -0,0 +1,48 @@
+"""
+Unit tests for the BM25 lexical index.
+"""
+from orchestrator.bm25 import BM25Index, tokenize
+
+
+def build(texts):
+    index = BM25Index()
+    index.build(texts)
+    return index
+
+
+def test_tokenize_whole_words():
+    assert tokenize("Late-fee: 2.5% OVERDUE") == ["late", "fee", "2", "5", "overdue"]
+
+
+def test_ranking_prefers_rare_and_repeated_terms():
+    index = build([
+        "forex markup is 1 percent",
+        "reward points on dining and reward points on travel",
+        "reward catalogue",
+    ])
+    ids, scores = index.search("reward points", 3)
+    assert ids.tolist()[0] == 1
+    assert list(scores) == sorted(scores, reverse=True)
+    assert 0 not in ids.tolist()
+
+
+def test_no_match_returns_empty():
+    index = build(["forex markup"])
+    ids, scores = index.search("unknown words", 3)
+    assert len(ids) == 0 and len(scores) == 0
+
+
+def test_roundtrip():
+    index = build(["block your card", "dispute a charge", "card fees"])
+    restored = BM25Index.from_arrays(*index.to_arrays())
+    # JSON form of a legacy metadata.json
+    legacy = BM25Index.from_dict({
+        "k1": index.k1, "b": index.b, "doc_count": index.doc_count,
+        "vocab": sorted(index.vocab, key=index.vocab.get),
+        "term_offsets": index.term_offsets.tolist(),
+        "doc_ids": index.doc_ids.tolist(),
+        "weights": index.weights.tolist()
+    })
+    for query in ("card", "dispute charge", "fees card"):
+        assert restored.search(query, 3)[0].tolist() == index.search(query, 3)[0].tolist()
+        assert legacy.search(query, 3)[0].tolist() == index.search(query, 3)[0].tolist()
@@ -0,0 +1,94 @@
+"""
+Tests for the streaming token-aware chunker.
+"""
+import sys
+import types
+
+from orchestrator.chunker import StreamingChunker, iter_lines, load_token_counter, approx_token_count
+
+
+def word_count(text):
+    return len(text.split())
+
+
+def numbered(lines):
+    return list(enumerate(lines, start=1))
+
+
+def test_exact_line_ranges_skip_blank_lines():
+    chunker = StreamingChunker(chunk_tokens=4, overlap_tokens=0, token_counter=word_count)
+    chunks = list(chunker.chunks(numbered(["a b", "", "c d", "e f g", "", "", "h"])))
+    assert [(c["line_start"], c["line_end"]) for c in chunks] == [(1, 3), (4, 7)]
+    assert chunks[0]["text"] == "a b\nc d"
+    assert chunks[1]["tokens"] == 4
+
+
+def test_overlap_measured_in_tokens():
+    chunker = StreamingChunker(chunk_tokens=6, overlap_tokens=2, token_counter=word_count)
+    lines = ["one two", "three four", "five six", "seven eight"]
+    chunks = list(chunker.chunks(numbered(lines)))
+    # Each chunk carries the previous chunk's last line (2 tokens) forward
+    assert [(c["line_start"], c["line_end"]) for c in chunks] == [(1, 3), (3, 4)]
+    assert all(c["tokens"] <= 6 for c in chunks)
+
+
+def test_oversized_line_is_split_into_overlapping_windows():
+    chunker = StreamingChunker(chunk_tokens=3, overlap_tokens=1, token_counter=word_count)
+    chunks = list(chunker.chunks(numbered(["a", "b c d e f", "g"])))
+    assert [(c["line_start"], c["line_end"]) for c in chunks] == [(1, 1), (2, 2), (2, 2), (3, 3)]
+    assert [c["text"] for c in chunks[1:3]] == ["b c d", "d e f"]
+
+
+def test_line_of_three_chunks_respects_budget():
+    chunker = StreamingChunker(chunk_tokens=20, overlap_tokens=4)
+    line = " ".join(f"word{i:03d}" for i in range(30))  # 239 chars, 59 approximate tokens
+    chunks = list(chunker.chunks(numbered([line])))
+    assert len(chunks) >= 3
+    assert all(c["tokens"] <= 20 for c in chunks)
+    assert all((c["line_start"], c["line_end"]) == (1, 1) for c in chunks)
+    # Windows cover every word in order, overlapping at the seams
+    words = [w for c in chunks for w in c["text"].split()]
+    assert sorted(set(words)) == line.split()
+    assert chunks[1]["text"].split()[0] in chunks[0]["text"].split()[1:]
+
+    # A single huge word is split by characters
+    chunks = list(chunker.chunks(numbered(["x" * 240])))
+    assert len(chunks) >= 3 and all(c["tokens"] <= 20 for c in chunks)
+
+
+def test_streams_lazily():
+    """The first chunk is produced before the rest of the input is read."""
+    def lines():
+        yield 1, "alpha beta gamma"
+        yield 2, "delta epsilon zeta"
+        raise AssertionError("read past the first chunk")
+
+    chunker = StreamingChunker(chunk_tokens=3, overlap_tokens=0, token_counter=word_count)
+    first = next(chunker.chunks(lines()))
+    assert first["line_start"] == 1 and first["line_end"] == 1
+
+
+def test_iter_lines(tmp_path):
+    path = tmp_path / "kb.txt"
+    path.write_text("first\r\nsecond\n\nfourth", encoding="utf-8")
+    assert list(iter_lines(str(path))) == [(1, "first"), (2, "second"), (3, ""), (4, "fourth")]
+
+
+class FakeTokenizer:
+    """Stands in for tokenizers.Tokenizer so the test never reaches the Hugging Face hub."""
+
+    @staticmethod
+    def from_pretrained(name):
+        if name != "fake/words":
+            raise OSError(f"{name} not found")
+        return FakeTokenizer()
+
+    def encode(self, text, add_special_tokens=False):
+        return types.SimpleNamespace(ids=text.split())
+
+
+def test_token_counter_fallback(monkeypatch):
+    monkeypatch.setitem(sys.modules, "tokenizers", types.SimpleNamespace(Tokenizer=FakeTokenizer))
+    assert load_token_counter("approx") is approx_token_count
+    assert load_token_counter("no-such/tokenizer-model") is approx_token_count
+    assert load_token_counter("fake/words")("three word text") == 3
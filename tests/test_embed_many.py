@@ -0,0 +1,96 @@
+"""
+Tests for batched embedding in GeminiLLMClient, using a stubbed embeddings backend.
+"""
+import threading
+import time
+from unittest.mock import patch
+
+import numpy as np
+
+from llm.gemini_client import GeminiLLMClient
+from orchestrator.embedding_rag import EmbeddingRAG
+
+
+class FakeEmbeddings:
+    """Stand-in for GoogleGenerativeAIEmbeddings that records batch calls."""
+
+    def __init__(self, fail_first: int = 0, delay: float = 0.0):
+        self.fail_first = fail_first
+        self.delay = delay
+        self.calls = []
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.lock = threading.Lock()
+
+    def embed_documents(self, texts):
+        with self.lock:
+            self.calls.append(list(texts))
+            if self.fail_first > 0:
+                self.fail_first -= 1
+                raise RuntimeError("429 Resource exhausted")
+            self.in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        time.sleep(self.delay)
+        with self.lock:
+            self.in_flight -= 1
+        return [[float(len(t)), 1.0, 0.0] for t in texts]
+
+
+def make_client(fake):
+    client = GeminiLLMClient()
+    client.real_mode = True
+    client.embeddings = fake
+    client._sleep = lambda seconds: None
+    return client
+
+
+def test_embed_many_batches_and_preserves_order():
+    fake = FakeEmbeddings(delay=0.01)
+    client = make_client(fake)
+    texts = [f"chunk {i}" + "x" * i for i in range(25)]
+
+    vectors = client.embed_many(texts, batch_size=10, max_concurrency=2)
+
+    assert [v[0] for v in vectors] == [float(len(t)) for t in texts]
+    assert sorted(len(batch) for batch in fake.calls) == [5, 10, 10]
+    assert fake.max_in_flight <= 2
+    assert client.last_embed_stats["chunks"] == 25
+    assert client.last_embed_stats["chunks_per_sec"] > 0
+
+
+def test_embed_many_retries_with_backoff():
+    fake = FakeEmbeddings(fail_first=2)
+    client = make_client(fake)
+    delays = []
+    client._sleep = delays.append
+
+    vectors = client.embed_many(["a", "bb"], batch_size=10, max_retries=3)
+
+    assert len(fake.calls) == 3
+    assert len(delays) == 2 and delays[1] > delays[0] / 2
+    assert vectors == [[1.0, 1.0, 0.0], [2.0, 1.0, 0.0]]
+
+
+def test_embed_many_gives_up_with_zero_vectors():
+    fake = FakeEmbeddings(fail_first=10)
+    client = make_client(fake)
+
+    vectors = client.embed_many(["a", "b"], batch_size=1, max_retries=1)
+
+    assert vectors == [[0.0] * 768, [0.0] * 768]
+
+
+def test_build_index_uses_batch_embedding(tmp_path):
+    kb_path = tmp_path / "kb.txt"
+    kb_path.write_text("Forex markup is 1%.\nLate fee is 2.5%.\n", encoding="utf-8")
+    fake = FakeEmbeddings()
+
+    with patch("orchestrator.embedding_provider.RUN_REAL_EMBEDDINGS", True), \
+         patch("orchestrator.embedding_provider.EMBEDDING_CACHE_PATH", ""), \
+         patch("orchestrator.embedding_provider.GeminiLLMClient", lambda: make_client(fake)):
+        rag = EmbeddingRAG(kb_path=str(kb_path), index_dir=str(tmp_path / "index"))
+        rag.build_index()
+
+    assert len(fake.calls) == 1
+    assert rag.embeddings.shape == (len(rag.passages), 3)
+    np.testing.assert_allclose(np.linalg.norm(rag.embeddings, axis=1), 1.0, rtol=1e-5)
@@ -0,0 +1,84 @@
+"""
+Unit tests for embedding providers and the on-disk embedding cache.
+"""
+import numpy as np
+
+from orchestrator.embedding_provider import (
+    CachedEmbeddingProvider,
+    EmbeddingCache,
+    EmbeddingProvider,
+    MockEmbeddingProvider,
+    create_embedding_provider
+)
+from orchestrator.embedding_rag import EmbeddingRAG
+
+
+class CountingProvider(EmbeddingProvider):
+    """Records every text it embeds; vectors encode the text length."""
+    signature = "test:v1"
+
+    def __init__(self):
+        self.embedded = []
+
+    def embed_query(self, text):
+        self.embedded.append(text)
+        return np.array([len(text), 1.0], dtype=np.float32)
+
+    def embed_documents(self, texts):
+        self.embedded.extend(texts)
+        return np.array([[len(t), 0.0] for t in texts], dtype=np.float32)
+
+
+def test_documents_embedded_once_across_restarts(tmp_path):
+    path = str(tmp_path / "cache.sqlite3")
+    first = CountingProvider()
+    matrix = CachedEmbeddingProvider(first, EmbeddingCache(path)).embed_documents(["a", "bb", "a"])
+    assert first.embedded == ["a", "bb"]
+    np.testing.assert_array_equal(matrix[:, 0], [1, 2, 1])
+
+    second = CountingProvider()
+    cached = CachedEmbeddingProvider(second, EmbeddingCache(path))
+    np.testing.assert_array_equal(cached.embed_documents(["bb", "ccc"])[:, 0], [2, 3])
+    assert second.embedded == ["ccc"]
+    assert cached.stats()["cache"]["entries"] == 3
+    assert cached.stats()["cache"]["hit_rate"] == 0.5
+
+
+def test_query_and_document_vectors_cached_separately(tmp_path):
+    provider = CountingProvider()
+    cached = CachedEmbeddingProvider(provider, EmbeddingCache(str(tmp_path / "cache.sqlite3")))
+    cached.embed_documents(["forex"])
+    assert cached.embed_query("forex")[1] == 1.0
+    assert cached.embed_query("forex")[1] == 1.0
+    assert provider.embedded == ["forex", "forex"]
+
+
+def test_zero_vectors_not_cached(tmp_path):
+    class FailingProvider(CountingProvider):
+        def embed_documents(self, texts):
+            self.embedded.extend(texts)
+            return np.zeros((len(texts), 2), dtype=np.float32)
+
+    provider = FailingProvider()
+    cached = CachedEmbeddingProvider(provider, EmbeddingCache(str(tmp_path / "cache.sqlite3")))
+    cached.embed_documents(["x"])
+    cached.embed_documents(["x"])
+    assert provider.embedded == ["x", "x"]
+
+
+def test_mock_provider_is_not_cached(tmp_path):
+    provider = create_embedding_provider(cache_path=str(tmp_path / "cache.sqlite3"))
+    assert isinstance(provider, MockEmbeddingProvider)
+
+
+def test_rag_shares_cache_between_build_and_query(tmp_path):
+    kb_path = tmp_path / "kb.txt"
+    kb_path.write_text("Forex markup is 1%.\nLate fee is 2.5%.\n", encoding="utf-8")
+    provider = CachedEmbeddingProvider(CountingProvider(), EmbeddingCache(str(tmp_path / "cache.sqlite3")))
+    rag = EmbeddingRAG(kb_path=str(kb_path), index_dir=str(tmp_path / "index"), embedding_provider=provider)
+    rag.build_index()
+    rebuilt = EmbeddingRAG(kb_path=str(kb_path), index_dir=str(tmp_path / "index2"), embedding_provider=provider)
+    rebuilt.build_index()
+
+    assert len(provider.provider.embedded) == len(rag.passages)
+    assert rebuilt.cache_stats()["embedding_cache"]["hits"] == len(rag.passages)
@@ -2,7 +2,11 @@ import unittest
 import os
 import shutil
 import json
+import numpy as np
+from unittest.mock import patch
 from orchestrator.embedding_rag import EmbeddingRAG
+from orchestrator.search_result import SearchResult
+from orchestrator.index_format import read_index
 
 class TestEmbeddingRAG(unittest.TestCase):
     
@@ -31,13 +35,16 @@ class TestEmbeddingRAG(unittest.TestCase):
         rag = EmbeddingRAG(kb_path=self.kb_path, index_dir=self.test_dir)
         rag.build_index()
         
-        # Check metadata file
-        metadata_path = os.path.join(self.test_dir, "metadata.json")
-        self.assertTrue(os.path.exists(metadata_path))
+        # Check the manifest and the shard's index file
+        with open(os.path.join(self.test_dir, "manifest.json"), "r") as f:
+            manifest = json.load(f)
+        self.assertEqual([s["source"] for s in manifest["shards"]], ["test_kb.txt"])
+        index_path = os.path.join(self.test_dir, manifest["shards"][0]["dir"], "index.bin")
+        self.assertTrue(os.path.exists(index_path))
         
-        with open(metadata_path, "r") as f:
-            data = json.load(f)
-            self.assertEqual(len(data["passages"]), 1) # Small KB should be 1 chunk
+        meta, arrays = read_index(index_path)
+        self.assertEqual(meta["source"], "test_kb.txt")
+        self.assertEqual(len(arrays["passages.offsets"]) - 1, 1) # Small KB should be 1 chunk
 
     def test_search_mock_deterministic(self):
         """Test search returns results."""
@@ -70,20 +77,260 @@ class TestEmbeddingRAG(unittest.TestCase):
         rag = EmbeddingRAG(kb_path=self.kb_path, index_dir=self.test_dir)
         rag.build_index()
         
-        # Force low semantic score by mocking _cosine_similarity to return 0
-        original_similarity = rag._cosine_similarity
-        rag._cosine_similarity = lambda a, b: 0.0
-        
-        # Query with keyword match
-        results = rag.search("dining")
+        # Force low semantic score by raising the threshold above any cosine similarity
+        with patch("orchestrator.embedding_rag.RAG_MIN_SCORE", 1.1):
+            # Query with keyword match
+            results = rag.search("dining")
         
         # Should return result via fallback
         self.assertTrue(len(results) > 0)
         self.assertEqual(results[0]["fallback"], "lexical")
         self.assertIn("dining", results[0]["text"])
+
+    def test_lexical_fallback_bm25_whole_words(self):
+        """Test BM25 fallback matches whole words and ranks by term weight."""
+        with open(self.kb_path, "w", encoding="utf-8") as f:
+            f.write("Overdue accounts are charged interest.\n")
+        rag = EmbeddingRAG(kb_path=self.kb_path, index_dir=self.test_dir)
+        rag.build_index()
+        
+        # "due" must not match "overdue"
+        self.assertEqual(rag._lexical_fallback("due", 3), [])
+        results = rag._lexical_fallback("overdue interest", 3)
+        self.assertEqual(len(results), 1)
+        self.assertGreater(results[0]["bm25_score"], 0)
+        
+        # The inverted index is persisted and reloaded with the passages
+        _, arrays = read_index(os.path.join(rag.shards[0].directory, "index.bin"))
+        self.assertIn(b"overdue", arrays["bm25.vocab"].tobytes())
+        loaded = EmbeddingRAG(kb_path=self.kb_path, index_dir=self.test_dir)
+        self.assertEqual(loaded._lexical_fallback("overdue interest", 3)[0]["bm25_score"], results[0]["bm25_score"])
+
+    def test_hybrid_search_fuses_dense_and_lexical(self):
+        """Test hybrid mode returns fused results carrying both retriever scores."""
+        lines = [
+            "Forex markup is 1% on international transactions.",
+            "Reward points are credited on dining spends.",
+            "Late payment fee is charged when the due date passes.",
+        ]
+        with open(self.kb_path, "w", encoding="utf-8") as f:
+            f.write("\n".join(" ".join([line] * 40) for line in lines) + "\n")
+        rag = EmbeddingRAG(kb_path=self.kb_path, index_dir=self.test_dir)
+        rag.build_index()
+        
+        results = rag.search("late payment fee", mode="hybrid")
+        self.assertTrue(0 < len(results) <= 3)
+        self.assertEqual(results[0]["retrieval"], "hybrid")
+        self.assertIn("Late payment fee", results[0]["text"])
+        self.assertIsNotNone(results[0]["bm25_score"])
+        self.assertEqual([r["score"] for r in results], sorted((r["score"] for r in results), reverse=True))
+        
+        # Weighted fusion with lexical weight only follows the BM25 order
+        with patch("orchestrator.embedding_rag.RAG_HYBRID_FUSION", "weighted"), \
+             patch("orchestrator.embedding_rag.RAG_HYBRID_DENSE_WEIGHT", 0.0):
+            weighted = rag.search("late payment fee", mode="hybrid")
+        self.assertIn("Late payment fee", weighted[0]["text"])
+        self.assertAlmostEqual(weighted[0]["score"], 1.0, places=5)
+
+    def test_embedding_matrix_precomputed(self):
+        """Test passage vectors are embedded once and scored with one product."""
+        rag = EmbeddingRAG(kb_path=self.kb_path, index_dir=self.test_dir)
+        rag.build_index()
+        
+        self.assertEqual(rag.embeddings.dtype, np.float32)
+        self.assertEqual(rag.embeddings.shape[0], len(rag.passages))
+        self.assertTrue(rag.embeddings.flags["C_CONTIGUOUS"])
+        np.testing.assert_allclose(np.linalg.norm(rag.embeddings, axis=1), 1.0, rtol=1e-5)
+        
+        # Only the query should be embedded at search time
+        calls = []
+        original_get_embedding = rag._get_embedding
+        rag._get_embedding = lambda text: calls.append(text) or original_get_embedding(text)
+        rag.search("forex markup")
+        self.assertEqual(calls, ["forex markup"])
+
+    def test_embeddings_persisted_and_memory_mapped(self):
+        """Test embeddings are written next to index.bin and memory-mapped on load."""
+        rag = EmbeddingRAG(kb_path=self.kb_path, index_dir=self.test_dir)
+        rag.build_index()
+        
+        shard_dir = rag.shards[0].directory
+        info = read_index(os.path.join(shard_dir, "index.bin"))[0]["embeddings"]
+        self.assertTrue(os.path.exists(os.path.join(shard_dir, info["file"])))
+        self.assertEqual(info["count"], len(rag.passages))
+        
+        # A fresh instance must load the vectors without re-embedding the corpus
+        with patch.object(EmbeddingRAG, "_build_embedding_matrix") as mock_build:
+            loaded = EmbeddingRAG(kb_path=self.kb_path, index_dir=self.test_dir)
+            mock_build.assert_not_called()
+        
+        self.assertIsInstance(loaded.embeddings, np.memmap)
+        np.testing.assert_array_equal(np.asarray(loaded.embeddings), rag.embeddings)
+        self.assertTrue(len(loaded.search("forex markup")) <= 3)
+
+    def test_incremental_rebuild_reuses_unchanged_chunks(self):
+        """Test a rebuild only embeds chunks whose content hash changed."""
+        # Long lines so that each one becomes its own chunk
+        lines = [f"Clause {i}: " + ("policy text " * 80) for i in range(4)]
+        with open(self.kb_path, "w", encoding="utf-8") as f:
+            f.write("\n".join(lines) + "\n")
+        
+        rag = EmbeddingRAG(kb_path=self.kb_path, index_dir=self.test_dir)
+        stats = rag.build_index()
+        self.assertEqual(stats["added"], len(rag.passages))
+        self.assertTrue(all("content_hash" in p for p in rag.passages))
+        original_rows = {p["content_hash"]: np.array(rag.embeddings[i]) for i, p in enumerate(rag.passages)}
         
-        # Restore
-        rag._cosine_similarity = original_similarity
+        # Edit one clause and reload from disk
+        lines[2] = "Clause 2 was amended: " + ("new wording " * 80)
+        with open(self.kb_path, "w", encoding="utf-8") as f:
+            f.write("\n".join(lines) + "\n")
+        
+        rag = EmbeddingRAG(kb_path=self.kb_path, index_dir=self.test_dir)
+        embedded = []
+        original_get_embeddings = rag._get_embeddings
+        rag._get_embeddings = lambda texts: embedded.extend(texts) or original_get_embeddings(texts)
+        stats = rag.build_index(rebuild=True)
+        
+        self.assertGreater(stats["reused"], 0)
+        self.assertEqual(stats["added"], len(embedded))
+        self.assertEqual(stats["added"], stats["dropped"])
+        self.assertEqual(stats["reused"] + stats["added"], len(rag.passages))
+        self.assertTrue(all("amended" in text for text in embedded))
+        for i, passage in enumerate(rag.passages):
+            if passage["content_hash"] in original_rows:
+                np.testing.assert_array_equal(rag.embeddings[i], original_rows[passage["content_hash"]])
+
+    def test_search_returns_top_k_views_above_threshold(self):
+        """Test results are ranked views over the stored passages, filtered before top-k."""
+        lines = [f"Clause {i}: " + ("forex markup " * 110) for i in range(6)]
+        with open(self.kb_path, "w", encoding="utf-8") as f:
+            f.write("\n".join(lines) + "\n")
+        rag = EmbeddingRAG(kb_path=self.kb_path, index_dir=self.test_dir)
+        rag.build_index()
+        
+        results = rag.search("forex markup", top_k=2)
+        self.assertEqual(len(results), 2)
+        self.assertIsInstance(results[0], SearchResult)
+        self.assertEqual(results[0].passage, rag.shards[0].passages[results[0]["chunk_id"]])
+        self.assertGreaterEqual(results[0]["score"], results[1]["score"])
+        self.assertNotIn("score", rag.shards[0].passages[0])
+        self.assertEqual(results[0].to_dict()["text"], results[0]["text"])
+        
+        # The threshold is applied inside the shard scan, before top-k selection
+        query = rag.embed_query("forex markup")
+        all_ids, all_scores = rag.shards[0].dense_search(query, 10)
+        cutoff = float(all_scores[1])
+        ids, scores = rag.shards[0].dense_search(query, 10, min_score=cutoff)
+        self.assertEqual(ids.tolist(), all_ids[:2].tolist())
+        self.assertTrue(np.all(scores >= cutoff))
+
+    def test_directory_kb_builds_one_shard_per_source(self):
+        """Test a directory KB is indexed per document and searched across shards."""
+        kb_dir = os.path.join(self.test_dir, "kb")
+        os.makedirs(os.path.join(kb_dir, "regulatory"))
+        with open(os.path.join(kb_dir, "rewards.md"), "w", encoding="utf-8") as f:
+            f.write("# Rewards\nReward points are credited on dining spends.\n")
+        with open(os.path.join(kb_dir, "regulatory", "forex.json"), "w", encoding="utf-8") as f:
+            json.dump({"sections": [{"title": "Fees", "text": "Forex markup is 1% on international spends."}]}, f)
+        with open(os.path.join(kb_dir, "notes.csv"), "w", encoding="utf-8") as f:
+            f.write("ignored,file\n")
+        index_dir = os.path.join(self.test_dir, "index")
+        
+        rag = EmbeddingRAG(kb_path=kb_dir, index_dir=index_dir)
+        stats = rag.build_index(workers=1)
+        self.assertEqual([s.source for s in rag.shards], ["regulatory/forex.json", "rewards.md"])
+        self.assertEqual(stats["added"], 2)
+        
+        results = rag.search("forex markup")
+        self.assertEqual(results[0]["source"], "regulatory/forex.json")
+        self.assertEqual(results[0]["line_no"], 1)
+        
+        # Rebuilding one source leaves the other shard untouched
+        with open(os.path.join(kb_dir, "rewards.md"), "a", encoding="utf-8") as f:
+            f.write("Cashback is credited monthly.\n")
+        forex_id = rag.shards[0].index_id
+        stats = rag.build_index(rebuild=True, sources=["rewards.md"])
+        self.assertEqual(stats["added"], 1)
+        self.assertEqual(rag.shards[0].index_id, forex_id)
+        
+        loaded = EmbeddingRAG(kb_path=kb_dir, index_dir=index_dir)
+        self.assertEqual(loaded.index_id, rag.index_id)
+        self.assertEqual(len(loaded.passages), 2)
+
+    def test_loads_baseline_metadata_json(self):
+        """Test an index written by the original single-file layout (no content hashes) still loads."""
+        os.makedirs(self.test_dir)
+        with open(os.path.join(self.test_dir, "metadata.json"), "w", encoding="utf-8") as f:
+            json.dump({"version": "v1", "passages": [
+                {"chunk_id": 0, "text": "Forex markup is 1%.", "source": "test_kb.txt",
+                 "line_no": 1, "preview": "Forex markup is 1%."}
+            ]}, f)
+        
+        rag = EmbeddingRAG(kb_path=self.kb_path, index_dir=self.test_dir)
+        self.assertEqual(len(rag.passages), 1)
+        self.assertEqual(len(rag.passages[0]["content_hash"]), 64)
+        self.assertEqual(rag.search("forex markup")[0]["text"], "Forex markup is 1%.")
+
+    def test_search_without_index_builds_in_process(self):
+        """Test the lazy build on the first search never starts a worker pool."""
+        kb_dir = os.path.join(self.test_dir, "kb")
+        os.makedirs(kb_dir)
+        for name in ("fees.md", "rewards.md"):
+            with open(os.path.join(kb_dir, name), "w", encoding="utf-8") as f:
+                f.write(f"Policy text for {name}.\n")
+        
+        rag = EmbeddingRAG(kb_path=kb_dir, index_dir=os.path.join(self.test_dir, "index"))
+        with patch("orchestrator.embedding_rag.ProcessPoolExecutor") as mock_pool:
+            self.assertTrue(rag.search("policy"))
+            mock_pool.assert_not_called()
+        self.assertEqual(len(rag.shards), 2)
+
+    def test_sources_with_colliding_safe_names_get_separate_shards(self):
+        """Test sources that only differ in unsafe path characters keep their own shards."""
+        kb_dir = os.path.join(self.test_dir, "kb")
+        os.makedirs(os.path.join(kb_dir, "cards"))
+        with open(os.path.join(kb_dir, "cards", "fees.md"), "w", encoding="utf-8") as f:
+            f.write("The annual fee is waived.\n")
+        with open(os.path.join(kb_dir, "cards_fees.md"), "w", encoding="utf-8") as f:
+            f.write("Late payment fees apply after the due date.\n")
+        index_dir = os.path.join(self.test_dir, "index")
+        
+        rag = EmbeddingRAG(kb_path=kb_dir, index_dir=index_dir)
+        stats = rag.build_index(workers=1)
+        self.assertEqual(stats["added"], 2)
+        self.assertEqual(len({shard.directory for shard in rag.shards}), 2)
+        
+        loaded = EmbeddingRAG(kb_path=kb_dir, index_dir=index_dir)
+        self.assertEqual(sorted(p["source"] for p in loaded.passages), ["cards/fees.md", "cards_fees.md"])
+        
+        # Names that still collide are refused rather than overwriting a shard
+        with patch("orchestrator.embedding_rag.shard_name", return_value="shard"):
+            with self.assertRaises(ValueError):
+                rag.build_index(rebuild=True, workers=1)
+
+    def test_search_filters_by_metadata(self):
+        """Test filtered search scores only passages matching the metadata filters."""
+        kb_dir = os.path.join(self.test_dir, "kb")
+        os.makedirs(kb_dir)
+        with open(os.path.join(kb_dir, "fees.json"), "w", encoding="utf-8") as f:
+            json.dump({"product": "onecard", "policies": [
+                {"variant": "metal", "text": "Forex markup is 1% on the metal card."},
+                {"variant": "lifetime-free", "text": "Forex markup is 2% on the lifetime free card."}
+            ]}, f)
+        with open(os.path.join(kb_dir, "rewards.md"), "w", encoding="utf-8") as f:
+            f.write("---\nvariant: metal\n---\nForex spends earn 5x reward points.\n")
+        index_dir = os.path.join(self.test_dir, "index")
+        EmbeddingRAG(kb_path=kb_dir, index_dir=index_dir).build_index(workers=1)
+
+        rag = EmbeddingRAG(kb_path=kb_dir, index_dir=index_dir)
+        results = rag.search("forex markup", top_k=5, filters={"variant": "lifetime-free"})
+        self.assertEqual([r["text"] for r in results], ["Forex markup is 2% on the lifetime free card."])
+        self.assertEqual(results[0]["metadata"], {"product": "onecard", "variant": "lifetime-free"})
+
+        results = rag.search("forex", top_k=5, mode="hybrid", filters={"variant": ["metal"], "source": "rewards.md"})
+        self.assertEqual([r["line_no"] for r in results], [4])
+        self.assertEqual(rag.search("forex", filters={"variant": "platinum"}), [])
 
 if __name__ == "__main__":
     unittest.main()
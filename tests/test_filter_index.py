@@ -0,0 +1,79 @@
+"""
+Unit tests for the metadata filter index.
+"""
+import hashlib
+
+import numpy as np
+
+from orchestrator.filter_index import FilterIndex
+from orchestrator.kb_sources import iter_source_sections
+from orchestrator.passage_store import PassageStore
+
+
+def store(metadata_rows):
+    return PassageStore.from_records(
+        {
+            "text": f"clause {row}",
+            "source": "fees.json",
+            "line_no": row + 1,
+            "content_hash": hashlib.sha256(f"clause {row}".encode("utf-8")).hexdigest(),
+            "metadata": metadata
+        }
+        for row, metadata in enumerate(metadata_rows)
+    )
+
+
+def test_match_ands_fields_and_ors_values():
+    index = FilterIndex()
+    index.build(store([
+        {"variant": "metal", "card": "credit"},
+        {"variant": "free"},
+        {"variant": "metal", "card": "debit"},
+        {"card": "credit"}
+    ]))
+
+    assert index.match(None) is None
+    assert index.match({"variant": "metal"}).tolist() == [0, 2]
+    assert index.match({"variant": ["free", "metal"]}).tolist() == [0, 1, 2]
+    assert index.match({"variant": "metal", "card": "credit"}).tolist() == [0]
+    assert index.match({"source": "fees.json", "card": "credit"}).tolist() == [0, 3]
+    assert index.match({"variant": "platinum"}).tolist() == []
+    assert index.match({"tier": "gold"}).tolist() == []
+
+
+def test_scalar_filter_values_match_json_metadata(tmp_path):
+    path = tmp_path / "fees.json"
+    path.write_text(
+        '[{"text": "Annual fee waived.", "year": 2024, "promo": true},'
+        ' {"text": "Annual fee is 500.", "year": 2023, "promo": false}]',
+        encoding="utf-8"
+    )
+    records = [
+        {"text": line, "source": "fees.json", "line_no": line_no, "metadata": metadata,
+         "content_hash": hashlib.sha256(line.encode("utf-8")).hexdigest()}
+        for metadata, lines in iter_source_sections(str(path)) for line_no, line in lines
+    ]
+    index = FilterIndex()
+    index.build(PassageStore.from_records(records))
+
+    assert index.match({"year": 2024}).tolist() == [0]
+    assert index.match({"year": "2023"}).tolist() == [1]
+    assert index.match({"promo": True}).tolist() == [0]
+    assert index.match({"promo": False, "year": 2023}).tolist() == [1]
+    assert index.match({"year": (2023, 2024)}).tolist() == [0, 1]
+
+
+def test_round_trip_through_arrays():
+    index = FilterIndex()
+    index.build(store([{"variant": "metal"}, {"variant": "free"}, {"variant": "metal"}]))
+    meta, arrays = index.to_arrays()
+    restored = FilterIndex.from_arrays(meta, {name: np.array(a) for name, a in arrays.items()})
+    assert restored.match({"variant": "metal"}).tolist() == [0, 2]
+    assert restored.match({"variant": "free"}).tolist() == [1]
+
+
+def test_front_matter_is_metadata_not_text(tmp_path):
+    path = tmp_path / "rewards.md"
+    path.write_text("---\nvariant: metal\ntier: 'gold'\n---\nDining earns 5x.\n", encoding="utf-8")
+    sections = [(metadata, list(lines)) for metadata, lines in iter_source_sections(str(path))]
+    assert sections == [({"variant": "metal", "tier": "gold"}, [(5, "Dining earns 5x.")])]
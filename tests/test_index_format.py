@@ -0,0 +1,76 @@
+"""
+Unit tests for the binary index container.
+"""
+import os
+import struct
+
+import numpy as np
+import pytest
+
+from orchestrator.index_format import FORMAT_VERSION, IndexFormatError, read_index, write_index
+
+
+def write_sample(path):
+    arrays = {
+        "offsets": np.array([0, 5, 12], dtype=np.int64),
+        "weights": np.array([0.5, 1.25, 3.0], dtype=np.float32),
+        "hashes": np.arange(64, dtype=np.uint8).reshape(2, 32),
+        "empty": np.zeros(0, dtype=np.int32)
+    }
+    write_index(path, {"version": "v1", "source": "kb.txt"}, arrays)
+    return arrays
+
+
+def test_round_trip(tmp_path):
+    path = str(tmp_path / "index.bin")
+    arrays = write_sample(path)
+
+    meta, loaded = read_index(path)
+    assert meta == {"version": "v1", "source": "kb.txt"}
+    for name, array in arrays.items():
+        assert loaded[name].dtype == array.dtype
+        np.testing.assert_array_equal(loaded[name], array)
+        assert loaded[name].ctypes.data % 8 == 0 or array.size == 0
+
+
+def test_corruption_is_detected(tmp_path):
+    path = str(tmp_path / "index.bin")
+    write_sample(path)
+    with open(path, "r+b") as f:
+        f.seek(os.path.getsize(path) - 70)
+        byte = f.read(1)
+        f.seek(-1, os.SEEK_CUR)
+        f.write(bytes([byte[0] ^ 0xFF]))
+
+    with pytest.raises(IndexFormatError, match="checksum"):
+        read_index(path)
+
+
+def test_other_format_version_is_rejected(tmp_path):
+    path = str(tmp_path / "index.bin")
+    write_sample(path)
+    with open(path, "r+b") as f:
+        f.seek(8)
+        f.write(struct.pack("<I", FORMAT_VERSION + 1))
+
+    with pytest.raises(IndexFormatError, match="format"):
+        read_index(path)
+
+
+def test_arrays_are_views_over_a_memory_map(tmp_path):
+    path = str(tmp_path / "index.bin")
+    write_sample(path)
+    _, loaded = read_index(path)
+    assert not loaded["weights"].flags.writeable
+    assert not loaded["weights"].flags.owndata
+
+    # The mapping keeps serving the old contents after an atomic replace
+    write_index(path, {"version": "v2"}, {"weights": np.ones(3, dtype=np.float32)})
+    np.testing.assert_array_equal(loaded["weights"], [0.5, 1.25, 3.0])
+
+
+def test_truncated_file_is_rejected(tmp_path):
+    path = tmp_path / "index.bin"
+    path.write_bytes(b"OCRAG")
+    with pytest.raises(IndexFormatError, match="truncated"):
+        read_index(str(path))
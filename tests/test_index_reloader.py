@@ -0,0 +1,58 @@
+"""
+Unit tests for hot-swapping the RAG index.
+"""
+import os
+from types import SimpleNamespace
+
+from orchestrator.embedding_rag import EmbeddingRAG
+from orchestrator.index_reloader import IndexReloader
+
+
+def make_owner(tmp_path):
+    kb_path = tmp_path / "kb.txt"
+    kb_path.write_text("Forex markup is 1%.\n", encoding="utf-8")
+    index_dir = str(tmp_path / "index")
+    EmbeddingRAG(kb_path=str(kb_path), index_dir=index_dir).build_index()
+    return SimpleNamespace(rag=EmbeddingRAG(kb_path=str(kb_path), index_dir=index_dir)), kb_path
+
+
+def test_swaps_in_index_rebuilt_by_another_process(tmp_path):
+    owner, kb_path = make_owner(tmp_path)
+    reloader = IndexReloader(owner, interval_seconds=0)
+    old = owner.rag
+    assert reloader.check() is False
+    assert reloader.reload()["reloaded"] is False
+
+    kb_path.write_text("Forex markup is 1%.\nLate fee is 2.5%.\n", encoding="utf-8")
+    EmbeddingRAG(kb_path=str(kb_path), index_dir=old.index_dir).build_index(rebuild=True)
+    # Force a different stamp even on filesystems with coarse mtimes
+    os.utime(os.path.join(old.index_dir, "manifest.json"), ns=(0, 0))
+
+    assert reloader.check() is True
+    assert owner.rag is not old and owner.rag.index_id != old.index_id
+    assert "Late fee" in owner.rag.search("late fee")[0]["text"]
+    # In-flight searches keep working on the old instance
+    assert old.search("forex")[0]["text"] == "Forex markup is 1%."
+    assert reloader.stats()["reloads"] == 1
+
+
+def test_background_rebuild_from_kb(tmp_path):
+    owner, kb_path = make_owner(tmp_path)
+    reloader = IndexReloader(owner, interval_seconds=0)
+    kb_path.write_text("Late fee is 2.5%.\n", encoding="utf-8")
+
+    assert reloader.reload_in_background(rebuild=True) is True
+    reloader._worker.join(timeout=30)
+    assert owner.rag.search("late fee")[0]["text"] == "Late fee is 2.5%."
+
+
+def test_empty_index_is_not_swapped_in(tmp_path):
+    owner, kb_path = make_owner(tmp_path)
+    reloader = IndexReloader(owner, interval_seconds=0)
+    old = owner.rag
+    os.remove(os.path.join(old.index_dir, "manifest.json"))
+    kb_path.unlink()
+
+    result = reloader.reload(force=True)
+    assert result["reloaded"] is False and "error" in result
+    assert owner.rag is old
@@ -0,0 +1,120 @@
+import os
+import subprocess
+import sys
+import tempfile
+import time
+import unittest
+from unittest.mock import patch
+
+from orchestrator.intent_classifier import (
+    IntentClassifier,
+    calibrate_threshold,
+    examples_hash,
+    features,
+    load_intent_classifier,
+    prompt_examples,
+    read_intent_classifier,
+    save_intent_classifier,
+    train_intent_classifier,
+    training_examples
+)
+from orchestrator.llm_router import ROUTER_SYSTEM_PROMPT
+from config.llm_settings import INTENT_CLASSIFIER_PATH
+
+EXAMPLES_PATH = os.path.join(os.path.dirname(__file__), "data", "router_utterances.jsonl")
+
+
+class TestIntentClassifier(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.examples = training_examples(ROUTER_SYSTEM_PROMPT, EXAMPLES_PATH)
+        cls.classifier = train_intent_classifier(cls.examples)
+
+    def test_prompt_examples(self):
+        examples = prompt_examples(ROUTER_SYSTEM_PROMPT)
+        self.assertIn(("Block my card", "action", "block_card"), examples)
+        self.assertIn(("Not sure", "ambiguous", None), examples)
+        self.assertGreater(len(self.examples), len(examples))
+
+    def test_features(self):
+        found = features("Lost card!")
+        self.assertIn("w:lost", found)
+        self.assertIn("b:lost card", found)
+        self.assertIn("c: lo", found)
+        self.assertIn("c:ard ", found)
+
+    def test_predict_paraphrases(self):
+        cases = {
+            "someone stole my card": ("action", "block_card"),
+            "please unlock my card": ("action", "unblock_card"),
+            "i was charged twice for the same thing": ("action", "dispute_transaction"),
+            "how much do i owe this month": ("info", "get_account_summary"),
+            "what did i spend last month": ("info", "get_recent_transactions"),
+        }
+        for text, (intent, action_type) in cases.items():
+            result = self.classifier.predict(text)
+            self.assertEqual((result["intent"], result["action_type"]), (intent, action_type), text)
+            self.assertTrue(0.0 < result["confidence"] <= 1.0)
+
+        # Unknown words only leave the class priors, which favour escalating
+        result = self.classifier.predict("xyzzy")
+        self.assertEqual(result["intent"], "ambiguous")
+        self.assertLess(result["confidence"], self.classifier.threshold)
+
+    def test_predict_latency(self):
+        start = time.perf_counter()
+        for _ in range(200):
+            self.classifier.predict("i think someone stole my card yesterday")
+        self.assertLess((time.perf_counter() - start) / 200, 0.001)
+
+    def test_out_of_scope_not_answered(self):
+        # Account questions the bot has no action for are labeled ambiguous, so
+        # the classifier never answers them with a confident action
+        for text in ("what is my credit score", "how do I increase my credit limit"):
+            result = self.classifier.predict(text)
+            self.assertTrue(result["intent"] == "ambiguous"
+                            or result["confidence"] < self.classifier.threshold, text)
+
+    def test_calibrated_threshold(self):
+        calibration = calibrate_threshold(self.examples)
+        self.assertEqual(self.classifier.threshold, calibration["threshold"])
+        self.assertTrue(0.0 < calibration["threshold"] <= 1.0)
+        self.assertGreaterEqual(calibration["precision"], 0.9)
+        self.assertGreater(calibration["coverage"], 0.0)
+
+    def test_save_and_load(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "intent_classifier.npz")
+            save_intent_classifier(self.classifier, path)
+            loaded = load_intent_classifier(path)
+            self.assertIsInstance(loaded, IntentClassifier)
+            self.assertEqual(loaded.source_hash, self.classifier.source_hash)
+            self.assertEqual(loaded.threshold, self.classifier.threshold)
+            self.assertEqual(loaded.labels, self.classifier.labels)
+            for text in ("someone stole my card", "what is my credit score"):
+                self.assertEqual(loaded.predict(text), self.classifier.predict(text))
+
+            # A missing artifact disables the tier instead of training on the request path
+            with patch("builtins.print") as mock_print:
+                self.assertIsNone(load_intent_classifier(os.path.join(tmp, "missing.npz")))
+            self.assertIn("Falling back", mock_print.call_args[0][0])
+
+    def test_committed_artifact_is_current(self):
+        # CI check: retrain (scripts/train_intent_classifier.py) after editing the examples
+        committed = read_intent_classifier(INTENT_CLASSIFIER_PATH)
+        self.assertEqual(committed.source_hash, examples_hash(self.examples))
+
+    def test_router_import_skips_sklearn(self):
+        # Prediction from the artifact is pure numpy; only training imports scikit-learn
+        code = "import sys, orchestrator.llm_router; print('sklearn' in sys.modules)"
+        output = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True)
+        self.assertEqual(output.stdout.strip(), "False")
+
+    def test_too_few_labels(self):
+        with self.assertRaises(ValueError):
+            train_intent_classifier([("block my card", "action", "block_card"), ("hello", "ambiguous", None)])
+
+
+if __name__ == "__main__":
+    unittest.main()
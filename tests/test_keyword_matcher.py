@@ -0,0 +1,19 @@
+"""
+Unit tests for the compiled keyword matcher.
+"""
+import pytest
+
+from orchestrator.keyword_matcher import KeywordMatcher
+
+
+def test_matches_whole_words_and_longest_phrase():
+    matcher = KeywordMatcher({"block": ["lock", "shut down"], "dispute": ["wrong charge"], "fees": ["charge"]})
+    assert matcher.match("Please shut down my card!") == {"block"}
+    assert matcher.match("unlock the clock") == set()
+    assert matcher.match("A wrong charge, and another charge") == {"dispute", "fees"}
+    assert matcher.match("There's a wrong-charge") == set()
+
+
+def test_phrase_in_two_concepts_is_rejected():
+    with pytest.raises(ValueError):
+        KeywordMatcher({"block": ["freeze"], "unblock": ["Freeze"]})
@@ -2,6 +2,7 @@ import unittest
 from unittest.mock import patch, MagicMock
 import os
 import json
+import tempfile
 from orchestrator.llm_router import LLMRouter
 
 class TestLLMRouter(unittest.TestCase):
@@ -11,6 +12,10 @@ class TestLLMRouter(unittest.TestCase):
         if "USE_REAL_LLM_ROUTER" in os.environ:
             del os.environ["USE_REAL_LLM_ROUTER"]
 
+    def tearDown(self):
+        # Don't leak the router mode into other test modules
+        os.environ.pop("USE_REAL_LLM_ROUTER", None)
+
     def test_mock_mode_default(self):
         """Test that router defaults to mock mode and uses heuristics."""
         router = LLMRouter()
@@ -45,6 +50,17 @@ class TestLLMRouter(unittest.TestCase):
         self.assertEqual(result["intent"], "action")
         self.assertEqual(result["action_type"], "block_card")
 
+    def test_mock_mode_whole_words_and_precedence(self):
+        """Test keywords match whole words only and rules apply in precedence order."""
+        router = LLMRouter()
+        self.assertEqual(router.classify("Unlock my card")["action_type"], "unblock_card")
+        self.assertEqual(router.classify("Unfreeze it please")["action_type"], "unblock_card")
+        self.assertEqual(router.classify("I lost my card, what is my balance?")["action_type"], "block_card")
+        self.assertEqual(router.classify("Show my last transaction")["action_type"], "get_recent_transactions")
+        self.assertEqual(router.classify("How do reward points work on dining?")["action_type"], None)
+        self.assertEqual(router.classify("reward points")["action_type"], "get_rewards_summary")
+        self.assertEqual(router.classify("skills")["intent"], "ambiguous")
+
     @patch("orchestrator.llm_router.GeminiLLMClient")
     def test_real_mode_success(self, MockLLMClient):
         """Test real mode with valid LLM response."""
@@ -99,5 +115,148 @@ class TestLLMRouter(unittest.TestCase):
         self.assertEqual(result["intent"], "ambiguous")
         self.assertEqual(result["confidence"], 0.3)
 
+    @patch("orchestrator.llm_router.GeminiLLMClient")
+    def test_real_mode_cache(self, MockLLMClient):
+        """Test repeated utterances (modulo case, punctuation, spacing) skip the LLM."""
+        os.environ["USE_REAL_LLM_ROUTER"] = "true"
+
+        mock_instance = MockLLMClient.return_value
+        mock_instance.generate.return_value = json.dumps({
+            "intent": "action",
+            "action_type": "block_card",
+            "confidence": 0.9
+        })
+
+        router = LLMRouter()
+        debug_info = {}
+        router.classify("Block my card", debug_info)
+        self.assertFalse(debug_info["router_cache_hit"])
+
+        debug_info = {}
+        result = router.classify("  block MY card!! ", debug_info)
+        self.assertTrue(debug_info["router_cache_hit"])
+        self.assertEqual(result["action_type"], "block_card")
+        mock_instance.generate.assert_called_once()
+
+        # Fallbacks are not cached
+        mock_instance.generate.side_effect = Exception("API Error")
+        router.classify("Hello")
+        router.classify("Hello")
+        self.assertEqual(mock_instance.generate.call_count, 3)
+
+    @patch("orchestrator.llm_router.GeminiLLMClient")
+    def test_real_mode_warm_cache(self, MockLLMClient):
+        """Test the cache survives a restart through the warm cache file."""
+        os.environ["USE_REAL_LLM_ROUTER"] = "true"
+
+        mock_instance = MockLLMClient.return_value
+        mock_instance.generate.return_value = json.dumps({
+            "intent": "info",
+            "action_type": "get_account_summary",
+            "confidence": 0.9
+        })
+
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "router_cache.json")
+            router = LLMRouter(warm_cache_path=path)
+            router.classify("What is my balance?")
+            self.assertEqual(router.save_warm_cache(), 1)
+
+            restarted = LLMRouter(warm_cache_path=path)
+            debug_info = {}
+            result = restarted.classify("what is my balance", debug_info)
+            self.assertTrue(debug_info["router_cache_hit"])
+            self.assertEqual(result["action_type"], "get_account_summary")
+            mock_instance.generate.assert_called_once()
+
+            # A cache written for another prompt or model is ignored
+            with open(path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            data["signature"] = "other"
+            with open(path, "w", encoding="utf-8") as f:
+                json.dump(data, f)
+            self.assertEqual(len(LLMRouter(warm_cache_path=path).cache), 0)
+
+    @patch("orchestrator.llm_router.GeminiLLMClient")
+    def test_tiered_mode_escalation(self, MockLLMClient):
+        """Test tiered mode only calls the LLM for ambiguous or low-confidence heuristics."""
+        os.environ["USE_REAL_LLM_ROUTER"] = "tiered"
+
+        mock_instance = MockLLMClient.return_value
+        mock_instance.generate.return_value = json.dumps({
+            "intent": "action",
+            "action_type": "block_card",
+            "confidence": 0.93
+        })
+
+        router = LLMRouter(escalation_threshold=0.8, classifier_path="")
+        self.assertTrue(router.tiered)
+        self.assertIsNone(router.classifier)
+
+        debug_info = {}
+        result = router.classify("What is my balance?", debug_info)
+        self.assertEqual(result["action_type"], "get_account_summary")
+        self.assertEqual(debug_info["router_tier"], "heuristic")
+        mock_instance.generate.assert_not_called()
+
+        debug_info = {}
+        result = router.classify("Make sure nobody can use my plastic", debug_info)
+        self.assertEqual(result["action_type"], "block_card")
+        self.assertEqual(debug_info["router_tier"], "llm")
+        mock_instance.generate.assert_called_once()
+
+        # Heuristic matches with weak evidence (no "my"/"I") fall below the default threshold
+        debug_info = {}
+        router.classify("when is the bill due", debug_info)
+        self.assertEqual(debug_info["router_tier"], "llm")
+        self.assertEqual(mock_instance.generate.call_count, 2)
+
+        # Above-threshold heuristics escalate when the threshold is raised
+        router.escalation_threshold = 0.95
+        router.classify("Block my card")
+        self.assertEqual(mock_instance.generate.call_count, 3)
+
+        # A failed escalation keeps the heuristic answer
+        mock_instance.generate.side_effect = Exception("API Error")
+        result = router.classify("skills")
+        self.assertEqual(result["intent"], "ambiguous")
+        self.assertEqual(result["confidence"], 0.5)
+
+        stats = router.stats()
+        self.assertEqual(stats["mode"], "tiered")
+        self.assertEqual(stats["requests"], 5)
+        self.assertEqual(stats["escalations"], 4)
+
+    @patch("orchestrator.llm_router.GeminiLLMClient")
+    def test_tiered_mode_classifier(self, MockLLMClient):
+        """Test the local classifier answers confident escalations before the LLM."""
+        os.environ["USE_REAL_LLM_ROUTER"] = "tiered"
+        mock_instance = MockLLMClient.return_value
+
+        router = LLMRouter()
+        self.assertIsNotNone(router.classifier)
+        # The threshold calibrated at training time applies unless overridden
+        self.assertEqual(router.classifier_threshold, router.classifier.threshold)
+
+        debug_info = {}
+        result = router.classify("someone stole my card", debug_info)
+        self.assertEqual(debug_info["router_tier"], "classifier")
+        self.assertEqual(result["action_type"], "block_card")
+        self.assertGreaterEqual(result["confidence"], router.classifier_threshold)
+
+        # Nothing the classifier is sure about still goes to the LLM, including
+        # account questions outside the supported actions
+        mock_instance.generate.return_value = json.dumps({
+            "intent": "ambiguous",
+            "action_type": None,
+            "confidence": 0.3
+        })
+        for text in ("hows the weather", "what is my credit score", "how do I increase my credit limit"):
+            debug_info = {}
+            router.classify(text, debug_info)
+            self.assertEqual(debug_info["router_tier"], "llm", text)
+        self.assertEqual(mock_instance.generate.call_count, 3)
+        self.assertEqual(router.stats()["classifier_answers"], 1)
+
 if __name__ == "__main__":
     unittest.main()
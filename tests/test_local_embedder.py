@@ -0,0 +1,64 @@
+"""
+Unit tests for the local sentence-transformers embedding provider wiring.
+"""
+import subprocess
+import sys
+from unittest.mock import patch
+
+import numpy as np
+
+from orchestrator import local_embedder
+from orchestrator.embedding_rag import EmbeddingRAG
+
+
+class FakeEmbedder:
+    """Stands in for a loaded model: counts loads and returns unit vectors."""
+    loads = 0
+
+    def __init__(self, model_name, quantize):
+        FakeEmbedder.loads += 1
+        self.signature = f"sentence-transformers:{model_name}"
+
+    def embed_texts(self, texts):
+        matrix = np.ones((len(texts), 8), dtype=np.float32)
+        return matrix / np.linalg.norm(matrix, axis=1, keepdims=True)
+
+    def embed_text(self, text):
+        return self.embed_texts([text])[0]
+
+
+def test_model_loaded_once_per_process():
+    FakeEmbedder.loads = 0
+    with patch.object(local_embedder, "SENTENCE_TRANSFORMERS_AVAILABLE", True), \
+         patch.object(local_embedder, "LocalEmbedder", FakeEmbedder), \
+         patch.dict(local_embedder._EMBEDDERS, clear=True):
+        first = local_embedder.load_local_embedder("all-MiniLM-L6-v2", "int8")
+        second = local_embedder.load_local_embedder("all-MiniLM-L6-v2", "int8")
+    assert first is second
+    assert FakeEmbedder.loads == 1
+
+
+def test_rag_uses_local_provider(tmp_path):
+    kb_path = tmp_path / "kb.txt"
+    kb_path.write_text("Forex markup is 1%.\n", encoding="utf-8")
+    with patch("orchestrator.embedding_provider.EMBEDDING_PROVIDER", "sentence-transformers"), \
+         patch("orchestrator.embedding_provider.EMBEDDING_CACHE_PATH", ""), \
+         patch("orchestrator.embedding_provider.load_local_embedder", lambda: FakeEmbedder("all-MiniLM-L6-v2", "none")):
+        rag = EmbeddingRAG(kb_path=str(kb_path), index_dir=str(tmp_path / "index"))
+        rag.build_index()
+
+    assert rag._embedding_signature() == "sentence-transformers:all-MiniLM-L6-v2"
+    assert rag.embeddings.shape == (1, 8)
+    assert rag.search("forex")[0]["score"] > 0.99
+
+
+def test_missing_package_falls_back_to_mock():
+    with patch.object(local_embedder, "SENTENCE_TRANSFORMERS_AVAILABLE", False):
+        assert local_embedder.load_local_embedder() is None
+
+
+def test_import_does_not_load_torch():
+    # The API imports this module via embedding_provider even with mock or Gemini embeddings
+    code = "import sys, orchestrator.embedding_provider; print(sorted({'torch', 'sentence_transformers'} & set(sys.modules)))"
+    output = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True)
+    assert output.stdout.strip() == "[]"
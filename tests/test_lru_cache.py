@@ -0,0 +1,100 @@
+"""
+Tests for the TTL LRU cache and its use as the RAG query-embedding cache.
+"""
+import os
+import shutil
+import unittest
+
+from orchestrator.lru_cache import TTLLRUCache
+from orchestrator.embedding_rag import EmbeddingRAG
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class TestTTLLRUCache(unittest.TestCase):
+
+    def test_lru_eviction(self):
+        cache = TTLLRUCache(maxsize=2, ttl_seconds=60)
+        cache.put("a", 1)
+        cache.put("b", 2)
+        self.assertEqual(cache.get("a"), 1)  # "b" is now least recently used
+        cache.put("c", 3)
+        self.assertIsNone(cache.get("b"))
+        self.assertEqual(cache.get("a"), 1)
+        self.assertEqual(cache.get("c"), 3)
+
+    def test_ttl_expiry(self):
+        clock = FakeClock()
+        cache = TTLLRUCache(maxsize=10, ttl_seconds=5, clock=clock)
+        cache.put("a", 1)
+        clock.now = 4.9
+        self.assertEqual(cache.get("a"), 1)
+        clock.now = 5.0
+        self.assertIsNone(cache.get("a"))
+        self.assertEqual(len(cache), 0)
+
+    def test_stats_and_disabled(self):
+        cache = TTLLRUCache(maxsize=10, ttl_seconds=60)
+        cache.put("a", 1)
+        cache.get("a")
+        cache.get("missing")
+        stats = cache.stats()
+        self.assertEqual((stats["hits"], stats["misses"], stats["size"]), (1, 1, 1))
+        self.assertEqual(stats["hit_rate"], 0.5)
+
+        disabled = TTLLRUCache(maxsize=0)
+        disabled.put("a", 1)
+        self.assertIsNone(disabled.get("a"))
+
+
+class TestQueryEmbeddingCache(unittest.TestCase):
+
+    def setUp(self):
+        self.test_dir = "tests/test_query_cache_index"
+        self.kb_path = "tests/test_query_cache_kb.txt"
+        with open(self.kb_path, "w", encoding="utf-8") as f:
+            f.write("Forex markup is 1%.\nLate payment fee is 2.5%.\n")
+
+    def tearDown(self):
+        if os.path.exists(self.test_dir):
+            shutil.rmtree(self.test_dir)
+        if os.path.exists(self.kb_path):
+            os.remove(self.kb_path)
+
+    def test_repeat_queries_hit_cache(self):
+        rag = EmbeddingRAG(kb_path=self.kb_path, index_dir=self.test_dir)
+        rag.build_index()
+
+        embedded = []
+        original_get_embedding = rag._get_embedding
+        rag._get_embedding = lambda text: embedded.append(text) or original_get_embedding(text)
+
+        rag.search("What is the forex markup")
+        rag.search("  what is the FOREX   markup ")
+        self.assertEqual(len(embedded), 1)
+        stats = rag.cache_stats()["query_embeddings"]
+        self.assertEqual((stats["hits"], stats["misses"]), (1, 1))
+
+    def test_cache_invalidated_on_index_change(self):
+        rag = EmbeddingRAG(kb_path=self.kb_path, index_dir=self.test_dir)
+        rag.build_index()
+        rag.search("late fee")
+        first_id = rag.index_id
+        self.assertEqual(len(rag.query_cache), 1)
+
+        with open(self.kb_path, "a", encoding="utf-8") as f:
+            f.write("Cash withdrawal fee is 2.5%.\n")
+        rag.build_index(rebuild=True)
+
+        self.assertNotEqual(rag.index_id, first_id)
+        self.assertEqual(len(rag.query_cache), 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,50 @@
+"""
+Tests for the vectorized mock embedder.
+"""
+import random
+
+import numpy as np
+
+from orchestrator import mock_embedder
+
+
+def test_batch_matches_single_and_is_deterministic():
+    texts = ["Forex markup is 1%", "Block my lost card", "hello"]
+    batch = mock_embedder.embed_texts(texts)
+    assert batch.shape == (3, mock_embedder.MOCK_EMBEDDING_DIM)
+    assert batch.dtype == np.float32
+    for row, text in enumerate(texts):
+        np.testing.assert_array_equal(batch[row], mock_embedder.embed_text(text))
+    np.testing.assert_array_equal(batch, mock_embedder.embed_texts(texts))
+    np.testing.assert_allclose(np.linalg.norm(batch, axis=1), 1.0, rtol=1e-5)
+
+
+def test_concept_dimensions():
+    forex, travel, unrelated = mock_embedder.embed_texts([
+        "What is the forex markup?", "Fees when I travel abroad", "Contact support"
+    ])
+    assert forex[0] > 0.9 and travel[0] > 0.9 and unrelated[0] == 0.0
+    # Shared concept makes paraphrases far more similar than unrelated texts
+    assert forex @ travel > 0.7
+    assert abs(forex @ unrelated) < 0.3
+
+
+def test_global_random_state_untouched():
+    random.seed(1234)
+    expected = random.random()
+    random.seed(1234)
+    mock_embedder.embed_texts(["some text", "another text"])
+    assert random.random() == expected
+
+
+def test_empty_batch():
+    assert mock_embedder.embed_texts([]).shape == (0, mock_embedder.MOCK_EMBEDDING_DIM)
+
+
+def test_vector_independent_of_batch():
+    alone = mock_embedder.embed_text("Lost my card abroad")
+    batch = mock_embedder.embed_texts(["hello", "Lost my card abroad", "forex\nreward"])
+    np.testing.assert_array_equal(batch[1], alone)
+    # Concept hits stay within their own text
+    assert batch[0][:4].tolist() == [0.0, 0.0, 0.0, 0.0]
+    assert batch[2][0] > 0 and batch[2][1] > 0
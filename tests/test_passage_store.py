@@ -0,0 +1,65 @@
+"""
+Unit tests for the columnar passage store.
+"""
+import hashlib
+import json
+
+from orchestrator.passage_store import PassageStore
+
+
+def record(text, source="kb.txt", line_no=1):
+    return {
+        "text": text,
+        "source": source,
+        "line_no": line_no,
+        "line_end": line_no + 1,
+        "content_hash": hashlib.sha256(text.encode("utf-8")).hexdigest()
+    }
+
+
+def test_rows_read_back_from_columns():
+    records = [record("Forex markup is 1%.", line_no=3), record("Reward points: 5x.", "rewards.md", 7)]
+    store = PassageStore.from_records(records)
+
+    assert len(store) == 2
+    assert store.sources == ["kb.txt", "rewards.md"]
+    passage = store[1]
+    assert passage["chunk_id"] == 1
+    assert passage["text"] == "Reward points: 5x."
+    assert passage["source"] == "rewards.md"
+    assert (passage["line_no"], passage["line_end"]) == (7, 8)
+    assert passage["content_hash"] == records[1]["content_hash"]
+    assert dict(store[0])["preview"] == "Forex markup is 1%."
+
+
+def test_preview_is_derived_not_stored():
+    store = PassageStore.from_records([record("x" * 500)])
+    assert store[0]["preview"] == "x" * 120
+    meta, arrays = store.to_arrays()
+    assert "preview" not in json.dumps(meta) and "preview" not in arrays
+
+
+def test_round_trip_and_legacy_list():
+    records = [record(f"clause {i}", line_no=i) for i in range(1, 5)]
+    store = PassageStore.from_records(records)
+    restored = PassageStore.from_arrays(*store.to_arrays())
+
+    assert list(restored.texts()) == [r["text"] for r in records]
+    assert restored.content_hashes() == [r["content_hash"] for r in records]
+    # Columns stored in a legacy metadata.json are still readable
+    columns = PassageStore.from_dict(json.loads(json.dumps({
+        "buffer": str(store.buffer, "utf-8"),
+        "offsets": store.offsets.tolist(),
+        "line_no": store.line_no.tolist(),
+        "line_end": store.line_end.tolist(),
+        "sources": store.sources,
+        "source_ids": store.source_ids.tolist(),
+        "content_hashes": store.content_hashes()
+    })))
+    assert [dict(p) for p in columns] == [dict(p) for p in store]
+    # Metadata written before the columnar layout is still readable
+    legacy = PassageStore.from_dict([dict(r, chunk_id=i, preview=r["text"]) for i, r in enumerate(records)])
+    assert [dict(p) for p in legacy] == [dict(p) for p in store]
+    # Passage dicts from before content hashes get them computed from the text
+    unhashed = PassageStore.from_records([{k: v for k, v in r.items() if k != "content_hash"} for r in records])
+    assert unhashed.content_hashes() == [r["content_hash"] for r in records]
@@ -0,0 +1,56 @@
+"""
+Unit tests for the rerank stage.
+"""
+import subprocess
+import sys
+from unittest.mock import patch
+
+from orchestrator import reranker as reranker_module
+from orchestrator.reranker import LexicalOverlapReranker, create_reranker
+from orchestrator.search_result import SearchResult
+
+
+def candidates(*texts):
+    return [SearchResult({"text": text, "chunk_id": i}, score=1.0 - 0.1 * i) for i, text in enumerate(texts)]
+
+
+def test_lexical_reranker_promotes_term_matches():
+    results = candidates("Forex markup is 1%.", "Late payment charges are 2.5%.", "Reward points.")
+    reranked = LexicalOverlapReranker(batch_size=2).rerank("What are the late payment charges?", results, 2, 1.0)
+
+    assert [r["chunk_id"] for r in reranked] == [1, 0]
+    assert reranked[0]["rerank_score"] == 1.0
+    assert reranked[0]["score"] == results[1]["score"]
+
+
+def test_budget_exceeded_returns_none():
+    results = candidates("a b", "c d", "e f")
+    clock = iter([0.0, 0.0, 5.0, 5.0])
+    with patch.object(reranker_module.time, "perf_counter", lambda: next(clock)):
+        assert LexicalOverlapReranker(batch_size=1).rerank("c", results, 2, 1.0) is None
+
+
+def test_rag_keeps_first_stage_order_when_over_budget(tmp_path):
+    from orchestrator.embedding_rag import EmbeddingRAG
+
+    kb_path = tmp_path / "kb.txt"
+    kb_path.write_text("Forex markup is 1%.\n", encoding="utf-8")
+    rag = EmbeddingRAG(kb_path=str(kb_path), index_dir=str(tmp_path / "index"), reranker=LexicalOverlapReranker())
+    first_stage = candidates("x", "y", "z")
+
+    with patch.object(LexicalOverlapReranker, "rerank", return_value=None):
+        assert rag._rerank("y", first_stage, 2) == first_stage[:2]
+    assert rag.cache_stats()["reranker"]["over_budget"] == 1
+
+
+def test_cross_encoder_falls_back_without_sentence_transformers():
+    with patch.object(reranker_module, "CROSS_ENCODER_AVAILABLE", False):
+        assert isinstance(create_reranker("cross-encoder"), LexicalOverlapReranker)
+    assert create_reranker("unknown") is None
+
+
+def test_import_does_not_load_cross_encoder():
+    # Disabled or lexical rerankers must not pull torch into the process
+    code = "import sys, orchestrator.reranker; print(sorted({'torch', 'sentence_transformers'} & set(sys.modules)))"
+    output = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True)
+    assert output.stdout.strip() == "[]"
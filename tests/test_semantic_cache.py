@@ -0,0 +1,54 @@
+"""
+Unit tests for the semantic RAG answer cache.
+"""
+from unittest.mock import MagicMock
+
+import numpy as np
+
+from orchestrator.agent import AssistantAgent
+from orchestrator.semantic_cache import SemanticAnswerCache
+
+
+def unit(*values):
+    vector = np.array(values, dtype=np.float32)
+    return vector / np.linalg.norm(vector)
+
+
+def test_similar_query_over_same_chunks_hits():
+    cache = SemanticAnswerCache(min_similarity=0.95)
+    chunks = [("kb.txt", 0), ("kb.txt", 2)]
+    cache.put("idx", unit(1, 0, 0), chunks, "Forex markup is 1%.")
+
+    assert cache.get("idx", unit(1, 0.1, 0), list(reversed(chunks))) == "Forex markup is 1%."
+    assert cache.get("idx", unit(0, 1, 0), chunks) is None                # dissimilar question
+    assert cache.get("idx", unit(1, 0, 0), [("kb.txt", 0)]) is None        # different chunks
+    assert (cache.stats()["hits"], cache.stats()["misses"]) == (1, 2)
+
+
+def test_rebuilt_index_invalidates_and_lru_evicts():
+    cache = SemanticAnswerCache(maxsize=1)
+    cache.put("idx-1", unit(1, 0), [("kb.txt", 0)], "old answer")
+    assert cache.get("idx-2", unit(1, 0), [("kb.txt", 0)]) is None
+    assert cache.stats()["chunk_sets"] == 0
+
+    cache.put("idx-2", unit(1, 0), [("kb.txt", 0)], "a")
+    cache.put("idx-2", unit(1, 0), [("kb.txt", 1)], "b")
+    assert cache.get("idx-2", unit(1, 0), [("kb.txt", 0)]) is None
+    assert cache.get("idx-2", unit(1, 0), [("kb.txt", 1)]) == "b"
+
+
+def test_agent_skips_llm_on_repeat_question():
+    agent = AssistantAgent()
+    agent.router = MagicMock()
+    agent.router.classify.return_value = {"intent": "info", "action_type": None}
+    agent.llm = MagicMock()
+    agent.llm.real_mode = True
+    agent.llm.generate.return_value = "The forex markup is 1%."
+
+    first = agent.handle_turn("user123", "What is the forex markup?", {})
+    second = agent.handle_turn("user123", "what is the forex markup?", {})
+
+    assert agent.llm.generate.call_count == 1
+    assert first["debug_info"]["answer_cache_hit"] is False
+    assert second["debug_info"]["answer_cache_hit"] is True
+    assert second["response_text"] == "The forex markup is 1%."